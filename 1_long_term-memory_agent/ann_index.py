@@ -0,0 +1,513 @@
+"""Índice aproximado (IVF) para la búsqueda semántica del store de memorias.
+
+`InMemoryStore.search` compara la consulta con todos los vectores del namespace en Python.
+`IVFIndex` agrupa los vectores en `nlist` listas con k-means y, al buscar, sólo puntúa las
+`nprobe` listas cuyos centroides están más cerca de la consulta: subir `nprobe` mejora el
+recall a costa de latencia. `ANNStore` es un InMemoryStore que mantiene un IVFIndex por
+namespace y lo usa en `search`, así que se enchufa igual que el original:
+
+    store = ANNStore(index={"dims": 1536, "embed": embeddings}, nprobe=8)
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langgraph.store.base import Item, SearchItem, SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from vector_file import VectorFile
+
+# int4: dos componentes por byte (nibble bajo = par, alto = impar), desplazados +8
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8, "int4": np.uint8}
+# Bytes de float32 decodificados por bloque al puntuar: que el bloque quepa en la caché L2
+SCAN_BLOCK_BYTES = 1 << 20
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0, chunk: int = 65536) -> np.ndarray:
+    """K-means esférico (similitud coseno) con NumPy. Devuelve los centroides normalizados."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_lists(data, centroids, chunk)
+        counts = np.bincount(assign, minlength=k)
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.zeros_like(centroids)
+        nonempty = counts > 0
+        sums[nonempty] = np.add.reduceat(data[order], starts[nonempty], axis=0)
+        # Las listas vacías se resiembran con puntos al azar
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = data[rng.choice(len(data), size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def assign_lists(data: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Centroide más cercano de cada vector, por bloques para acotar la memoria."""
+    assign = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), chunk):
+        assign[start : start + chunk] = np.argmax(data[start : start + chunk] @ centroids.T, axis=1)
+    return assign
+
+
+class IVFIndex:
+    """Índice IVF (inverted file) sobre vectores normalizados, con altas y bajas incrementales.
+
+    Mientras tiene menos de `train_size` vectores busca por fuerza bruta (en NumPy); al
+    alcanzarlo entrena k-means con `nlist` listas (por defecto ~sqrt(n)) y vuelve a entrenar
+    cuando el índice crece `retrain_growth` veces. Las bajas marcan la fila como borrada y
+    el hueco se compacta cuando supera `max_dead` del total.
+
+    Los vectores se guardan en memoria en float32, float16 (2x menos), int8 con una escala
+    por vector (algo menos de 4x: `dims` + 13 bytes por fila frente a 4 * `dims` + 9, con
+    la escala, la lista y la marca de viva) o int4, dos componentes por byte con su escala
+    (`dims` / 2 + 13 bytes: ~7.9x con 1536 dimensiones). float16 ahorra memoria pero no
+    tiempo: NumPy lo pasa a float32 en cada producto y la búsqueda exhaustiva va ~6x más
+    lenta que en float32; int8 va casi a la par. int4 sólo tiene 16 niveles por componente
+    y pierde recall (~0.87@10 frente a ~0.99 de int8), así que está pensado para usarse con
+    `rescore`. Con `rescore` > 0 y `exact_path`, además se escriben en float32 en un
+    fichero mapeado en memoria: la búsqueda preselecciona `k * rescore` candidatos con los
+    vectores cuantizados y los reordena con los exactos, leyendo sólo esas filas.
+
+    Args:
+        dims: dimensión de los vectores.
+        nlist: número de listas; None para elegirlo al entrenar.
+        nprobe: listas visitadas por búsqueda (el mando recall/latencia).
+        train_size: vectores a partir de los cuales se entrena.
+        storage: "float32", "float16", "int8" o "int4".
+        rescore: factor de sobremuestreo para reordenar con los vectores exactos (0 = no).
+        exact_path: fichero para los vectores exactos (obligatorio si `rescore` > 0).
+    """
+
+    def __init__(
+        self,
+        dims: int,
+        *,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_size: int = 4096,
+        retrain_growth: float = 4.0,
+        max_dead: float = 0.25,
+        storage: str = "float32",
+        rescore: int = 0,
+        exact_path: Optional[str] = None,
+        seed: int = 0,
+    ) -> None:
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"storage must be one of {sorted(STORAGE_DTYPES)}, got {storage!r}")
+        if rescore and exact_path is None:
+            raise ValueError("rescore needs exact_path to keep the exact vectors")
+        self.dims = dims
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.retrain_growth = retrain_growth
+        self.max_dead = max_dead
+        self.storage = storage
+        self.rescore = rescore
+        self.seed = seed
+        self.exact = VectorFile(exact_path, dims) if exact_path else None
+        if self.exact is not None:
+            self.exact.truncate(0)
+        code_dims = (dims + 1) // 2 if storage == "int4" else dims
+        self._codes = np.empty((0, code_dims), dtype=STORAGE_DTYPES[storage])
+        self._scales = np.empty(0, dtype=np.float32)
+        self._exact_rows = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        self._assign = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._ids: List[Hashable] = []
+        self._rows: Dict[Hashable, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_at = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, id_: Hashable) -> bool:
+        return id_ in self._rows
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes en memoria de los vectores (y escalas) de las filas ocupadas, sin el fichero exacto."""
+        size = self._size
+        total = self._codes[:size].nbytes + self._alive[:size].nbytes + self._assign[:size].nbytes
+        if self.storage in ("int8", "int4"):
+            total += self._scales[:size].nbytes
+        if self.exact is not None:
+            total += self._exact_rows[:size].nbytes
+        if self.trained:
+            total += self.centroids.nbytes
+        return total
+
+    # CUANTIZACIÓN
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.storage in ("int8", "int4"):
+            levels = 127 if self.storage == "int8" else 7
+            scales = np.abs(vectors).max(axis=1) / levels
+            scales[scales == 0] = 1.0
+            codes = np.rint(vectors / scales[:, None])
+            if self.storage == "int8":
+                return codes.astype(np.int8), scales.astype(np.float32)
+            nibbles = np.full((len(vectors), 2 * self._codes.shape[1]), 8, dtype=np.uint8)
+            nibbles[:, : self.dims] = codes + 8
+            return nibbles[:, 0::2] | (nibbles[:, 1::2] << 4), scales.astype(np.float32)
+        return vectors.astype(STORAGE_DTYPES[self.storage]), np.ones(len(vectors), dtype=np.float32)
+
+    def _decode(self, rows: Any) -> np.ndarray:
+        codes = self._codes[rows]
+        if self.storage == "int4":
+            vectors = np.empty((len(codes), 2 * codes.shape[1]), dtype=np.float32)
+            vectors[:, 0::2] = codes & 0x0F
+            vectors[:, 1::2] = codes >> 4
+            vectors = vectors[:, : self.dims] - 8
+        else:
+            vectors = codes.astype(np.float32, copy=False)
+        if self.storage in ("int8", "int4"):
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def reconstruct(self, id_: Hashable) -> np.ndarray:
+        """El vector guardado para `id_` (el exacto si existe, si no el cuantizado)."""
+        row = self._rows[id_]
+        if self.exact is not None:
+            return self.exact.rows(self._exact_rows[row])
+        return self._decode(slice(row, row + 1))[0]
+
+    # ALTAS Y BAJAS
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= len(self._codes):
+            return
+        capacity = max(needed, 2 * len(self._codes), 1024)
+
+        def grown(array: np.ndarray, fill: Any) -> np.ndarray:
+            new = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            new[: self._size] = array[: self._size]
+            return new
+
+        self._codes = grown(self._codes, 0)
+        self._scales = grown(self._scales, 1)
+        self._exact_rows = grown(self._exact_rows, -1)
+        self._alive = grown(self._alive, False)
+        self._assign = grown(self._assign, -1)
+
+    def add(self, ids: Sequence[Hashable], vectors: Any) -> None:
+        """Inserta (o reemplaza) vectores. `vectors` es una matriz (len(ids), dims).
+
+        Si un id se repite en la misma llamada, vale el último (como al añadirlos uno a uno).
+        """
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dims))
+        last = {id_: i for i, id_ in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids, vectors = [ids[i] for i in keep], vectors[keep]
+        self.remove([id_ for id_ in ids if id_ in self._rows])
+        self._reserve(len(ids))
+        start, end = self._size, self._size + len(ids)
+        self._codes[start:end], self._scales[start:end] = self._encode(vectors)
+        if self.exact is not None:
+            first = self.exact.append(vectors)
+            self._exact_rows[start:end] = np.arange(first, first + len(ids))
+        self._alive[start:end] = True
+        for row, id_ in enumerate(ids, start):
+            self._rows[id_] = row
+        self._ids.extend(ids)
+        self._size = end
+        if self.trained:
+            assign = assign_lists(vectors, self.centroids)
+            self._assign[start:end] = assign
+            for row, list_id in enumerate(assign.tolist(), start):
+                self._lists[list_id].append(row)
+                self._list_arrays.pop(list_id, None)
+        if len(self) >= self.train_size and (
+            not self.trained or len(self) >= self.retrain_growth * self._trained_at
+        ):
+            self.train()
+
+    def remove(self, ids: Sequence[Hashable]) -> None:
+        for id_ in ids:
+            row = self._rows.pop(id_, None)
+            if row is not None:
+                self._alive[row] = False
+        if self._size and self._size - len(self) > self.max_dead * self._size:
+            self._compact()
+
+    def _compact(self) -> None:
+        # El fichero exacto es append-only: sólo se descartan las filas que lo apuntan
+        keep = np.flatnonzero(self._alive[: self._size])
+        self._codes = self._codes[keep]
+        self._scales = self._scales[keep]
+        self._exact_rows = self._exact_rows[keep]
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._assign = self._assign[keep]
+        self._ids = [self._ids[row] for row in keep.tolist()]
+        self._rows = {id_: row for row, id_ in enumerate(self._ids)}
+        self._size = len(keep)
+        if self.trained:
+            self._rebuild_lists()
+
+    def _rebuild_lists(self) -> None:
+        assign = self._assign[: self._size]
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i] : bounds[i + 1]].tolist() for i in range(len(self.centroids))]
+        self._list_arrays = {}
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, chunk: int = 65536) -> None:
+        """(Re)entrena los centroides con una muestra de los vectores vivos y reasigna todo."""
+        if self._size - len(self):
+            self._compact()
+        size = self._size
+        k = min(nlist or self.nlist or max(1, int(np.sqrt(size))), size)
+        rng = np.random.default_rng(self.seed)
+        sample = np.arange(size) if size <= 64 * k else np.sort(rng.choice(size, size=64 * k, replace=False))
+        self.centroids = kmeans(self._decode(sample), k, iterations=iterations, seed=self.seed)
+        for start in range(0, size, chunk):
+            rows = slice(start, min(size, start + chunk))
+            self._assign[rows] = assign_lists(self._decode(rows), self.centroids)
+        self._rebuild_lists()
+        self._trained_at = len(self)
+
+    # BÚSQUEDA
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        rows = self._list_arrays.get(list_id)
+        if rows is None:
+            rows = self._list_arrays[list_id] = np.asarray(self._lists[list_id], dtype=np.int64)
+        return rows
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Filas vivas a puntuar para `query` (todas si el índice aún no está entrenado)."""
+        if not self.trained:
+            return np.flatnonzero(self._alive[: self._size])
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        closest = self.centroids @ query
+        probe = np.argpartition(-closest, nprobe - 1)[:nprobe]
+        rows = np.concatenate([self._list_rows(i) for i in probe.tolist()])
+        return rows[self._alive[rows]]
+
+    def _scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Similitud de `query` con las filas `rows`, decodificando float16/int8 a bloques que caben en caché."""
+        block = max(1, SCAN_BLOCK_BYTES // (4 * self.dims))
+        # Sin entrenar y sin huecos las filas son 0.._size-1: bloques contiguos, sin fancy indexing
+        contiguous = not self.trained and len(rows) == self._size
+        if self.storage == "int4":
+            # (nibble - 8) · q = bajos · q[pares] + altos · q[impares] - 8 * suma(q): sin desempaquetar en orden
+            padded = np.zeros(2 * self._codes.shape[1], dtype=np.float32)
+            padded[: self.dims] = query
+            low, high, offset = padded[0::2], padded[1::2], 8 * float(query.sum())
+        parts = []
+        for i in range(0, len(rows), block):
+            selection = slice(i, min(i + block, len(rows))) if contiguous else rows[i : i + block]
+            codes = self._codes[selection]
+            if self.storage == "int4":
+                scores = (codes & 0x0F).astype(np.float32) @ low + (codes >> 4).astype(np.float32) @ high - offset
+            else:
+                scores = codes.astype(np.float32, copy=False) @ query
+            if self.storage in ("int8", "int4"):
+                # (código · escala) · q = escala · (código · q): se escala la puntuación, no el vector
+                scores *= self._scales[selection]
+            parts.append(scores)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        return rows, scores
+
+    def search(
+        self, query: Any, k: int = 10, nprobe: Optional[int] = None, rescore: Optional[int] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Los `k` ids más similares (coseno) a `query`, de mayor a menor puntuación."""
+        if not len(self) or k <= 0:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        rescore = self.rescore if rescore is None else rescore
+        rows = self.candidates(query, nprobe)
+        scores = self._scores(rows, query)
+        rows, scores = self._top(rows, scores, k * rescore if rescore and self.exact else k)
+        if rescore and self.exact is not None:
+            exact_rows = self._exact_rows[rows]
+            order = np.argsort(exact_rows)  # lectura secuencial del fichero
+            rows = rows[order]
+            rows, scores = self._top(rows, self.exact.rows(exact_rows[order]) @ query, k)
+        order = np.argsort(-scores, kind="stable")
+        return [(self._ids[row], float(score)) for row, score in zip(rows[order].tolist(), scores[order].tolist())]
+
+
+class ANNStore(InMemoryStore):
+    """InMemoryStore cuyas búsquedas semánticas usan un IVFIndex por namespace.
+
+    Los vectores de cada campo indexado entran en el índice como (key, path), igual que en
+    `_vectors`; el ítem se puntúa con el máximo de sus campos, como en InMemoryStore. Las
+    búsquedas con `filter` siguen el camino exacto del store original.
+
+    El índice es el único dueño de los vectores: al indexarlos se sacan de `_vectors`, donde
+    InMemoryStore los guarda como listas de floats de Python (~32 bytes por componente).
+
+    Args:
+        index: configuración de embeddings, como en InMemoryStore.
+        exact_dir: directorio para los ficheros de vectores exactos de cada namespace
+            (necesario para `rescore`).
+        **index_kwargs: parámetros de cada IVFIndex (nprobe, nlist, storage, rescore...).
+    """
+
+    def __init__(
+        self, *, index: Optional[Dict[str, Any]] = None, exact_dir: Optional[str] = None, **index_kwargs: Any
+    ) -> None:
+        super().__init__(index=index)
+        self.exact_dir = exact_dir
+        self.index_kwargs = index_kwargs
+        self._ann: Dict[Tuple[str, ...], IVFIndex] = {}
+        # ToolNode ejecuta las llamadas a herramientas en paralelo: los índices no son thread-safe
+        self._ann_lock = threading.RLock()
+        self._indexed_paths: Dict[Tuple[str, ...], Dict[str, List[str]]] = defaultdict(dict)
+        # Por namespace, cuántos ítems tienen cada número de campos indexados
+        self._path_counts: Dict[Tuple[str, ...], Counter] = defaultdict(Counter)
+
+    def _ann_index(self, namespace: Tuple[str, ...]) -> IVFIndex:
+        if namespace not in self._ann:
+            kwargs = dict(self.index_kwargs)
+            if self.exact_dir is not None:
+                name = hashlib.sha1(json.dumps(namespace).encode("utf-8")).hexdigest()
+                kwargs["exact_path"] = os.path.join(self.exact_dir, f"{name}.f32")
+            self._ann[namespace] = IVFIndex(self.index_config["dims"], **kwargs)
+        return self._ann[namespace]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes en memoria de todos los índices."""
+        return sum(index.nbytes for index in self._ann.values())
+
+    def _use_ann(self, op: SearchOp) -> bool:
+        return bool(op.query and not op.filter and self.index_config and self.embeddings)
+
+    def _matching_namespaces(self, prefix: Tuple[str, ...]) -> List[Tuple[str, ...]]:
+        return [ns for ns in self._data if ns[: len(prefix)] == prefix]
+
+    # MANTENIMIENTO DEL ÍNDICE
+
+    def _insertinmem_store(self, to_embed, embeddings) -> None:
+        # InMemoryStore embebe una vez cada texto distinto pero espera un vector por destino,
+        # así que un lote con textos repetidos fallaba: cada vector va a todos sus destinos
+        for embedding, targets in zip(embeddings, to_embed.values()):
+            for namespace, key, path in targets:
+                self._vectors[namespace][key][path] = embedding
+
+    def _apply_put_ops(self, put_ops) -> None:
+        with self._ann_lock:
+            self._apply_put_ops_locked(put_ops)
+
+    def _apply_put_ops_locked(self, put_ops) -> None:
+        super()._apply_put_ops(put_ops)
+        if not self.index_config:
+            return
+        added: Dict[Tuple[str, ...], Tuple[List[Tuple[str, str]], List[List[float]]]] = defaultdict(lambda: ([], []))
+        for namespace, key in put_ops:
+            vectors = self._vectors[namespace].pop(key, None)
+            if key in self._data[namespace] and not vectors:
+                # Actualización sin re-embeber (index=False): se conserva lo indexado
+                continue
+            index = self._ann_index(namespace)
+            old_paths = self._indexed_paths[namespace].pop(key, None)
+            if old_paths is not None:
+                index.remove([(key, path) for path in old_paths])
+                self._path_counts[namespace][len(old_paths)] -= 1
+            if vectors:
+                ids, rows = added[namespace]
+                for path, vector in vectors.items():
+                    ids.append((key, path))
+                    rows.append(vector)
+                self._indexed_paths[namespace][key] = list(vectors)
+                self._path_counts[namespace][len(vectors)] += 1
+        for namespace, (ids, rows) in added.items():
+            self._ann_index(namespace).add(ids, rows)
+
+    # BÚSQUEDA
+
+    def _filter_items(self, op: SearchOp):
+        # Los candidatos de las búsquedas aproximadas salen del índice, no de un recorrido completo
+        if self._use_ann(op):
+            return []
+        with self._ann_lock:
+            filtered = super()._filter_items(op)
+            if not op.query:
+                return filtered
+            # Búsqueda exacta (con filtro): los vectores se reconstruyen desde el índice
+            rebuilt = []
+            for item, _ in filtered:
+                paths = self._indexed_paths[item.namespace].get(item.key, [])
+                index = self._ann.get(item.namespace)
+                rebuilt.append((item, [index.reconstruct((item.key, path)).tolist() for path in paths]))
+            return rebuilt
+
+    def _batch_search(self, ops, queryinmem_store, results) -> None:
+        with self._ann_lock:
+            self._batch_search_locked(ops, queryinmem_store, results)
+
+    def _batch_search_locked(self, ops, queryinmem_store, results) -> None:
+        exact = {}
+        for i, (op, candidates) in ops.items():
+            if self._use_ann(op) and op.query in queryinmem_store:
+                results[i] = self._ann_search(op, queryinmem_store[op.query])
+            else:
+                exact[i] = (op, candidates)
+        super()._batch_search(exact, queryinmem_store, results)
+
+    def _ann_search(self, op: SearchOp, query: List[float]) -> List[SearchItem]:
+        wanted = op.offset + op.limit
+        scored: Dict[Tuple[Tuple[str, ...], str], float] = {}
+        namespaces = self._matching_namespaces(op.namespace_prefix)
+        for namespace in namespaces:
+            index = self._ann.get(namespace)
+            if index is None:
+                continue
+            # Varios campos por ítem: se piden `wanted` veces los campos del ítem que más tiene,
+            # así quedan `wanted` ítems distintos aunque todos los primeros sean de ítems con muchos
+            fields = max((paths for paths, items in self._path_counts[namespace].items() if items), default=1)
+            for (key, _), score in index.search(query, wanted * fields):
+                if score > scored.get((namespace, key), -np.inf):
+                    scored[(namespace, key)] = score
+        ranked = sorted(scored.items(), key=lambda x: x[1], reverse=True)[op.offset : wanted]
+        kept: List[Tuple[Optional[float], Item]] = [(score, self._data[ns][key]) for (ns, key), score in ranked]
+        if len(kept) < op.limit:
+            # Como en InMemoryStore: si faltan, se completa con ítems sin embedding
+            for namespace in namespaces:
+                for key, item in self._data[namespace].items():
+                    if len(kept) >= op.limit:
+                        break
+                    if key not in self._indexed_paths[namespace]:
+                        kept.append((None, item))
+        return [
+            SearchItem(
+                namespace=item.namespace,
+                key=item.key,
+                value=item.value,
+                created_at=item.created_at,
+                updated_at=item.updated_at,
+                score=score,
+            )
+            for score, item in kept
+        ]
@@ -0,0 +1,84 @@
+"""Benchmark: SqliteSaver vs CoalescingSqliteSaver con 1, 8 y 64 thread_ids concurrentes.
+
+Usa un nodo eco en lugar del LLM para medir sólo el coste del checkpointer.
+
+    python bench_checkpointer.py --turns 20
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import START, END, StateGraph
+from langgraph.graph.message import MessagesState
+
+from coalescing_saver import CoalescingSqliteSaver
+
+
+def echo(state: MessagesState):
+    return {"messages": AIMessage(content=state["messages"][-1].content)}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node(echo)
+workflow.add_edge(START, "echo")
+workflow.add_edge("echo", END)
+
+
+def run_thread(graph, thread_id: str, turns: int):
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        graph.invoke(input={"messages": [HumanMessage(f"turn {turn}")]}, config=config)
+
+
+async def arun_thread(graph, thread_id: str, turns: int):
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        await graph.ainvoke(input={"messages": [HumanMessage(f"turn {turn}")]}, config=config)
+
+
+def bench(saver_cls, threads: int, turns: int, use_async: bool = False):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"), check_same_thread=False)
+        saver = saver_cls(conn)
+        graph = workflow.compile(checkpointer=saver)
+
+        start = time.perf_counter()
+        if use_async:
+            async def main():
+                await asyncio.gather(*(arun_thread(graph, f"t{i}", turns) for i in range(threads)))
+            asyncio.run(main())
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(lambda i: run_thread(graph, f"t{i}", turns), range(threads)))
+        elapsed = time.perf_counter() - start
+
+        transactions = getattr(saver, "stats", {}).get("transactions")
+        if hasattr(saver, "close"):
+            saver.close()
+        conn.close()
+    return elapsed, transactions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20, help="invocaciones por thread_id")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    print(f"{'saver':<28}{'threads':>8}{'turns/s':>12}{'wall (s)':>10}{'txns':>8}")
+    for threads in args.threads:
+        runs = [
+            ("SqliteSaver", SqliteSaver, False),
+            ("CoalescingSqliteSaver", CoalescingSqliteSaver, False),
+            ("CoalescingSqliteSaver/async", CoalescingSqliteSaver, True),
+        ]
+        for name, saver_cls, use_async in runs:
+            elapsed, transactions = bench(saver_cls, threads, args.turns, use_async)
+            rate = threads * args.turns / elapsed
+            print(f"{name:<28}{threads:>8}{rate:>12.1f}{elapsed:>10.2f}{transactions if transactions is not None else '-':>8}")
@@ -0,0 +1,115 @@
+"""Benchmark de la ventana de contexto: tokens de prompt por turno con el historial completo vs. ContextWindow.
+
+    python bench_context_window.py --turns 200 --max-tokens 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import START, END, StateGraph
+
+from context_window import ContextWindow, ConversationState, TokenCounter
+from conversation_index import message_text
+from delta_saver import DeltaSqliteSaver
+
+TOPICS = ["dark mode", "lighting", "memoria", "python", "billing", "kingdom hearts", "langgraph", "sqlite"]
+FILLER = (
+    "Te cuento con detalle lo que sé sobre el tema, con algunos ejemplos, matices y un par de "
+    "recomendaciones prácticas para que lo puedas aplicar en tu proyecto sin sorpresas."
+).split()
+
+counter = TokenCounter()
+
+
+def extractive_summarizer(max_words: int = 150):
+    """Resumidor local (sin modelo): primera frase de cada mensaje del usuario, acotado a `max_words`."""
+
+    def summarize(summary: str, messages: Sequence[BaseMessage]) -> str:
+        lines = summary.splitlines() if summary else []
+        lines += [message_text(m).split(".")[0] for m in messages if m.type == "human"]
+        kept: List[str] = []
+        words = 0
+        for line in reversed(lines):
+            words += len(line.split())
+            if words > max_words:
+                break
+            kept.append(line)
+        return "\n".join(reversed(kept))
+
+    return summarize
+
+
+def build(window: Optional[ContextWindow] = None):
+    """Grafo con un LLM falso que anota los tokens del prompt que recibe."""
+    prompt_tokens: List[int] = []
+
+    def chatbot(state: ConversationState):
+        if window is None:
+            prompt, update = state["messages"], {}
+        else:
+            prompt, update = window.prepare(state)
+        prompt_tokens.append(counter.count_messages(prompt))
+        question = state["messages"][-1].content
+        reply = f"Sobre '{question}': " + " ".join(FILLER * 2)
+        return {"messages": AIMessage(reply), **update}
+
+    workflow = StateGraph(ConversationState)
+    workflow.add_node(chatbot)
+    workflow.add_edge(START, "chatbot")
+    workflow.add_edge("chatbot", END)
+    return workflow, prompt_tokens
+
+
+def replay(saver, window: Optional[ContextWindow], turns: int, seed: int = 0):
+    rng = random.Random(seed)
+    workflow, prompt_tokens = build(window)
+    graph = workflow.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "replay"}}
+    start = time.perf_counter()
+    for turn in range(turns):
+        topic = rng.choice(TOPICS)
+        query = f"Turno {turn}: me interesa {topic}. ¿Qué me recomiendas para seguir avanzando con {topic}?"
+        graph.invoke(input={"messages": [HumanMessage(query)]}, config=config)
+    seconds = time.perf_counter() - start
+    return prompt_tokens, seconds, graph.get_state(config).values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--fold-tokens", type=int, default=1000)
+    args = parser.parse_args()
+
+    window = ContextWindow(extractive_summarizer(), max_tokens=args.max_tokens, fold_tokens=args.fold_tokens)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "full.db"), check_same_thread=False)
+        full, full_seconds, _ = replay(DeltaSqliteSaver(conn, snapshot_every=20), None, args.turns)
+        conn.close()
+
+        db_path = os.path.join(tmp, "window.db")
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        windowed, windowed_seconds, values = replay(DeltaSqliteSaver(conn, snapshot_every=20), window, args.turns)
+        conn.close()
+
+        # El resumen vive en el checkpoint: otro proceso lo recupera al reabrir la base
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        workflow, _ = build(window)
+        reopened = workflow.compile(checkpointer=DeltaSqliteSaver(conn)).get_state({"configurable": {"thread_id": "replay"}})
+        conn.close()
+
+    print(f"{'turno':>6} {'completo':>10} {'ventana':>10}")
+    for turn in sorted({1, 10, 50, 100, 150, args.turns} & set(range(1, args.turns + 1))):
+        print(f"{turn:>6} {full[turn - 1]:>10} {windowed[turn - 1]:>10}")
+    print(f"{'total':>6} {sum(full):>10} {sum(windowed):>10}")
+    print(f"{'máximo':>6} {max(full):>10} {max(windowed):>10}")
+    print(f"ahorro: {1 - sum(windowed) / sum(full):.1%} de los tokens de prompt")
+    print(f"plegados: {window.stats['folds']} llamadas al resumidor, {window.stats['folded_messages']} mensajes")
+    print(f"ms/turno (sin modelo): completo {1000 * full_seconds / args.turns:.2f}, ventana {1000 * windowed_seconds / args.turns:.2f}")
+    print(f"mensajes en el checkpoint: {len(values['messages'])}, resumidos: {values['summarized']}")
+    print(f"resumen recuperado al reabrir: {reopened.values.get('summary') == values['summary']}")
@@ -0,0 +1,88 @@
+"""Benchmark del índice FTS5: coste por write y búsqueda vs. deserializar todos los checkpoints.
+
+    python bench_conversation_index.py --threads 200 --turns 10
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import START, END, StateGraph
+from langgraph.graph.message import MessagesState
+
+from conversation_index import ConversationIndex
+from delta_saver import DeltaSqliteSaver
+
+TOPICS = ["dark mode", "lighting", "memoria", "python", "billing", "kingdom hearts", "langgraph", "sqlite"]
+
+
+def echo(state: MessagesState):
+    return {"messages": AIMessage(content=f"Entendido: {state['messages'][-1].content}")}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node(echo)
+workflow.add_edge(START, "echo")
+workflow.add_edge("echo", END)
+
+
+def fill(saver, threads: int, turns: int, seed: int = 0) -> float:
+    rng = random.Random(seed)
+    graph = workflow.compile(checkpointer=saver)
+    start = time.perf_counter()
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"user-{t}"}}
+        for turn in range(turns):
+            topic = rng.choice(TOPICS)
+            graph.invoke(input={"messages": [HumanMessage(f"Me interesa {topic}, turno {turn}")]}, config=config)
+    return time.perf_counter() - start
+
+
+def scan_search(saver, threads: int, needle: str):
+    """Lo que había que hacer sin índice: cargar el último checkpoint de cada thread y buscar a mano."""
+    hits = []
+    for t in range(threads):
+        checkpoint = saver.get_tuple({"configurable": {"thread_id": f"user-{t}"}})
+        for message in checkpoint.checkpoint["channel_values"]["messages"]:
+            if message.type == "human" and needle in message.content.lower():
+                hits.append((f"user-{t}", message.content))
+    return hits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    writes = args.threads * args.turns
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "plain.db"), check_same_thread=False)
+        plain = DeltaSqliteSaver(conn)
+        plain_seconds = fill(plain, args.threads, args.turns)
+        plain.close()
+
+        conn = sqlite3.connect(os.path.join(tmp, "indexed.db"), check_same_thread=False)
+        indexed = DeltaSqliteSaver(conn, index=ConversationIndex())
+        indexed_seconds = fill(indexed, args.threads, args.turns)
+
+        print(f"turnos: {writes}")
+        print(f"sin índice: {1000 * plain_seconds / writes:.2f} ms/turno")
+        print(f"con índice: {1000 * indexed_seconds / writes:.2f} ms/turno")
+        print(f"coste del índice: {indexed.index_cost()}")
+
+        start = time.perf_counter()
+        results = indexed.search_messages("dark mode", role="human", limit=1000)
+        fts_ms = 1000 * (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scanned = scan_search(indexed, args.threads, "dark mode")
+        scan_ms = 1000 * (time.perf_counter() - start)
+
+        print(f"búsqueda FTS5: {fts_ms:.2f} ms ({len(results)} resultados)")
+        print(f"deserializar todo: {scan_ms:.2f} ms ({len(scanned)} resultados)")
+        print("top 3:", results[:3])
+        indexed.close()
@@ -0,0 +1,77 @@
+"""Benchmark: bytes escritos por turno en un thread de 500 turnos, SqliteSaver vs DeltaSqliteSaver.
+
+    python bench_delta_checkpoints.py --turns 500 --snapshot-every 50
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import START, END, StateGraph
+from langgraph.graph.message import MessagesState
+
+from delta_saver import DeltaSqliteSaver
+
+
+def echo(state: MessagesState):
+    return {"messages": AIMessage(content="respuesta " * 40)}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node(echo)
+workflow.add_edge(START, "echo")
+workflow.add_edge("echo", END)
+
+def stored_bytes(conn: sqlite3.Connection) -> int:
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    total = conn.execute("SELECT coalesce(sum(length(checkpoint) + length(metadata)), 0) FROM checkpoints").fetchone()[0]
+    total += conn.execute("SELECT coalesce(sum(length(value)), 0) FROM writes").fetchone()[0]
+    if "checkpoint_messages" in tables:
+        total += conn.execute("SELECT coalesce(sum(length(value)), 0) FROM checkpoint_messages").fetchone()[0]
+    return total
+
+
+def bench(name: str, make_saver, turns: int, report_at):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"), check_same_thread=False)
+        saver = make_saver(conn)
+        graph = workflow.compile(checkpointer=saver)
+        config = {"configurable": {"thread_id": "long-thread"}}
+
+        previous = 0
+        total_time = 0.0
+        for turn in range(1, turns + 1):
+            start = time.perf_counter()
+            graph.invoke(input={"messages": [HumanMessage(f"pregunta {turn} " * 10)]}, config=config)
+            total_time += time.perf_counter() - start
+            stored = stored_bytes(conn)
+            if turn in report_at:
+                print(f"{name:<24}{turn:>6}{stored - previous:>14,}{stored:>16,}{1000 * total_time / turn:>12.2f}")
+            previous = stored
+
+        messages = graph.get_state(config).values["messages"]
+        assert len(messages) == 2 * turns, len(messages)
+        if hasattr(saver, "close"):
+            saver.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--snapshot-every", type=int, default=50)
+    args = parser.parse_args()
+
+    report_at = {1, 10, 50, 100, 250, args.turns}
+    print(f"{'saver':<24}{'turn':>6}{'bytes/turn':>14}{'total bytes':>16}{'ms/turn':>12}")
+    bench("SqliteSaver", SqliteSaver, args.turns, report_at)
+    bench("DeltaSqliteSaver", DeltaSqliteSaver, args.turns, report_at)
+    bench(
+        f"Delta + snapshot/{args.snapshot_every}",
+        lambda conn: DeltaSqliteSaver(conn, snapshot_every=args.snapshot_every),
+        args.turns,
+        report_at,
+    )
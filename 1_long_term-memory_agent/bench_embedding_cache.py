@@ -0,0 +1,57 @@
+"""Benchmark de la caché de embeddings: llamadas al modelo y latencia con consultas repetidas.
+
+Reproduce un tráfico con consultas "calientes" (distribución de Zipf) contra el stub
+remoto de bench_embeddings, sin caché, con LRU y con LRU + disco tras un reinicio.
+
+    python bench_embedding_cache.py --requests 2000 --distinct 300 --latency-ms 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench_embeddings import StubRemoteEmbeddings, make_memories
+from embedding_cache import CachedEmbeddings
+
+
+def workload(requests: int, distinct: int, seed: int = 0):
+    queries = make_memories(distinct, seed=seed)
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return random.Random(seed).choices(queries, weights=weights, k=requests)
+
+
+def replay(name: str, embeddings, stub: StubRemoteEmbeddings, queries) -> None:
+    calls = stub.calls
+    start = time.perf_counter()
+    for query in queries:
+        embeddings.embed_query(query)
+    seconds = time.perf_counter() - start
+    stats = getattr(embeddings, "stats", {})
+    print(
+        f"{name:<24}{stub.calls - calls:>8}{1000 * seconds / len(queries):>10.2f}"
+        f"{stats.get('hits', '-'):>8}{stats.get('disk_hits', '-'):>8}{stats.get('evictions', '-'):>8}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300)
+    parser.add_argument("--max-entries", type=int, default=100)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    queries = workload(args.requests, args.distinct)
+    stub = StubRemoteEmbeddings(args.dims, args.latency_ms / 1000)
+    print(f"{'embeddings':<24}{'llamadas':>8}{'ms/cons':>10}{'hits':>8}{'disco':>8}{'expuls':>8}")
+    replay("sin caché", stub, stub, queries)
+    replay(f"LRU {args.max_entries}", CachedEmbeddings(stub, max_entries=args.max_entries), stub, queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.db")
+        first = CachedEmbeddings(stub, max_entries=args.max_entries, disk_path=path)
+        replay(f"LRU {args.max_entries} + disco", first, stub, queries)
+        first.close()
+        # Reinicio: LRU vacío, el disco ya tiene todo
+        replay("tras reiniciar", CachedEmbeddings(stub, max_entries=args.max_entries, disk_path=path), stub, queries)
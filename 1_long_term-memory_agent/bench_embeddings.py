@@ -0,0 +1,115 @@
+"""Benchmark: embeddings/segundo y latencia de búsqueda del store, embeddings locales vs. el camino por ítem.
+
+El camino actual (OpenAI) se simula con un stub que hace una "llamada de red" por texto.
+
+    python bench_embeddings.py --memories 2000 --latency-ms 20
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from local_embeddings import HashingEmbeddings
+
+WORDS = (
+    "prefiero dark mode luz cálida salón python sqlite langgraph memoria usuario viaje madrid "
+    "café mañana reunión proyecto agente factura cumpleaños música jazz correr lunes idioma"
+).split()
+
+
+class StubRemoteEmbeddings(Embeddings):
+    """Stub del embedder remoto: una petición por texto con latencia fija, vectores deterministas."""
+
+    def __init__(self, dims: int, latency: float) -> None:
+        self.dims = dims
+        self.latency = latency
+        self.calls = 0
+
+    def _one(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency)
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(self.dims)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._one(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._one(text)
+
+
+def make_memories(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(6, 20))) for _ in range(n)]
+
+
+def puts(memories: List[str]) -> List[PutOp]:
+    return [PutOp(("memories",), str(i), {"content": text}) for i, text in enumerate(memories)]
+
+
+def bench_writes(embed, memories: List[str], batched: bool) -> float:
+    """Devuelve embeddings/segundo al meter todas las memorias en el store."""
+    store = InMemoryStore(index={"dims": embed.dims, "embed": embed})
+    start = time.perf_counter()
+    if batched:
+        # Un único batch: el store hace un solo embed_documents con todo el lote
+        store.batch(puts(memories))
+    else:
+        # Como create_manage_memory_tool: un put (y una llamada de embeddings) por memoria
+        for i, text in enumerate(memories):
+            store.put(("memories",), str(i), {"content": text})
+    seconds = time.perf_counter() - start
+    assert len(store.search(("memories",), limit=len(memories))) == len(memories)
+    return len(memories) / seconds
+
+
+def indexed_store(embed, memories: List[str]) -> InMemoryStore:
+    store = InMemoryStore(index={"dims": embed.dims, "embed": embed})
+    store.batch(puts(memories))
+    return store
+
+
+def bench_search(store: InMemoryStore, queries: int) -> List[float]:
+    """Latencia de store.search (embedding de la consulta + ranking) sobre memorias ya indexadas."""
+    latencies = []
+    for query in make_memories(queries, seed=1):
+        start = time.perf_counter()
+        store.search(("memories",), query=query, limit=5)
+        latencies.append(1000 * (time.perf_counter() - start))
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memories", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    memories = make_memories(args.memories)
+    stub = StubRemoteEmbeddings(args.dims, args.latency_ms / 1000)
+    local = HashingEmbeddings(dims=args.dims)
+
+    # El stub con latencia es lento: lo medimos sobre una muestra
+    sample = memories[: min(len(memories), 200)]
+    print(f"{'backend':<34}{'emb/s':>12}")
+    print(f"{'stub remoto, por ítem':<34}{bench_writes(stub, sample, batched=False):>12,.0f}")
+    # Instancias nuevas: que ninguno de los dos caminos herede la caché de palabras del otro
+    print(f"{'local, por ítem (put)':<34}{bench_writes(HashingEmbeddings(dims=args.dims), memories, batched=False):>12,.0f}")
+    print(f"{'local, en lote (batch)':<34}{bench_writes(HashingEmbeddings(dims=args.dims), memories, batched=True):>12,.0f}")
+
+    print(f"\n{'búsqueda (' + str(args.memories) + ' memorias)':<34}{'p50 ms':>12}{'p99 ms':>12}")
+    # El corpus se indexa sin latencia: sólo las consultas la pagan
+    remote = StubRemoteEmbeddings(args.dims, 0)
+    stores = [("stub remoto", indexed_store(remote, memories)), ("local", indexed_store(local, memories))]
+    remote.latency = args.latency_ms / 1000
+    for name, store in stores:
+        latencies = sorted(bench_search(store, args.queries))
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"{name:<34}{statistics.median(latencies):>12.2f}{p99:>12.2f}")
@@ -0,0 +1,77 @@
+"""Benchmark de búsqueda de memorias: vectorial vs. BM25 vs. híbrida (RRF), latencia y calidad.
+
+Corpus sintético de memorias con códigos y nombres propios (donde los vectores fallan) y
+consultas de dos tipos: palabras clave exactas y consultas en lenguaje natural. Los
+embeddings locales son léxicos; con pocas dimensiones (por defecto 64) las colisiones del
+hashing emborronan los tokens exactos, como le pasa a un modelo semántico con los códigos.
+
+    python bench_hybrid_search.py --memories 3000 --queries 100 --latency-ms 20
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from bench_memory_writes import SlowEmbeddings
+from hybrid_search import HybridStore
+
+NAMES = [
+    "lucía", "martín", "sofía", "hugo", "valeria", "mateo", "carmen", "diego", "elena", "pablo",
+    "irene", "álvaro", "noelia", "sergio", "marta", "raúl", "nuria", "iván", "alba", "jorge",
+]
+SURNAMES = [
+    "garcía", "lópez", "martínez", "sánchez", "pérez", "gómez", "ruiz", "díaz", "moreno", "muñoz",
+    "romero", "navarro", "torres", "domínguez", "vázquez", "ramos", "gil", "serrano", "blanco", "molina",
+]
+RELATIONS = ["hermana", "primo", "jefa", "vecino", "dentista", "profesora", "socio", "abuela", "cuñado", "tía"]
+CITIES = ["valencia", "bilbao", "sevilla", "zaragoza", "málaga", "vigo", "gijón", "granada", "murcia", "cádiz"]
+
+
+def make_corpus(n: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """(texto, consulta por palabra clave, consulta natural) por memoria; cada memoria es única."""
+    rng = random.Random(seed)
+    people = [(r, n_, s) for r in RELATIONS for n_ in NAMES for s in SURNAMES]
+    rng.shuffle(people)
+    corpus = []
+    for relation, name, surname in people[:n]:
+        code = f"PED-{rng.randint(10000, 99999)}"
+        city = rng.choice(CITIES)
+        text = f"Mi {relation} {name} {surname} vive en {city} y su pedido {code} llega el día {rng.randint(1, 28)}"
+        corpus.append((text, code, f"en qué ciudad vive {name} {surname}, mi {relation}"))
+    return corpus
+
+
+def evaluate(store, corpus, targets: List[int], kind: int, k: int = 5):
+    hits, reciprocal, start = 0, 0.0, time.perf_counter()
+    for target in targets:
+        results = store.search(("memories",), query=corpus[target][kind], limit=k)
+        keys = [item.key for item in results]
+        if str(target) in keys:
+            hits += 1
+            reciprocal += 1 / (keys.index(str(target)) + 1)
+    ms = 1000 * (time.perf_counter() - start) / len(targets)
+    return hits / len(targets), reciprocal / len(targets), ms
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memories", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dims", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--budget", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.memories)
+    targets = random.Random(1).sample(range(len(corpus)), args.queries)
+    print(f"{'modo':<8}{'consultas':<12}{'recall@5':>10}{'MRR':>8}{'ms/cons':>10}{'embeds':>8}")
+    for mode in ("vector", "bm25", "hybrid", "auto"):
+        embed = SlowEmbeddings(args.dims, 0)
+        store = HybridStore(index={"dims": args.dims, "embed": embed}, mode=mode, rerank_budget=args.budget)
+        for i, (text, _, _) in enumerate(corpus):
+            store.put(("memories",), str(i), {"content": text})
+        embed.latency = args.latency_ms / 1000
+        for kind, label in ((1, "clave"), (2, "natural")):
+            calls = embed.calls
+            recall, mrr, ms = evaluate(store, corpus, targets, kind)
+            print(f"{mode:<8}{label:<12}{recall:>10.3f}{mrr:>8.3f}{ms:>10.2f}{embed.calls - calls:>8}")
@@ -0,0 +1,99 @@
+"""Benchmark de escrituras de memorias: put directo vs. write-behind, y efecto de la consolidación.
+
+El modelo de embeddings se simula con una latencia fija por llamada (como una petición HTTP
+a la API, que acepta muchos textos por petición).
+
+    python bench_memory_writes.py --turns 50 --facts 8 --latency-ms 30
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from ann_index import ANNStore
+from local_embeddings import HashingEmbeddings
+from memory_writes import WriteBehindStore, consolidate
+
+FACTS = [
+    "prefiero el dark mode",
+    "me gusta la luz cálida en el salón",
+    "mi lenguaje favorito es python",
+    "vivo en madrid",
+    "tomo café por la mañana",
+    "los lunes tengo reunión de proyecto",
+    "escucho jazz para concentrarme",
+    "salgo a correr los domingos",
+]
+
+
+class SlowEmbeddings(Embeddings):
+    """Embeddings locales con una latencia fija por llamada, contando las llamadas."""
+
+    def __init__(self, dims: int, latency: float) -> None:
+        self.inner = HashingEmbeddings(dims=dims)
+        self.latency = latency
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def paraphrase(rng: random.Random, fact: str) -> str:
+    prefix = rng.choice(["", "recuerda que ", "ok, ", "te dije que ", "como siempre, "])
+    return (prefix + fact + rng.choice(["", ".", "!"])).capitalize()
+
+
+def run_turns(store, turns: int, facts: int, seed: int = 0) -> float:
+    """Cada turno, el agente guarda `facts` memorias con llamadas a herramientas en paralelo."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=facts) as pool:
+        for turn in range(turns):
+            batch = [paraphrase(rng, rng.choice(FACTS)) for _ in range(facts)]
+            list(pool.map(lambda ix: store.put(("memories",), f"{turn}-{ix[0]}", {"content": ix[1]}), enumerate(batch)))
+    if hasattr(store, "flush"):
+        store.flush()
+    return time.perf_counter() - start
+
+
+def search_ms(store, queries: int = 50) -> float:
+    start = time.perf_counter()
+    for i in range(queries):
+        store.search(("memories",), query=FACTS[i % len(FACTS)], limit=5)
+    return 1000 * (time.perf_counter() - start) / queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--facts", type=int, default=8)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+    writes = args.turns * args.facts
+
+    print(f"{'store':<20}{'ms/turno':>10}{'llamadas emb':>14}")
+    for name, wrap in [("put directo", lambda s: s), ("write-behind", WriteBehindStore)]:
+        embed = SlowEmbeddings(args.dims, args.latency_ms / 1000)
+        store = wrap(ANNStore(index={"dims": args.dims, "embed": embed}))
+        seconds = run_turns(store, args.turns, args.facts)
+        print(f"{name:<20}{1000 * seconds / args.turns:>10.1f}{embed.calls:>14}")
+
+    embed = SlowEmbeddings(args.dims, 0)
+    store = ANNStore(index={"dims": args.dims, "embed": embed})
+    run_turns(store, args.turns, args.facts)
+    before = search_ms(store)
+    report = consolidate(store, ("memories",), threshold=args.threshold)
+    after = search_ms(store)
+    remaining = len(store.search(("memories",), limit=writes))
+    print(f"\nconsolidación: {report['items']} -> {remaining} memorias en {report['seconds']:.2f} s")
+    print(f"búsqueda: {before:.2f} ms -> {after:.2f} ms")
@@ -0,0 +1,58 @@
+"""Benchmark de arranque: reabrir PersistentStore frente a recalentar un InMemoryStore re-embebiendo.
+
+    python bench_persistent_store.py --users 200 --memories 100
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from langgraph.store.memory import InMemoryStore
+
+from bench_embeddings import make_memories
+from local_embeddings import HashingEmbeddings
+from persistent_store import PersistentStore
+
+
+def fill(store, users: int, memories: int) -> None:
+    texts = make_memories(memories)
+    for user in range(users):
+        for i, text in enumerate(texts):
+            store.put(("memories", f"user-{user}"), str(i), {"content": text})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--memories", type=int, default=100)
+    parser.add_argument("--dims", type=int, default=1536)
+    args = parser.parse_args()
+    index = {"dims": args.dims, "embed": HashingEmbeddings(dims=args.dims)}
+    total = args.users * args.memories
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PersistentStore(tmp, index=index)
+        fill(store, args.users, args.memories)
+        store.close()
+        on_disk = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(tmp) for f in files)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = PersistentStore(tmp, index=index)
+        startup = time.perf_counter() - start
+        start = time.perf_counter()
+        store.search(("memories", "user-0"), query="dark mode salón", limit=5)
+        first = time.perf_counter() - start
+        resident, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        store.close()
+
+    start = time.perf_counter()
+    memory = InMemoryStore(index=index)
+    fill(memory, args.users, args.memories)
+    warmup = time.perf_counter() - start
+
+    print(f"memorias: {total:,} ({args.users} usuarios), {on_disk / 1e6:.1f} MB en disco")
+    print(f"PersistentStore: arranque {1000 * startup:.2f} ms, primera búsqueda {1000 * first:.2f} ms, {resident / 1e6:.2f} MB en memoria")
+    print(f"InMemoryStore: recalentar (re-embeber todo) {warmup:.2f} s")
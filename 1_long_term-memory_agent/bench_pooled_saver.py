@@ -0,0 +1,100 @@
+"""Benchmark de lecturas y escrituras mezcladas: conexión compartida vs. pool de lectores.
+
+Un ThreadPoolExecutor lanza turnos del grafo (escrituras) mezclados con `get_state` y
+`get_state_history` (lecturas) sobre threads ya rellenos, y mide el throughput y la
+latencia p50/p99 de cada tipo de operación.
+
+    python bench_pooled_saver.py --workers 16 --ops 2000 --read-ratio 0.8
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import START, END, StateGraph
+from langgraph.graph.message import MessagesState
+
+from delta_saver import DeltaSqliteSaver
+from pooled_saver import PooledSqliteSaver
+
+
+def echo(state: MessagesState):
+    return {"messages": AIMessage(content=f"Entendido: {state['messages'][-1].content}")}
+
+
+workflow = StateGraph(MessagesState)
+workflow.add_node(echo)
+workflow.add_edge(START, "echo")
+workflow.add_edge("echo", END)
+
+
+def config(thread: int):
+    return {"configurable": {"thread_id": f"user-{thread}"}}
+
+
+def operation(graph, kind: str, thread: int) -> float:
+    start = time.perf_counter()
+    if kind == "write":
+        graph.invoke(input={"messages": [HumanMessage(f"Nuevo mensaje para user-{thread}")]}, config=config(thread))
+    elif kind == "state":
+        graph.get_state(config(thread))
+    else:
+        list(graph.get_state_history(config(thread), limit=10))
+    return time.perf_counter() - start
+
+
+def bench(make_saver, threads: int, turns: int, workers: int, ops: int, read_ratio: float, seed: int = 0):
+    rng = random.Random(seed)
+    plan = [
+        ("write" if rng.random() >= read_ratio else rng.choice(["state", "history"]), rng.randrange(threads))
+        for _ in range(ops)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"), check_same_thread=False)
+        saver = make_saver(conn)
+        graph = workflow.compile(checkpointer=saver)
+        for thread in range(threads):
+            for turn in range(turns):
+                graph.invoke(input={"messages": [HumanMessage(f"turno {turn}")]}, config=config(thread))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(lambda op: operation(graph, *op), plan))
+        elapsed = time.perf_counter() - start
+
+        if hasattr(saver, "close"):
+            saver.close()
+        conn.close()
+
+    by_kind = {}
+    for (kind, _), seconds in zip(plan, latencies):
+        by_kind.setdefault("write" if kind == "write" else "read", []).append(1000 * seconds)
+    return elapsed, {kind: (np.percentile(ms, 50), np.percentile(ms, 99)) for kind, ms in by_kind.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=50, help="thread_ids prellenados")
+    parser.add_argument("--turns", type=int, default=20, help="turnos iniciales por thread_id")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    args = parser.parse_args()
+
+    runs = [
+        ("SqliteSaver", lambda conn: SqliteSaver(conn)),
+        ("DeltaSqliteSaver", lambda conn: DeltaSqliteSaver(conn, snapshot_every=20)),
+        ("PooledSqliteSaver", lambda conn: PooledSqliteSaver(conn, max_readers=args.workers, snapshot_every=20)),
+    ]
+    print(f"{'saver':<20}{'ops/s':>9}{'read p50':>10}{'read p99':>10}{'write p50':>11}{'write p99':>11}  (ms)")
+    for name, make_saver in runs:
+        elapsed, latency = bench(make_saver, args.threads, args.turns, args.workers, args.ops, args.read_ratio)
+        read = latency.get("read", (0.0, 0.0))
+        write = latency.get("write", (0.0, 0.0))
+        print(f"{name:<20}{args.ops / elapsed:>9.1f}{read[0]:>10.2f}{read[1]:>10.2f}{write[0]:>11.2f}{write[1]:>11.2f}")
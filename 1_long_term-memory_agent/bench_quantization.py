@@ -0,0 +1,72 @@
+"""Benchmark de almacenamiento cuantizado: memoria por vector y pérdida de recall@k.
+
+Compara float32, float16, int8 e int4 (con y sin reordenar con los vectores exactos del fichero
+mapeado) frente a las listas de floats de Python que guarda InMemoryStore. La búsqueda es
+exhaustiva para que la pérdida de recall sea sólo la de la cuantización.
+
+    python bench_quantization.py --vectors 50000 --dims 1536
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from ann_index import IVFIndex
+from bench_ann import exact_top_k, make_vectors
+
+
+def python_list_bytes(data: np.ndarray, sample: int = 200) -> float:
+    """Bytes por vector de una lista de floats de Python (lo que guarda InMemoryStore._vectors)."""
+    tracemalloc.start()
+    lists = [row.tolist() for row in data[:sample]]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(lists) == min(sample, len(data))
+    return size / len(lists)
+
+
+def bench(name: str, data: np.ndarray, queries: np.ndarray, truth, k: int, **kwargs) -> float:
+    index = IVFIndex(data.shape[1], train_size=len(data) + 1, **kwargs)
+    index.add(list(range(len(data))), data)
+    start = time.perf_counter()
+    results = [index.search(query, k) for query in queries]
+    qps = len(queries) / (time.perf_counter() - start)
+    recall = np.mean([len(truth[i] & {id_ for id_, _ in found}) / k for i, found in enumerate(results)])
+    per_vector = index.nbytes / len(data)
+    print(f"{name:<28}{per_vector:>12,.0f}{recall:>12.4f}{qps:>10,.0f}")
+    return per_vector
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, default=4)
+    args = parser.parse_args()
+
+    data, queries = make_vectors(args.vectors, args.dims, args.queries)
+    truth = [set(row.tolist()) for row in exact_top_k(data, queries, args.k)]
+
+    print(f"{'almacenamiento':<28}{'bytes/vec':>12}{'recall@' + str(args.k):>12}{'QPS':>10}")
+    print(f"{'listas Python (InMemoryStore)':<28}{python_list_bytes(data):>12,.0f}{'-':>12}{'-':>10}")
+    base = bench("float32", data, queries, truth, args.k)
+    for storage in ("float16", "int8", "int4"):
+        size = bench(storage, data, queries, truth, args.k, storage=storage)
+        print(f"{'':<28}{base / size:>11.1f}x menos memoria que float32")
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in ("float16", "int8", "int4"):
+            bench(
+                f"{storage} + rescore x{args.rescore}",
+                data,
+                queries,
+                truth,
+                args.k,
+                storage=storage,
+                rescore=args.rescore,
+                exact_path=os.path.join(tmp, f"{storage}.f32"),
+            )
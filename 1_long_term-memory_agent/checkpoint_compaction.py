@@ -0,0 +1,342 @@
+"""Retención, compactación y vacuum incremental del historial de checkpoints (memory.db).
+
+Política: por cada (thread_id, checkpoint_ns) se conservan los últimos `keep_last`
+checkpoints y/o todo lo más reciente que `max_age` segundos; el último checkpoint de
+cada thread no se borra nunca. Después se eliminan las filas de `writes` huérfanas y, con
+DeltaSqliteSaver, los mensajes del log anteriores al primero que usa algún checkpoint
+conservado (y sus filas del índice FTS5, cuyas demás filas pasan a apuntar al checkpoint
+conservado más antiguo), y se devuelve el espacio al sistema con `PRAGMA incremental_vacuum`.
+
+    python checkpoint_compaction.py memory.db --keep-last 20 --max-age-days 30
+
+Nota: el canal `messages` de MessagesState guarda el valor completo en cada
+checkpoint (o, con DeltaSqliteSaver, rangos completos del log de mensajes), así que
+borrar ancestros no rompe la reconstrucción del estado.
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from delta_saver import RANGES_KEY
+
+# Offset entre la época de los UUID (1582-10-15) y la época Unix, en intervalos de 100 ns
+UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+# El serializador por defecto de los checkpointers, para leer los rangos de mensajes
+SERDE = JsonPlusSerializer()
+
+
+def checkpoint_id_at(timestamp: float) -> str:
+    """Menor checkpoint_id (UUIDv6) posible para un instante dado.
+
+    Los checkpoint_id de LangGraph son UUIDv6, que empiezan por el timestamp, así que
+    comparar strings equivale a comparar fechas y usa el índice de la clave primaria.
+    """
+    ts = int(timestamp * 10_000_000) + UUID_EPOCH_OFFSET
+    return f"{ts >> 28:08x}-{(ts >> 12) & 0xFFFF:04x}-6{ts & 0xFFF:03x}-0000-000000000000"
+
+
+def database_size(conn: sqlite3.Connection) -> Dict[str, int]:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"file_bytes": page_size * page_count, "free_bytes": page_size * freelist}
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """Activa auto_vacuum=INCREMENTAL. En una base ya creada exige un VACUUM completo (una sola vez).
+
+    Returns:
+        bool: True si ha hecho falta reescribir la base de datos.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def _has_message_log(conn: sqlite3.Connection) -> bool:
+    # Tabla de DeltaSqliteSaver con los mensajes compartidos entre checkpoints
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='checkpoint_messages'").fetchone() is not None
+
+
+def _thread_keys(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    query = (
+        "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints "
+        "UNION SELECT DISTINCT thread_id, checkpoint_ns FROM writes"
+    )
+    if _has_message_log(conn):
+        query += " UNION SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoint_messages"
+    return conn.execute(query).fetchall()
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _lowest_referenced_seq(conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str) -> Optional[int]:
+    """Menor `seq` del log de mensajes que usa algún checkpoint del thread (None si ninguno lo usa).
+
+    DeltaSqliteSaver lo guarda en la columna `min_seq`; sólo en bases de antes de la columna
+    (sin abrir aún con el saver, que la rellena) hay que deserializar los checkpoints.
+    """
+    if any(col[1] == "min_seq" for col in conn.execute("PRAGMA table_info(checkpoints)")):
+        return conn.execute(
+            "SELECT min(min_seq) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchone()[0]
+    lowest = None
+    for type_, blob in conn.execute(
+        "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+        (thread_id, checkpoint_ns),
+    ):
+        for value in SERDE.loads_typed((type_, blob)).get("channel_values", {}).values():
+            if isinstance(value, dict) and value.get(RANGES_KEY):
+                start = min(start for start, _ in value[RANGES_KEY])
+                lowest = start if lowest is None else min(lowest, start)
+    return lowest
+
+
+def compact_thread(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    checkpoint_ns: str = "",
+    *,
+    keep_last: Optional[int] = None,
+    cutoff_id: Optional[str] = None,
+) -> Tuple[int, int, int]:
+    """Aplica la política a un solo thread/namespace. No hace commit.
+
+    Returns:
+        Tuple[int, int, int]: (checkpoints borrados, writes borrados, mensajes del log borrados).
+    """
+    deleted_checkpoints = 0
+    if keep_last is not None or cutoff_id is not None:
+        # El checkpoint más antiguo que se conserva por número; como mínimo siempre el último
+        boundary = conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, checkpoint_ns, max(keep_last or 1, 1) - 1),
+        ).fetchone()
+        if boundary is not None:
+            # Se conserva lo que cumpla cualquiera de las dos reglas
+            oldest_kept = boundary[0] if cutoff_id is None else min(boundary[0], cutoff_id)
+            deleted_checkpoints = conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                (thread_id, checkpoint_ns, oldest_kept),
+            ).rowcount
+
+    deleted_writes = conn.execute(
+        """
+        DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = writes.thread_id AND c.checkpoint_ns = writes.checkpoint_ns
+              AND c.checkpoint_id = writes.checkpoint_id
+        )
+        """,
+        (thread_id, checkpoint_ns),
+    ).rowcount
+    deleted_messages = 0
+    if _has_message_log(conn):
+        # Los checkpoints nuevos cuelgan de uno conservado o añaden seqs por encima del máximo,
+        # así que lo que queda por debajo del menor seq referenciado ya no lo lee nadie
+        lowest = _lowest_referenced_seq(conn, thread_id, checkpoint_ns)
+        if lowest is None:
+            # Sin checkpoints que usen el log: sólo se borra si el thread ya no tiene ninguno
+            deleted_messages = conn.execute(
+                "DELETE FROM checkpoint_messages WHERE thread_id = ? AND checkpoint_ns = ? AND NOT EXISTS ("
+                "SELECT 1 FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            ).rowcount
+        else:
+            deleted_messages = conn.execute(
+                "DELETE FROM checkpoint_messages WHERE thread_id = ? AND checkpoint_ns = ? AND seq < ?",
+                (thread_id, checkpoint_ns, lowest),
+            ).rowcount
+        if _has_table(conn, "conversation_fts"):
+            _compact_index(conn, thread_id, checkpoint_ns, lowest)
+    return deleted_checkpoints, deleted_writes, deleted_messages
+
+
+def _compact_index(conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, lowest: Optional[int]) -> None:
+    """Quita del índice FTS5 los mensajes borrados del log y reapunta el resto a un checkpoint que exista."""
+    oldest = conn.execute(
+        "SELECT min(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+        (thread_id, checkpoint_ns),
+    ).fetchone()[0]
+    if oldest is None:
+        conn.execute("DELETE FROM conversation_fts WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, checkpoint_ns))
+        return
+    if lowest is not None:
+        conn.execute(
+            "DELETE FROM conversation_fts WHERE thread_id = ? AND checkpoint_ns = ? AND seq < ?",
+            (thread_id, checkpoint_ns, lowest),
+        )
+    # Un mensaje sigue en el log: el checkpoint conservado más antiguo ya lo contiene
+    conn.execute(
+        "UPDATE conversation_fts SET checkpoint_id = ? WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+        (oldest, thread_id, checkpoint_ns, oldest),
+    )
+
+
+def incremental_vacuum(
+    conn: sqlite3.Connection, pages: Optional[int] = None, pause: float = 0.0, max_rounds: int = 100_000
+) -> int:
+    """Devuelve páginas libres al sistema de ficheros en tramos de `pages` (todas si es None).
+
+    Sin auto_vacuum=INCREMENTAL la pragma no hace nada, así que no se ejecuta. Para en
+    cuanto un tramo no reduce la lista de páginas libres (p. ej. si otra conexión la
+    retiene) o tras `max_rounds` tramos.
+
+    Returns:
+        int: bytes recuperados en disco.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    before = database_size(conn)["file_bytes"]
+    # conn.execute() sólo da un paso a la pragma (una página); executescript la ejecuta entera
+    conn.commit()
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    for _ in range(max_rounds):
+        if free == 0:
+            break
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages or 0)});")
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if pages is None or remaining >= free:
+            break
+        free = remaining
+        if pause:
+            time.sleep(pause)
+    return before - database_size(conn)["file_bytes"]
+
+
+def compact(
+    conn: sqlite3.Connection,
+    *,
+    keep_last: Optional[int] = None,
+    max_age: Optional[float] = None,
+    vacuum: bool = True,
+    vacuum_pages: Optional[int] = None,
+    threads_per_txn: int = 100,
+) -> Dict[str, Any]:
+    """Compacta todos los threads. Commitea cada `threads_per_txn` threads para no bloquear a los escritores.
+
+    Args:
+        keep_last: checkpoints a conservar por thread/namespace.
+        max_age: segundos; se conserva todo lo más reciente que esto.
+        vacuum: ejecutar incremental_vacuum al terminar (requiere auto_vacuum=INCREMENTAL).
+        vacuum_pages: páginas por tramo de vacuum (None = todas de una vez).
+
+    Returns:
+        Dict[str, Any]: informe con threads, checkpoints_deleted, writes_deleted,
+        messages_deleted, bytes_freed (páginas liberadas dentro del fichero), bytes_reclaimed
+        (reducción real del fichero) y seconds.
+    """
+    start = time.perf_counter()
+    size_before = database_size(conn)
+    cutoff_id = checkpoint_id_at(time.time() - max_age) if max_age is not None else None
+
+    report = {"threads": 0, "checkpoints_deleted": 0, "writes_deleted": 0, "messages_deleted": 0}
+    for i, (thread_id, checkpoint_ns) in enumerate(_thread_keys(conn), start=1):
+        checkpoints, writes, messages = compact_thread(
+            conn, thread_id, checkpoint_ns, keep_last=keep_last, cutoff_id=cutoff_id
+        )
+        report["threads"] += 1
+        report["checkpoints_deleted"] += checkpoints
+        report["writes_deleted"] += writes
+        report["messages_deleted"] += messages
+        if i % threads_per_txn == 0:
+            conn.commit()
+    conn.commit()
+
+    report["bytes_freed"] = database_size(conn)["free_bytes"] - size_before["free_bytes"]
+    report["bytes_reclaimed"] = incremental_vacuum(conn, vacuum_pages) if vacuum else 0
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+class BackgroundCompactor:
+    """Thread que aplica la política de retención y el vacuum incremental cada `interval` segundos.
+
+    Abre su propia conexión (WAL permite que el grafo siga leyendo y escribiendo) y hace el
+    vacuum en tramos pequeños para no retener el lock de escritura mucho tiempo.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        keep_last: Optional[int] = 20,
+        max_age: Optional[float] = None,
+        interval: float = 3600.0,
+        vacuum_pages: int = 256,
+    ) -> None:
+        self.db_path = db_path
+        self.keep_last = keep_last
+        self.max_age = max_age
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.total_bytes_reclaimed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-compactor", daemon=True)
+
+    def start(self) -> "BackgroundCompactor":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def run_once(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        report = compact(
+            conn,
+            keep_last=self.keep_last,
+            max_age=self.max_age,
+            vacuum_pages=self.vacuum_pages,
+        )
+        self.last_report = report
+        self.total_bytes_reclaimed += report["bytes_reclaimed"]
+        return report
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            enable_incremental_vacuum(conn)
+            while not self._stop.is_set():
+                self.run_once(conn)
+                self._stop.wait(self.interval)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacta el historial de checkpoints de una base SQLite.")
+    parser.add_argument("db_path")
+    parser.add_argument("--keep-last", type=int, default=None, help="checkpoints a conservar por thread")
+    parser.add_argument("--max-age-days", type=float, default=None, help="conservar todo lo más reciente que esto")
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+
+    if args.keep_last is None and args.max_age_days is None:
+        parser.error("indica --keep-last y/o --max-age-days")
+
+    conn = sqlite3.connect(args.db_path)
+    if not args.no_vacuum and enable_incremental_vacuum(conn):
+        print("auto_vacuum=INCREMENTAL activado (VACUUM completo ejecutado una vez)")
+    report = compact(
+        conn,
+        keep_last=args.keep_last,
+        max_age=args.max_age_days * 86400 if args.max_age_days is not None else None,
+        vacuum=not args.no_vacuum,
+    )
+    conn.close()
+    print(report)
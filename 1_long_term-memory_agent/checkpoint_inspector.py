@@ -0,0 +1,253 @@
+"""Inspector de checkpoints en streaming: sustituye los `select * ... fetchall()` de la demo.
+
+Las filas se leen por páginas con paginación por clave (keyset) sobre la clave primaria,
+así que la memoria usada no depende del tamaño de la base de datos. Los agregados
+(steps, sources, writes por nodo) se calculan en SQLite con GROUP BY.
+
+    python checkpoint_inspector.py memory.db tables
+    python checkpoint_inspector.py memory.db checkpoints --thread 2 --steps 0:10
+    python checkpoint_inspector.py memory.db writes --thread 2
+    python checkpoint_inspector.py memory.db summary --create-index
+
+Los savers de este módulo (`CoalescingSqliteSaver` y derivados) crean el índice sobre
+metadata.step en su `setup()`; `--create-index` queda para bases escritas con otro saver.
+"""
+import argparse
+import json
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+STEP_EXPR = "json_extract(CAST(metadata AS TEXT), '$.step')"
+SOURCE_EXPR = "json_extract(CAST(metadata AS TEXT), '$.source')"
+STEP_INDEX = f"CREATE INDEX IF NOT EXISTS checkpoints_step_idx ON checkpoints (thread_id, checkpoint_ns, {STEP_EXPR})"
+
+
+def table_columns(conn: sqlite3.Connection) -> List[Dict[str, List[str]]]:
+    """Columnas de cada tabla (mismo formato que `columns_map`) sin leer ninguna fila."""
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    return [{table: [col[1] for col in conn.execute(f"PRAGMA table_info({table})")]} for table in tables]
+
+
+def create_step_index(conn: sqlite3.Connection) -> None:
+    """Índice de expresión sobre metadata.step para filtrar rangos de steps sin recorrer el thread."""
+    conn.execute(STEP_INDEX)
+    conn.commit()
+
+
+def _checkpoint_filters(
+    thread_id: Optional[str],
+    checkpoint_ns: Optional[str],
+    min_step: Optional[int],
+    max_step: Optional[int],
+) -> Tuple[List[str], List[Any]]:
+    clauses, params = [], []
+    if thread_id is not None:
+        clauses.append("thread_id = ?")
+        params.append(str(thread_id))
+    if checkpoint_ns is not None:
+        clauses.append("checkpoint_ns = ?")
+        params.append(checkpoint_ns)
+    if min_step is not None:
+        clauses.append(f"{STEP_EXPR} >= ?")
+        params.append(min_step)
+    if max_step is not None:
+        clauses.append(f"{STEP_EXPR} <= ?")
+        params.append(max_step)
+    return clauses, params
+
+
+def _paginate(
+    conn: sqlite3.Connection,
+    select: str,
+    key_columns: List[str],
+    clauses: List[str],
+    params: List[Any],
+    page_size: int,
+) -> Iterator[sqlite3.Row]:
+    """Recorre una consulta por páginas de `page_size` continuando desde la última clave vista."""
+    key_tuple = f"({', '.join(key_columns)})"
+    last_key: Optional[Tuple[Any, ...]] = None
+    while True:
+        where = list(clauses)
+        page_params = list(params)
+        if last_key is not None:
+            where.append(f"{key_tuple} > ({', '.join('?' for _ in key_columns)})")
+            page_params.extend(last_key)
+        query = select
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {', '.join(key_columns)} LIMIT ?"
+        page_params.append(page_size)
+
+        cursor = conn.execute(query, page_params)
+        cursor.row_factory = sqlite3.Row
+        rows = 0
+        for row in cursor:
+            rows += 1
+            last_key = tuple(row[col] for col in key_columns)
+            yield row
+        if rows < page_size:
+            return
+
+
+def iter_checkpoints(
+    conn: sqlite3.Connection,
+    *,
+    thread_id: Optional[str] = None,
+    checkpoint_ns: Optional[str] = None,
+    min_step: Optional[int] = None,
+    max_step: Optional[int] = None,
+    include_blob: bool = False,
+    page_size: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """Itera checkpoints con su metadata decodificada, una fila cada vez.
+
+    Por defecto no lee el blob del checkpoint, sólo su tamaño (`checkpoint_bytes`).
+    """
+    blob = "checkpoint" if include_blob else "length(checkpoint) AS checkpoint_bytes"
+    select = (
+        "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+        f"{blob}, metadata FROM checkpoints"
+    )
+    clauses, params = _checkpoint_filters(thread_id, checkpoint_ns, min_step, max_step)
+    for row in _paginate(conn, select, ["thread_id", "checkpoint_ns", "checkpoint_id"], clauses, params, page_size):
+        item = dict(row)
+        item["metadata"] = json.loads(row["metadata"]) if row["metadata"] is not None else {}
+        yield item
+
+
+def iter_writes(
+    conn: sqlite3.Connection,
+    *,
+    thread_id: Optional[str] = None,
+    checkpoint_ns: Optional[str] = None,
+    checkpoint_id: Optional[str] = None,
+    include_blob: bool = False,
+    page_size: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """Itera las pending writes; por defecto devuelve el tamaño del valor en lugar del valor."""
+    value = "value" if include_blob else "length(value) AS value_bytes"
+    extra = ", task_path" if _has_task_path(conn) else ""
+    select = f"SELECT thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, {value}{extra} FROM writes"
+    clauses, params = _checkpoint_filters(thread_id, checkpoint_ns, None, None)
+    if checkpoint_id is not None:
+        clauses.append("checkpoint_id = ?")
+        params.append(checkpoint_id)
+    key = ["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"]
+    for row in _paginate(conn, select, key, clauses, params, page_size):
+        yield dict(row)
+
+
+def _has_task_path(conn: sqlite3.Connection) -> bool:
+    return any(col[1] == "task_path" for col in conn.execute("PRAGMA table_info(writes)"))
+
+
+def _node_from_task_path(task_path: str) -> str:
+    # "~__pregel_pull, chatbot" -> "chatbot"
+    return task_path.rsplit(", ", 1)[-1] if task_path else "unknown"
+
+
+def summarize(
+    conn: sqlite3.Connection,
+    *,
+    thread_id: Optional[str] = None,
+    checkpoint_ns: Optional[str] = None,
+    min_step: Optional[int] = None,
+    max_step: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Agrega la metadata sin materializar filas: todo se resuelve con GROUP BY en SQLite.
+
+    Returns:
+        Dict[str, Any]: checkpoints, threads, min_step, max_step, sources (source -> nº),
+        writes_per_node (nodo -> nº de writes) y writes_per_channel.
+    """
+    clauses, params = _checkpoint_filters(thread_id, checkpoint_ns, min_step, max_step)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    checkpoints, threads, first_step, last_step = conn.execute(
+        f"SELECT count(*), count(DISTINCT thread_id), min({STEP_EXPR}), max({STEP_EXPR}) FROM checkpoints{where}",
+        params,
+    ).fetchone()
+    sources = dict(
+        conn.execute(f"SELECT {SOURCE_EXPR}, count(*) FROM checkpoints{where} GROUP BY 1", params)
+    )
+
+    write_clauses, write_params = _checkpoint_filters(thread_id, checkpoint_ns, None, None)
+    if min_step is not None or max_step is not None:
+        # Sólo las writes de los checkpoints que están en el rango de steps
+        write_clauses.append(
+            f"checkpoint_id IN (SELECT checkpoint_id FROM checkpoints{where})"
+        )
+        write_params.extend(params)
+    write_where = (" WHERE " + " AND ".join(write_clauses)) if write_clauses else ""
+
+    writes_per_node: Dict[str, int] = {}
+    if _has_task_path(conn):
+        for task_path, count in conn.execute(
+            f"SELECT task_path, count(*) FROM writes{write_where} GROUP BY task_path", write_params
+        ):
+            node = _node_from_task_path(task_path)
+            writes_per_node[node] = writes_per_node.get(node, 0) + count
+    # Versiones antiguas de LangGraph guardaban los nodos en metadata.writes
+    for node, count in conn.execute(
+        f"SELECT je.key, count(*) FROM checkpoints, json_each(CAST(metadata AS TEXT), '$.writes') je{where} GROUP BY je.key",
+        params,
+    ):
+        writes_per_node[node] = writes_per_node.get(node, 0) + count
+    writes_per_channel = dict(
+        conn.execute(f"SELECT channel, count(*) FROM writes{write_where} GROUP BY channel", write_params)
+    )
+
+    return {
+        "checkpoints": checkpoints,
+        "threads": threads,
+        "min_step": first_step,
+        "max_step": last_step,
+        "sources": sources,
+        "writes_per_node": writes_per_node,
+        "writes_per_channel": writes_per_channel,
+    }
+
+
+def _parse_steps(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    if not value:
+        return None, None
+    low, _, high = value.partition(":")
+    return (int(low) if low else None), (int(high) if high else None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspecciona una base de checkpoints de LangGraph en streaming.")
+    parser.add_argument("db_path")
+    parser.add_argument("command", choices=["tables", "checkpoints", "writes", "summary"])
+    parser.add_argument("--thread", default=None, help="thread_id")
+    parser.add_argument("--ns", default=None, help="checkpoint_ns")
+    parser.add_argument("--steps", default=None, help="rango de steps, p. ej. 0:10, 5: o :3")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--create-index", action="store_true", help="crea el índice sobre metadata.step")
+    args = parser.parse_args()
+
+    if args.create_index:
+        conn = sqlite3.connect(args.db_path)
+        create_step_index(conn)
+    else:
+        conn = sqlite3.connect(f"file:{args.db_path}?mode=ro", uri=True)
+    min_step, max_step = _parse_steps(args.steps)
+
+    if args.command == "tables":
+        print(json.dumps(table_columns(conn)))
+    elif args.command == "checkpoints":
+        for item in iter_checkpoints(
+            conn, thread_id=args.thread, checkpoint_ns=args.ns,
+            min_step=min_step, max_step=max_step, page_size=args.page_size,
+        ):
+            print(json.dumps(item, ensure_ascii=False))
+    elif args.command == "writes":
+        for item in iter_writes(conn, thread_id=args.thread, checkpoint_ns=args.ns, page_size=args.page_size):
+            print(json.dumps(item, ensure_ascii=False))
+    else:
+        print(json.dumps(
+            summarize(conn, thread_id=args.thread, checkpoint_ns=args.ns, min_step=min_step, max_step=max_step),
+            ensure_ascii=False,
+        ))
+    conn.close()
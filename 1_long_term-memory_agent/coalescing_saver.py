@@ -0,0 +1,295 @@
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from checkpoint_inspector import STEP_INDEX
+
+# Una sentencia agrupable: (sql, filas de parámetros para executemany)
+Statement = Tuple[str, List[tuple]]
+
+CHECKPOINT_UPSERT = (
+    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+WRITES_UPSERT = (
+    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+WRITES_INSERT = (
+    "INSERT OR IGNORE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_STOP = object()
+
+
+class CoalescingSqliteSaver(SqliteSaver):
+    """SqliteSaver en modo WAL que agrupa las escrituras de muchos threads en transacciones compartidas.
+
+    Cada `put`/`put_writes` serializa su payload en el thread que lo llama y encola las
+    sentencias; un único thread escritor vacía la cola y hace un solo COMMIT por grupo
+    (group commit). El llamante espera a que su grupo esté confirmado, así que la
+    durabilidad y el read-your-writes son los mismos que con SqliteSaver.
+
+    Args:
+        conn: conexión SQLite (con `check_same_thread=False`).
+        max_batch: máximo de peticiones de escritura por transacción.
+        max_delay: segundos que el escritor espera a que lleguen más peticiones antes de
+            confirmar. Con 0 sólo agrupa lo que ya está en cola (sin latencia extra).
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        max_batch: int = 256,
+        max_delay: float = 0.0,
+    ) -> None:
+        super().__init__(conn, serde=serde)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats: Dict[str, int] = {"requests": 0, "transactions": 0}
+        # Tiempo acumulado dentro de executemany por sentencia SQL (para medir el coste de cada tabla)
+        self.statement_seconds: Dict[str, float] = defaultdict(float)
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._drain, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    @contextmanager
+    def from_conn_string(cls, conn_string: str, **kwargs: Any) -> Iterator["CoalescingSqliteSaver"]:
+        """Crea el saver sobre una conexión nueva y para el thread escritor al salir."""
+        with closing(sqlite3.connect(conn_string, check_same_thread=False)) as conn:
+            saver = cls(conn, **kwargs)
+            try:
+                yield saver
+            finally:
+                saver.close()
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        # WAL deja leer mientras se escribe; synchronous=NORMAL sólo hace fsync en los checkpoints del WAL
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA busy_timeout=5000;
+            """
+        )
+        super().setup()
+        # El inspector filtra por rangos de steps: el índice se crea aquí, no a mano con --create-index
+        self.conn.execute(STEP_INDEX)
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Confirma lo que quede en cola y para el thread escritor."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    # ESCRITURAS AGRUPADAS
+
+    def _submit(self, statements: List[Statement]) -> Future:
+        if self._closed:
+            raise RuntimeError("CoalescingSqliteSaver is closed")
+        future: Future = Future()
+        self._queue.put((statements, future))
+        return future
+
+    def _drain(self) -> None:
+        stop = False
+        ready = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=self.max_delay) if self.max_delay else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                if not ready:
+                    # Las tablas se crean una vez, con el primer grupo, no en cada COMMIT
+                    with self.lock:
+                        self.setup()
+                    ready = True
+                self._commit(batch)
+            except BaseException as e:
+                # Falló hasta el rollback (conexión cerrada, base bloqueada...): el grupo entero
+                # falla, pero el escritor sigue vivo para los puts que ya esperan en la cola
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch: List[Tuple[List[Statement], Future]]) -> None:
+        with self.lock:
+            try:
+                self._execute(batch)
+            except Exception:
+                self.conn.rollback()
+                # Un payload malo no debe tumbar al resto del grupo: se reintenta uno a uno
+                for request in batch:
+                    try:
+                        self._execute([request])
+                    except Exception as e:
+                        self.conn.rollback()
+                        request[1].set_exception(e)
+                    else:
+                        request[1].set_result(None)
+                return
+        for _, future in batch:
+            future.set_result(None)
+
+    def _execute(self, batch: List[Tuple[List[Statement], Future]]) -> None:
+        cur = self.conn.cursor()
+        try:
+            for statements, _ in batch:
+                for sql, rows in statements:
+                    start = time.perf_counter()
+                    cur.executemany(sql, rows)
+                    self.statement_seconds[sql] += time.perf_counter() - start
+            self.conn.commit()
+        finally:
+            cur.close()
+        self.stats["requests"] += len(batch)
+        self.stats["transactions"] += 1
+
+    def _checkpoint_statements(
+        self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata
+    ) -> List[Statement]:
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        serialized_metadata = json.dumps(
+            get_checkpoint_metadata(config, metadata), ensure_ascii=False
+        ).encode("utf-8", "ignore")
+        row = (
+            str(config["configurable"]["thread_id"]),
+            config["configurable"]["checkpoint_ns"],
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            type_,
+            serialized_checkpoint,
+            serialized_metadata,
+        )
+        return [(CHECKPOINT_UPSERT, [row])]
+
+    def _writes_statements(
+        self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str
+    ) -> List[Statement]:
+        query = WRITES_UPSERT if all(w[0] in WRITES_IDX_MAP for w in writes) else WRITES_INSERT
+        rows = [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                task_path,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        return [(query, rows)]
+
+    @staticmethod
+    def _saved_config(config: RunnableConfig, checkpoint: Checkpoint) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": config["configurable"]["thread_id"],
+                "checkpoint_ns": config["configurable"]["checkpoint_ns"],
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self._submit(self._checkpoint_statements(config, checkpoint, metadata)).result()
+        return self._saved_config(config, checkpoint)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._submit(self._writes_statements(config, writes, task_id, task_path)).result()
+
+    # VARIANTE ASYNC: las escrituras esperan al grupo sin bloquear el event loop
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        await asyncio.wrap_future(self._submit(self._checkpoint_statements(config, checkpoint, metadata)))
+        return self._saved_config(config, checkpoint)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.wrap_future(self._submit(self._writes_statements(config, writes, task_id, task_path)))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ):
+        # El generador síncrono avanza de uno en uno en un thread: el historial no se carga entero
+        iterator = self.list(config, filter=filter, before=before, limit=limit)
+        done = object()
+        try:
+            while (item := await asyncio.to_thread(next, iterator, done)) is not done:
+                yield item
+        finally:
+            await asyncio.to_thread(iterator.close)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
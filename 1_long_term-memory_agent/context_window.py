@@ -0,0 +1,152 @@
+"""Ventana de contexto con presupuesto de tokens y resumen acumulado en el checkpoint.
+
+El nodo `chatbot` mandaba `state["messages"]` entero al modelo en cada turno, así que el
+prompt (y la latencia) crecía sin límite. `ContextWindow` arma el prompt con:
+
+- un SystemMessage con el resumen de todo lo anterior (`summary` en el estado, así que se
+  guarda en el checkpoint junto a los mensajes y sobrevive entre ejecuciones), y
+- los últimos mensajes literales que caben en `max_tokens`.
+
+Cuando la cola literal supera `max_tokens + fold_tokens`, los mensajes más viejos se
+pliegan en el resumen de una vez (una llamada al resumidor cada varios turnos, no en cada
+uno). El historial completo sigue en `messages`; sólo cambia lo que se envía al modelo.
+"""
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.graph.message import MessagesState
+
+from conversation_index import message_text
+
+_PIECE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Tokens de formato que añade la API por cada mensaje (rol, separadores)
+MESSAGE_OVERHEAD = 4
+
+Summarizer = Callable[[str, Sequence[BaseMessage]], str]
+
+
+class ConversationState(MessagesState):
+    """MessagesState con el resumen acumulado y cuántos mensajes iniciales ya recoge."""
+
+    summary: str
+    summarized: int
+
+
+class TokenCounter:
+    """Cuenta tokens sin red.
+
+    Por defecto es una aproximación de BPE (cada palabra cuenta ceil(len / 4) tokens y cada
+    signo de puntuación uno), suficiente para presupuestar. Con `encoding` usa tiktoken,
+    que necesita tener esa codificación ya descargada en su caché.
+    """
+
+    def __init__(self, encoding: Optional[str] = None) -> None:
+        self._encoder = None
+        if encoding is not None:
+            import tiktoken
+
+            self._encoder = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        if self._encoder is not None:
+            return len(self._encoder.encode(text))
+        return sum(max(1, math.ceil(len(piece) / 4)) for piece in _PIECE.findall(text))
+
+    def count_message(self, message: BaseMessage) -> int:
+        tokens = MESSAGE_OVERHEAD + self.count(message_text(message))
+        for call in getattr(message, "tool_calls", None) or []:
+            tokens += self.count(call["name"]) + self.count(str(call.get("args", "")))
+        return tokens
+
+    def count_messages(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(self.count_message(message) for message in messages)
+
+
+def llm_summarizer(llm: Any, max_words: int = 200) -> Summarizer:
+    """Resumidor que pide al modelo actualizar el resumen con los mensajes que salen de la ventana."""
+
+    def summarize(summary: str, messages: Sequence[BaseMessage]) -> str:
+        transcript = "\n".join(f"{message.type}: {message_text(message)}" for message in messages)
+        prompt = (
+            f"Resumen de la conversación hasta ahora:\n{summary or '(vacío)'}\n\n"
+            f"Mensajes nuevos:\n{transcript}\n\n"
+            f"Actualiza el resumen en menos de {max_words} palabras. Conserva nombres, datos, "
+            "preferencias y decisiones del usuario. Responde sólo con el resumen."
+        )
+        return message_text(llm.invoke([HumanMessage(prompt)]))
+
+    return summarize
+
+
+class ContextWindow:
+    """Arma el prompt de cada turno dentro de un presupuesto de tokens.
+
+    Args:
+        summarizer: función (resumen, mensajes que salen) -> resumen nuevo.
+        max_tokens: tokens de mensajes literales que se mandan al modelo.
+        fold_tokens: holgura antes de plegar; se pliega de golpe hasta volver a `max_tokens`.
+        system_prompt: SystemMessage fijo al principio del prompt (opcional).
+        counter: contador de tokens (por defecto, la aproximación local).
+    """
+
+    def __init__(
+        self,
+        summarizer: Summarizer,
+        *,
+        max_tokens: int = 2000,
+        fold_tokens: int = 1000,
+        system_prompt: Optional[str] = None,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.fold_tokens = fold_tokens
+        self.system_prompt = system_prompt
+        self.counter = counter or TokenCounter()
+        self.stats: Dict[str, int] = {"folds": 0, "folded_messages": 0}
+
+    def _tail_start(self, messages: Sequence[BaseMessage], start: int, budget: int) -> int:
+        """Primer mensaje de la cola más larga (desde `start`) que cabe en `budget` tokens."""
+        used, index = 0, len(messages)
+        while index > start:
+            cost = self.counter.count_message(messages[index - 1])
+            # El último mensaje (la pregunta actual) va siempre, quepa o no
+            if used + cost > budget and index < len(messages):
+                break
+            used += cost
+            index -= 1
+        # Un ToolMessage sin el AIMessage que lo pidió no es un prompt válido
+        while index < len(messages) - 1 and isinstance(messages[index], ToolMessage):
+            index += 1
+        return index
+
+    def prepare(self, state: Dict[str, Any]) -> Tuple[List[BaseMessage], Dict[str, Any]]:
+        """Devuelve el prompt para el modelo y la actualización del estado (summary/summarized)."""
+        messages = state["messages"]
+        summary = state.get("summary", "")
+        summarized = min(state.get("summarized", 0), len(messages))
+        update: Dict[str, Any] = {}
+
+        start = self._tail_start(messages, summarized, self.max_tokens + self.fold_tokens)
+        if start > summarized:
+            # Se pasó de la holgura: se pliega hasta dejar la cola en max_tokens
+            start = self._tail_start(messages, summarized, self.max_tokens)
+            summary = self.summarizer(summary, messages[summarized:start])
+            self.stats["folds"] += 1
+            self.stats["folded_messages"] += start - summarized
+            summarized = start
+            update = {"summary": summary, "summarized": summarized}
+
+        prompt: List[BaseMessage] = []
+        system = "\n\n".join(
+            part
+            for part in (self.system_prompt, f"Resumen de la conversación anterior:\n{summary}" if summary else "")
+            if part
+        )
+        if system:
+            prompt.append(SystemMessage(system))
+        prompt.extend(messages[summarized:])
+        return prompt, update
@@ -0,0 +1,136 @@
+"""Índice FTS5 sobre los mensajes de todas las conversaciones guardadas.
+
+DeltaSqliteSaver lo mantiene al día: cada mensaje nuevo que entra en el log se indexa en
+la misma transacción que su checkpoint. Así "¿qué dijo el usuario sobre X en cualquier
+thread?" es una sola consulta MATCH en lugar de deserializar todos los checkpoints.
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+
+INDEX_INSERT = (
+    "INSERT INTO conversation_fts (content, role, thread_id, checkpoint_ns, checkpoint_id, step, seq) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def message_text(message: BaseMessage) -> str:
+    """Texto plano de un mensaje (el contenido puede ser una lista de partes)."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return " ".join(parts)
+
+
+def to_match_query(text: str, any_term: bool = False) -> str:
+    """Convierte texto libre en una consulta FTS5 segura: cada término entre comillas."""
+    terms = [f'"{term}"' for term in _TERM.findall(text)]
+    return (" OR " if any_term else " ").join(terms)
+
+
+class ConversationIndex:
+    """Tabla FTS5 `conversation_fts` con punteros (thread_id, checkpoint_id, step, seq) a cada mensaje.
+
+    El ranking es bm25; `order="recent"` ordena por orden de inserción (rowid) en su lugar.
+    """
+
+    def __init__(self, tokenize: str = "unicode61 remove_diacritics 2") -> None:
+        self.tokenize = tokenize
+        self.stats: Dict[str, int] = {"writes": 0, "messages": 0}
+
+    def setup(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5(
+                content,
+                role UNINDEXED,
+                thread_id UNINDEXED,
+                checkpoint_ns UNINDEXED,
+                checkpoint_id UNINDEXED,
+                step UNINDEXED,
+                seq UNINDEXED,
+                tokenize = '{self.tokenize}'
+            )
+            """
+        )
+
+    def statements(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        step: int,
+        messages: Sequence[Tuple[int, BaseMessage]],
+    ) -> List[Tuple[str, List[tuple]]]:
+        """Filas a insertar para los mensajes nuevos (seq, mensaje) de un checkpoint."""
+        rows = [
+            (message_text(message), message.type, thread_id, checkpoint_ns, checkpoint_id, step, seq)
+            for seq, message in messages
+        ]
+        rows = [row for row in rows if row[0].strip()]
+        if not rows:
+            return []
+        self.stats["writes"] += 1
+        self.stats["messages"] += len(rows)
+        return [(INDEX_INSERT, rows)]
+
+    def search(
+        self,
+        conn: sqlite3.Connection,
+        query: str,
+        *,
+        thread_id: Optional[str] = None,
+        role: Optional[str] = None,
+        order: str = "rank",
+        limit: int = 10,
+        raw: bool = False,
+        any_term: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Busca mensajes. `role` filtra por tipo ("human", "ai", "tool"...).
+
+        Args:
+            raw: pasar `query` tal cual como sintaxis FTS5 en lugar de texto libre.
+            any_term: con texto libre, basta con que aparezca uno de los términos.
+
+        Returns:
+            List[Dict[str, Any]]: thread_id, checkpoint_ns, checkpoint_id, step, seq, role,
+            snippet y score (bm25, menor es mejor).
+        """
+        match = query if raw else to_match_query(query, any_term)
+        if not match:
+            return []
+        clauses, params = ["conversation_fts MATCH ?"], [match]
+        if thread_id is not None:
+            clauses.append("thread_id = ?")
+            params.append(str(thread_id))
+        if role is not None:
+            clauses.append("role = ?")
+            params.append(role)
+        order_by = "rank" if order == "rank" else "rowid DESC"
+        params.append(limit)
+        rows = conn.execute(
+            f"""
+            SELECT thread_id, checkpoint_ns, checkpoint_id, step, seq, role,
+                   snippet(conversation_fts, 0, '[', ']', '…', 12), bm25(conversation_fts)
+            FROM conversation_fts
+            WHERE {' AND '.join(clauses)}
+            ORDER BY {order_by}
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        keys = ["thread_id", "checkpoint_ns", "checkpoint_id", "step", "seq", "role", "snippet", "score"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def delete_thread(self, conn: sqlite3.Connection, thread_id: str) -> None:
+        conn.execute("DELETE FROM conversation_fts WHERE thread_id = ?", (str(thread_id),))
@@ -0,0 +1,311 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+
+from coalescing_saver import CoalescingSqliteSaver, Statement
+from conversation_index import INDEX_INSERT, ConversationIndex
+
+# Marcador que sustituye a la lista de mensajes dentro del blob del checkpoint
+RANGES_KEY = "__message_ranges__"
+
+# Como CHECKPOINT_UPSERT, más el menor seq del log que usa el checkpoint (lo lee la compactación)
+DELTA_CHECKPOINT_UPSERT = (
+    "INSERT OR REPLACE INTO checkpoints "
+    "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata, min_seq) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+MESSAGE_INSERT = (
+    "INSERT OR REPLACE INTO checkpoint_messages (thread_id, checkpoint_ns, seq, message_id, type, value) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def to_ranges(seqs: Sequence[int]) -> List[List[int]]:
+    """[0, 1, 2, 5, 6] -> [[0, 2], [5, 6]] (rangos cerrados)."""
+    ranges: List[List[int]] = []
+    for seq in seqs:
+        if ranges and ranges[-1][1] == seq - 1:
+            ranges[-1][1] = seq
+        else:
+            ranges.append([seq, seq])
+    return ranges
+
+
+def from_ranges(ranges: Sequence[Sequence[int]]) -> List[int]:
+    return [seq for start, end in ranges for seq in range(start, end + 1)]
+
+
+class _ThreadLog:
+    """Últimos mensajes conocidos de un thread: lo que hace falta para calcular el siguiente delta."""
+
+    __slots__ = ("checkpoint_id", "messages", "seqs", "next_seq")
+
+    def __init__(self, checkpoint_id: Optional[str], messages: List[BaseMessage], seqs: List[int], next_seq: int):
+        self.checkpoint_id = checkpoint_id
+        self.messages = messages
+        self.seqs = seqs
+        self.next_seq = next_seq
+
+
+class DeltaSqliteSaver(CoalescingSqliteSaver):
+    """Checkpointer que guarda cada mensaje una sola vez.
+
+    Los mensajes de `messages` van a un log por thread (`checkpoint_messages`) y el checkpoint
+    sólo guarda los rangos de `seq` que forman su lista, así que cada paso escribe los
+    mensajes nuevos y no el historial entero. Al leer se reconstruye la lista completa.
+
+    Args:
+        snapshot_every: cada K steps guarda además la lista completa dentro del checkpoint,
+            para que leerlo no necesite consultar el log. None desactiva los snapshots.
+        channel: canal que se codifica por deltas.
+        cache_threads: threads cuyo último estado se mantiene en memoria para calcular deltas
+            sin releer la base de datos.
+        index: ConversationIndex opcional; los mensajes nuevos se indexan en la misma transacción.
+    """
+
+    def __init__(
+        self,
+        conn,
+        *,
+        snapshot_every: Optional[int] = None,
+        channel: str = "messages",
+        cache_threads: int = 1024,
+        index: Optional[ConversationIndex] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(conn, **kwargs)
+        # get_tuple/list expanden los rangos mientras SqliteSaver.list aún tiene el lock
+        self.lock = threading.RLock()
+        self.snapshot_every = snapshot_every
+        self.channel = channel
+        self.cache_threads = cache_threads
+        self.index = index
+        self._logs: "OrderedDict[Tuple[str, str], _ThreadLog]" = OrderedDict()
+        self._logs_lock = threading.Lock()
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoint_messages (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                seq INTEGER NOT NULL,
+                message_id TEXT,
+                type TEXT,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, seq)
+            );
+            """
+        )
+        if not any(col[1] == "min_seq" for col in self.conn.execute("PRAGMA table_info(checkpoints)")):
+            self.conn.execute("ALTER TABLE checkpoints ADD COLUMN min_seq INTEGER")
+            self._backfill_min_seq()
+        if self.index is not None:
+            self.index.setup(self.conn)
+
+    def _backfill_min_seq(self) -> None:
+        # Una sola vez, al añadir la columna a una base con checkpoints anteriores
+        updates = []
+        for thread_id, checkpoint_ns, checkpoint_id, type_, blob in self.conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, type, checkpoint FROM checkpoints"
+        ):
+            marker = self.serde.loads_typed((type_, blob)).get("channel_values", {}).get(self.channel)
+            if isinstance(marker, dict) and marker.get(RANGES_KEY):
+                updates.append((marker[RANGES_KEY][0][0], thread_id, checkpoint_ns, checkpoint_id))
+        self.conn.executemany(
+            "UPDATE checkpoints SET min_seq = ? WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", updates
+        )
+        self.conn.commit()
+
+    # ESCRITURA
+
+    def _remember(self, key: Tuple[str, str], log: _ThreadLog) -> None:
+        with self._logs_lock:
+            self._logs[key] = log
+            self._logs.move_to_end(key)
+            while len(self._logs) > self.cache_threads:
+                self._logs.popitem(last=False)
+
+    def _forget(self, key: Tuple[str, str]) -> None:
+        with self._logs_lock:
+            self._logs.pop(key, None)
+
+    def _next_seq(self, key: Tuple[str, str]) -> int:
+        with self.cursor(transaction=False) as cur:
+            return cur.execute(
+                "SELECT coalesce(max(seq) + 1, 0) FROM checkpoint_messages WHERE thread_id = ? AND checkpoint_ns = ?",
+                key,
+            ).fetchone()[0]
+
+    def _parent_log(self, key: Tuple[str, str], parent_id: Optional[str]) -> _ThreadLog:
+        with self._logs_lock:
+            log = self._logs.get(key)
+        if log is not None and log.checkpoint_id == parent_id:
+            return log
+        if parent_id is None:
+            return _ThreadLog(None, [], [], self._next_seq(key))
+        # Fallo de caché (otro proceso, fork o reinicio): get_tuple reconstruye el padre y lo recuerda
+        thread_id, checkpoint_ns = key
+        self.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}})
+        with self._logs_lock:
+            log = self._logs.get(key)
+        if log is None or log.checkpoint_id != parent_id:
+            return _ThreadLog(parent_id, [], [], self._next_seq(key))
+        return log
+
+    def _checkpoint_statements(
+        self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata
+    ) -> List[Statement]:
+        messages = checkpoint["channel_values"].get(self.channel)
+        if not isinstance(messages, list):
+            return super()._checkpoint_statements(config, checkpoint, metadata)
+
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        key = (thread_id, checkpoint_ns)
+        parent = self._parent_log(key, config["configurable"].get("checkpoint_id"))
+
+        # Prefijo común con el checkpoint padre: esos mensajes ya están en el log
+        common = 0
+        for new, old in zip(messages, parent.messages):
+            if new is not old and new != old:
+                break
+            common += 1
+
+        new_seqs = list(range(parent.next_seq, parent.next_seq + len(messages) - common))
+        rows = []
+        for seq, message in zip(new_seqs, messages[common:]):
+            rows.append((thread_id, checkpoint_ns, seq, getattr(message, "id", None), *self.serde.dumps_typed(message)))
+        seqs = parent.seqs[:common] + new_seqs
+
+        marker: Dict[str, Any] = {RANGES_KEY: to_ranges(seqs)}
+        step = metadata.get("step", 0)
+        if self.snapshot_every and step % self.snapshot_every == 0:
+            marker["snapshot"] = messages
+        delta_checkpoint = {**checkpoint, "channel_values": {**checkpoint["channel_values"], self.channel: marker}}
+
+        # Se recuerda antes del commit; put/aput lo olvidan si la escritura falla
+        self._remember(key, _ThreadLog(checkpoint["id"], list(messages), seqs, parent.next_seq + len(new_seqs)))
+        statements = [(MESSAGE_INSERT, rows)] if rows else []
+        if self.index is not None:
+            new_messages = [(seq, m) for seq, m in zip(new_seqs, messages[common:]) if isinstance(m, BaseMessage)]
+            statements += self.index.statements(thread_id, checkpoint_ns, checkpoint["id"], step, new_messages)
+        # Los rangos van ordenados: el primero empieza en el menor seq
+        ((_, (row,)),) = super()._checkpoint_statements(config, delta_checkpoint, metadata)
+        return statements + [(DELTA_CHECKPOINT_UPSERT, [(*row, seqs[0] if seqs else None)])]
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        try:
+            return super().put(config, checkpoint, metadata, new_versions)
+        except Exception:
+            self._forget((str(config["configurable"]["thread_id"]), config["configurable"]["checkpoint_ns"]))
+            raise
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        try:
+            return await super().aput(config, checkpoint, metadata, new_versions)
+        except Exception:
+            self._forget((str(config["configurable"]["thread_id"]), config["configurable"]["checkpoint_ns"]))
+            raise
+
+    # LECTURA
+
+    def _expand(self, checkpoint_tuple: Optional[CheckpointTuple], remember: bool = False) -> Optional[CheckpointTuple]:
+        if checkpoint_tuple is None:
+            return None
+        marker = checkpoint_tuple.checkpoint["channel_values"].get(self.channel)
+        if not isinstance(marker, dict) or RANGES_KEY not in marker:
+            return checkpoint_tuple
+
+        thread_id = str(checkpoint_tuple.config["configurable"]["thread_id"])
+        checkpoint_ns = checkpoint_tuple.config["configurable"].get("checkpoint_ns", "")
+        ranges = marker[RANGES_KEY]
+        messages = marker.get("snapshot")
+        if messages is None:
+            messages = []
+            with self.cursor(transaction=False) as cur:
+                for start, end in ranges:
+                    for type_, value in cur.execute(
+                        "SELECT type, value FROM checkpoint_messages "
+                        "WHERE thread_id = ? AND checkpoint_ns = ? AND seq BETWEEN ? AND ? ORDER BY seq",
+                        (thread_id, checkpoint_ns, start, end),
+                    ).fetchall():
+                        messages.append(self.serde.loads_typed((type_, value)))
+
+        if remember:
+            # Lo normal es que el siguiente put cuelgue de este checkpoint
+            key = (thread_id, checkpoint_ns)
+            checkpoint_id = checkpoint_tuple.config["configurable"]["checkpoint_id"]
+            self._remember(key, _ThreadLog(checkpoint_id, list(messages), from_ranges(ranges), self._next_seq(key)))
+
+        checkpoint = {
+            **checkpoint_tuple.checkpoint,
+            "channel_values": {**checkpoint_tuple.checkpoint["channel_values"], self.channel: messages},
+        }
+        return checkpoint_tuple._replace(checkpoint=checkpoint)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._expand(super().get_tuple(config), remember=True)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        for checkpoint_tuple in super().list(config, filter=filter, before=before, limit=limit):
+            yield self._expand(checkpoint_tuple)
+
+    # BÚSQUEDA
+
+    def search_messages(self, query: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        """Búsqueda full-text en todas las conversaciones (ver ConversationIndex.search)."""
+        if self.index is None:
+            raise ValueError("DeltaSqliteSaver was created without an index")
+        with self.cursor(transaction=False) as cur:
+            return self.index.search(cur.connection, query, **kwargs)
+
+    def index_cost(self) -> Dict[str, float]:
+        """Coste de mantener el índice: segundos dentro de los INSERT de FTS5 por write."""
+        stats = dict(self.index.stats) if self.index is not None else {"writes": 0, "messages": 0}
+        seconds = self.statement_seconds.get(INDEX_INSERT, 0.0)
+        stats["seconds"] = seconds
+        stats["ms_per_write"] = 1000 * seconds / stats["writes"] if stats["writes"] else 0.0
+        return stats
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM checkpoint_messages WHERE thread_id = ?", (str(thread_id),))
+            if self.index is not None:
+                self.index.delete_thread(cur.connection, thread_id)
+        with self._logs_lock:
+            for key in [key for key in self._logs if key[0] == str(thread_id)]:
+                del self._logs[key]
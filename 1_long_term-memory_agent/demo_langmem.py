@@ -1,12 +1,39 @@
 from langgraph.prebuilt import create_react_agent
-from langgraph.store.memory import InMemoryStore
 from langmem import create_manage_memory_tool, create_search_memory_tool
 from langchain_core.messages import HumanMessage
 
+import os
+
+from embedding_cache import CachedEmbeddings
+from hybrid_search import HybridStore
+from local_embeddings import HashingEmbeddings
+from memory_writes import BackgroundConsolidator, WriteBehindStore
+from persistent_store import PersistentStore
+
 from dotenv import load_dotenv
 load_dotenv()
 
-store= InMemoryStore(index={"dims": 1536, "embed": "openai:text-embedding-3-small"})
+# EMBEDDINGS=local embebe en local (sin red y en lote); por defecto, OpenAI.
+# Sólo OpenAI va detrás de la caché por hash de contenido (las consultas repetidas no vuelven
+# a llamar al modelo; EMBEDDINGS_CACHE=fichero.db la guarda también en disco entre ejecuciones):
+# recalcular el hashing local cuesta menos que buscarlo en la caché
+if os.getenv("EMBEDDINGS") == "local":
+    embed= HashingEmbeddings(dims= 1536)
+else:
+    embed= CachedEmbeddings("openai:text-embedding-3-small", disk_path= os.getenv("EMBEDDINGS_CACHE"))
+
+# STORE_DIR=carpeta guarda las memorias en disco (sobreviven a reinicios); si no, en memoria
+# con HybridStore: índice IVF + BM25 por namespace; las consultas de palabras clave no se embeben
+if os.getenv("STORE_DIR"):
+    store= PersistentStore(os.getenv("STORE_DIR"), index={"dims": 1536, "embed": embed})
+else:
+    store= HybridStore(index={"dims": 1536, "embed": embed}, nprobe= 8, rerank_budget= 50)
+
+# Los puts de varias llamadas a manage_memory en un turno se escriben juntos (un solo embed)
+store= WriteBehindStore(store)
+
+# Cada 10 minutos fusiona las memorias casi duplicadas ("prefiero el dark mode" guardado varias veces)
+consolidator= BackgroundConsolidator(store, [("memories",)], threshold= 0.9, interval= 600).start()
 
 agent= create_react_agent(model= "openai:gpt-4o-mini", tools=[create_manage_memory_tool(namespace=("memories",)), create_search_memory_tool(namespace=("memories",))], store=store)
 
@@ -52,4 +79,7 @@ output= agent.invoke({
 config={"configurable": {"thread_id": "2"}}
 )
 
-print(output["messages"])
\ No newline at end of file
+print(output["messages"])
+
+consolidator.stop()
+store.close()
@@ -13,6 +13,12 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.sqlite import SqliteSaver
 from IPython.display import Image, display
 import os
+from graph_diagrams import GraphDiagram
+
+from pooled_saver import PooledSqliteSaver
+from conversation_index import ConversationIndex
+from checkpoint_inspector import table_columns, iter_checkpoints, summarize
+from context_window import ContextWindow, ConversationState, llm_summarizer
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -28,11 +34,15 @@ def run_graph(query: str, graph: StateGraph, thread_id: int):
 
 # EN LA MEMORIA
 
-def chatbot(state: MessagesState):
-    ai_message= llm.invoke(state["messages"])
-    return {"messages": ai_message}
+# Últimos ~2000 tokens literales; lo anterior se pliega en un resumen que se guarda en el checkpoint
+context_window= ContextWindow(llm_summarizer(llm), max_tokens= 2000, fold_tokens= 1000)
+
+def chatbot(state: ConversationState):
+    prompt, update= context_window.prepare(state)
+    ai_message= llm.invoke(prompt)
+    return {"messages": ai_message, **update}
 
-workflow= StateGraph(MessagesState)
+workflow= StateGraph(ConversationState)
 
 workflow.add_node(chatbot)
 workflow.add_edge(START, "chatbot")
@@ -41,10 +51,9 @@ workflow.add_edge("chatbot", END)
 checkpointer= MemorySaver()
 in_memory_graph= workflow.compile(checkpointer=checkpointer)
 
-workflow_png= in_memory_graph.get_graph().draw_mermaid_png()
+workflow_png= GraphDiagram(in_memory_graph)
 
-#with open("workflow.png", "wb") as f:
-    #f.write(workflow_png)
+#workflow_png.save("workflow.png")
 
 
 # print(run_graph(query="HOLA", graph= in_memory_graph, thread_id= 1))
@@ -54,34 +63,31 @@ workflow_png= in_memory_graph.get_graph().draw_mermaid_png()
 db_path= "memory.db"
 conn=sqlite3.connect(db_path, check_same_thread= False)
 
-memory= SqliteSaver(conn)
+# memory= SqliteSaver(conn)
+# Modo WAL + group commit; cada mensaje se guarda una vez y los checkpoints apuntan a rangos del log.
+# Las lecturas (get_state, historial, búsquedas) toman prestada una conexión de sólo lectura de un pool
+memory= PooledSqliteSaver(conn, max_readers= 8, snapshot_every= 20, index= ConversationIndex())
 external_memory_graph= workflow.compile(checkpointer=memory)
 
-external_workflow_png= external_memory_graph.get_graph().draw_mermaid_png()
-#with open("external_workflow.png", "wb") as f:
-    #f.write(external_workflow_png)
+external_workflow_png= GraphDiagram(external_memory_graph)
+#external_workflow_png.save("external_workflow.png")
 
 print(run_graph( query= "Qué es la 'memoria'?", thread_id= 2, graph= external_memory_graph))
 
 # PREGUNTARLE A LA MEMORIA
 
-cursor= conn.cursor()
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-tables=  [table_name[0] for table_name in cursor.fetchall()]
-
-
-columns_map= []
-results= []
-
-for table in tables:
-    cursor.execute(f"select * from {table}")
-    results.append(cursor.fetchall())
-    columns_map.append({table:[desc[0] for desc in cursor.description]})
-
+# El inspector lee por páginas y agrega en SQLite, sin cargar la base entera en memoria.
+# Usa su propia conexión de sólo lectura: `conn` es del thread escritor del checkpointer
+inspector_conn= sqlite3.connect(memory.uri, uri= True)
+columns_map= table_columns(inspector_conn)
 print (columns_map) 
 
-cursor.execute(f"select metadata from checkpoints")
-metadata= cursor.fetchall()
+for checkpoint in iter_checkpoints(inspector_conn, thread_id= "2"):
+    print(checkpoint["metadata"])
+
+print(summarize(inspector_conn, thread_id= "2"))
+inspector_conn.close()
 
-steps= [json.loads(m[0]) for m in metadata]
-print(steps)
\ No newline at end of file
+# Búsqueda full-text en todas las conversaciones, sin deserializar checkpoints
+print(memory.search_messages("memoria", role= "human"))
+print(memory.index_cost())
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""Caché de embeddings por hash de contenido, delante del `embed` del store.
+
+Las herramientas de langmem vuelven a embeber los mismos textos una y otra vez (la misma
+consulta en varios threads, la misma memoria al actualizarla). `CachedEmbeddings` envuelve
+cualquier Embeddings y sólo llama al modelo para los textos que no ha visto:
+
+- un LRU en memoria acotado a `max_entries` vectores,
+- opcionalmente, una tabla SQLite en disco (`disk_path`) donde se escribe cada vector
+  nuevo, así que sobrevive a reinicios y a las expulsiones del LRU,
+- contadores de aciertos, fallos y expulsiones en `stats`.
+
+Las claves llevan delante el modelo y su configuración (nombre, dimensiones y, si el
+Embeddings expone `fingerprint`, lo que éste diga, p. ej. el IDF ajustado), así que dos
+modelos distintos nunca comparten vectores en el mismo disco.
+
+    store = InMemoryStore(index={"dims": 1536, "embed": CachedEmbeddings("openai:text-embedding-3-small")})
+"""
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langgraph.store.base import ensure_embeddings
+
+
+def model_namespace(embeddings: Embeddings) -> str:
+    """Clase, modelo y dimensiones de un Embeddings (los atributos habituales de langchain)."""
+    parts = [f"{type(embeddings).__module__}.{type(embeddings).__qualname__}"]
+    for attr in ("model", "model_name", "model_id", "deployment", "dimensions", "dims"):
+        value = getattr(embeddings, attr, None)
+        if value is not None:
+            parts.append(f"{attr}={value}")
+    return ";".join(parts)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings con caché LRU en memoria y, opcionalmente, en disco.
+
+    Args:
+        embeddings: Embeddings a envolver, o el identificador "proveedor:modelo".
+        max_entries: vectores que caben en el LRU en memoria.
+        disk_path: fichero SQLite para el nivel en disco (None = sólo memoria).
+        namespace: prefijo de la clave, para no mezclar modelos distintos en el mismo disco.
+            Por defecto, el `fingerprint` del modelo si lo tiene (se recalcula en cada
+            llamada, por si cambia, como al ajustar el IDF) o clase + modelo + dimensiones.
+    """
+
+    def __init__(
+        self,
+        embeddings: Union[Embeddings, str],
+        *,
+        max_entries: int = 10_000,
+        disk_path: Optional[str] = None,
+        namespace: Optional[str] = None,
+    ) -> None:
+        self.embeddings = ensure_embeddings(embeddings)
+        self._namespace = namespace or model_namespace(self.embeddings)
+        self._fixed_namespace = namespace is not None
+        self.max_entries = max_entries
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL);
+                """
+            )
+
+    @property
+    def namespace(self) -> str:
+        fingerprint = None if self._fixed_namespace else getattr(self.embeddings, "fingerprint", None)
+        return fingerprint or self._namespace
+
+    @staticmethod
+    def _key(namespace: str, kind: str, text: str) -> bytes:
+        # Consultas y documentos por separado: hay modelos que los embeben distinto
+        return hashlib.sha256(f"{namespace}\0{kind}\0{text}".encode("utf-8")).digest()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            with self._lock:
+                self._disk.close()
+                self._disk = None
+
+    # NIVELES DE CACHÉ
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _write_through(self, entries) -> None:
+        if self._disk is not None and entries:
+            with self._disk:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in entries],
+                )
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+                self.stats["hits"] += 1
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if self._disk is not None and missing:
+            for start in range(0, len(missing), 500):
+                chunk = missing[start : start + 500]
+                rows = self._disk.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, found[key])
+                    self.stats["disk_hits"] += 1
+        return found
+
+    # EMBEDDINGS
+
+    def _cached(self, kind: str, texts: List[str]):
+        namespace = self.namespace
+        keys = [self._key(namespace, kind, text) for text in texts]
+        with self._lock:
+            found = self._lookup(keys)
+        # Un solo lote al modelo con los textos que faltan (sin repetidos): clave -> texto
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        return keys, found, missing
+
+    def _store(
+        self, keys: List[bytes], found: Dict[bytes, np.ndarray], missing: Dict[bytes, str], vectors
+    ) -> List[List[float]]:
+        with self._lock:
+            self.stats["misses"] += len(missing)
+            new = []
+            for key, vector in zip(missing, vectors):
+                found[key] = np.asarray(vector, dtype=np.float32)
+                self._remember(key, found[key])
+                new.append((key, found[key]))
+            self._write_through(new)
+        return [found[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._cached("doc", texts)
+        vectors = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._store(keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._cached("query", [text])
+        vectors = [self.embeddings.embed_query(text)] if missing else []
+        return self._store(keys, found, missing, vectors)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._cached("doc", texts)
+        vectors = await self.embeddings.aembed_documents(list(missing.values())) if missing else []
+        return self._store(keys, found, missing, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._cached("query", [text])
+        vectors = [await self.embeddings.aembed_query(text)] if missing else []
+        return self._store(keys, found, missing, vectors)[0]
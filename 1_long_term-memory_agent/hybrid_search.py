@@ -0,0 +1,266 @@
+"""Búsqueda híbrida de memorias: BM25 sobre un índice invertido + vectores, fusionados con RRF.
+
+La búsqueda sólo vectorial necesita un embedding por consulta y falla con coincidencias
+exactas (un código de factura, un nombre propio). `HybridStore` mantiene además un índice
+invertido BM25 por namespace y decide por consulta:
+
+- "bm25": búsquedas de un identificador (entre comillas, o con un token que mezcla dígitos
+  con letras o separadores, como "PED-12345") se responden con BM25 sin llamar al modelo
+  de embeddings. Un número suelto ("mis 3 preferencias") no cuenta: eso es lenguaje
+  natural. Si BM25 no llega a `limit` resultados, se embebe la consulta y el resto sale
+  de la búsqueda híbrida.
+- "hybrid": BM25 y vectores por separado, cada uno hasta `rerank_budget` candidatos,
+  fusionados con reciprocal-rank fusion; si hay `reranker`, reordena sólo ese presupuesto.
+
+    store = HybridStore(index={"dims": 1536, "embed": embeddings}, rerank_budget=50)
+"""
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langgraph.store.base import SearchItem, SearchOp
+
+from ann_index import ANNStore
+from memory_writes import memory_text
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+# Tokens con separadores internos: "ped-12345", "v1.2", "a/b"
+_TOKEN = re.compile(r"\w+(?:[-/.]\w+)*", re.UNICODE)
+
+Reranker = Callable[[str, List[SearchItem]], List[float]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Términos en minúscula y sin tildes (como `remove_diacritics` de FTS5)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TERM.findall(text)
+
+
+def is_keyword_query(query: str) -> bool:
+    """True si la consulta busca un literal: va entre comillas o tiene un identificador.
+
+    Un identificador es un token con algún dígito y además letras o separadores
+    ("PED-12345", "a1b2", "2024-001"); los números sueltos ("top 3", "2024") no lo son.
+    """
+    if '"' in query:
+        return True
+    for token in _TOKEN.findall(query):
+        if any(c.isdigit() for c in token) and not token.isdigit():
+            return True
+    return False
+
+
+class BM25Index:
+    """Índice invertido con puntuación BM25 y altas/bajas incrementales.
+
+    Args:
+        k1: saturación de la frecuencia del término.
+        b: peso de la normalización por longitud del documento.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        self.remove(doc_id)
+        terms = tokenize(text)
+        counts = Counter(terms)
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+        self._terms[doc_id] = list(counts)
+        self.lengths[doc_id] = len(terms)
+        self._total_length += len(terms)
+
+    def remove(self, doc_id: str) -> None:
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(doc_id):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Los `k` documentos con mayor BM25 para los términos de `query`."""
+        if not self.lengths:
+            return []
+        n = len(self.lengths)
+        average = self._total_length / n or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Any]], k: int = 60) -> List[Tuple[Any, float]]:
+    """Fusiona listas ordenadas: cada elemento suma 1 / (k + posición) por lista en la que aparece."""
+    scores: Dict[Any, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            scores[doc] += 1 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+class HybridStore(ANNStore):
+    """ANNStore con un índice BM25 por namespace y búsqueda híbrida con RRF.
+
+    Args:
+        mode: "auto" (BM25 para búsquedas de identificadores, completadas con la híbrida
+            si no llenan la página; híbrida para el resto), "hybrid", "bm25" o "vector".
+        rerank_budget: candidatos que aporta cada buscador y que puede reordenar `reranker`.
+        rrf_k: constante de la fusión RRF.
+        reranker: función (consulta, ítems) -> puntuaciones, aplicada al presupuesto fusionado.
+        **kwargs: como ANNStore.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: str = "auto",
+        rerank_budget: int = 50,
+        rrf_k: int = 60,
+        reranker: Optional[Reranker] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.rerank_budget = rerank_budget
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.stats: Dict[str, int] = {"bm25": 0, "bm25_filled": 0, "hybrid": 0, "vector": 0, "embedded": 0}
+        self._bm25: Dict[Tuple[str, ...], BM25Index] = defaultdict(BM25Index)
+
+    def route(self, query: str) -> str:
+        """Ruta de una consulta ("bm25", "hybrid" o "vector") según `mode`."""
+        if self.mode != "auto":
+            return self.mode
+        return "bm25" if is_keyword_query(query) else "hybrid"
+
+    def _hybrid(self, op: SearchOp) -> bool:
+        return bool(op.query and not op.filter and self.route(op.query) != "vector")
+
+    def _needs_vector(self, op: SearchOp) -> bool:
+        if not self._hybrid(op) or self.route(op.query) != "bm25":
+            return True
+        if self.mode != "auto":
+            return False
+        # Una búsqueda de identificador sólo se embebe si BM25 no llena la página
+        wanted = op.offset + op.limit
+        with self._ann_lock:
+            return len(self._bm25_ranking(op, wanted)) < wanted
+
+    # MANTENIMIENTO DEL ÍNDICE
+
+    def _apply_put_ops_locked(self, put_ops) -> None:
+        super()._apply_put_ops_locked(put_ops)
+        for namespace, key in put_ops:
+            item = self._data[namespace].get(key)
+            if item is None:
+                self._bm25[namespace].remove(key)
+            else:
+                self._bm25[namespace].add(key, memory_text(self, item))
+
+    # BÚSQUEDA
+
+    def _embed_search_queries(self, search_ops):
+        # Las consultas que van sólo por BM25 no se embeben
+        needed = {i: entry for i, entry in search_ops.items() if self._needs_vector(entry[0])}
+        embedded = super()._embed_search_queries(needed)
+        with self._ann_lock:
+            self.stats["embedded"] += len(embedded)
+        return embedded
+
+    async def _aembed_search_queries(self, search_ops):
+        needed = {i: entry for i, entry in search_ops.items() if self._needs_vector(entry[0])}
+        embedded = await super()._aembed_search_queries(needed)
+        with self._ann_lock:
+            self.stats["embedded"] += len(embedded)
+        return embedded
+
+    def _filter_items(self, op: SearchOp):
+        if self._hybrid(op):
+            return []
+        return super()._filter_items(op)
+
+    def _batch_search_locked(self, ops, queryinmem_store, results) -> None:
+        rest = {}
+        for i, (op, candidates) in ops.items():
+            if self._hybrid(op):
+                route = self.route(op.query)
+                self.stats[route] += 1
+                results[i] = self._hybrid_search(op, queryinmem_store.get(op.query), route)
+            else:
+                if op.query:
+                    self.stats["vector"] += 1
+                rest[i] = (op, candidates)
+        super()._batch_search_locked(rest, queryinmem_store, results)
+
+    def _bm25_ranking(self, op: SearchOp, k: int) -> List[Tuple[Tuple[Tuple[str, ...], str], float]]:
+        scored = []
+        for namespace in self._matching_namespaces(op.namespace_prefix):
+            if namespace in self._bm25:
+                scored.extend(((namespace, key), score) for key, score in self._bm25[namespace].search(op.query, k))
+        return sorted(scored, key=lambda x: x[1], reverse=True)[:k]
+
+    def _hybrid_search(self, op: SearchOp, query: Optional[List[float]], route: str) -> List[SearchItem]:
+        budget = max(self.rerank_budget, op.offset + op.limit)
+        lexical = self._bm25_ranking(op, budget)
+        if route == "bm25" and (query is None or len(lexical) >= op.offset + op.limit):
+            fused = lexical
+        else:
+            vector = self._ann_search(op._replace(offset=0, limit=budget), query) if query is not None else []
+            exact = [doc for doc, _ in lexical]
+            similar = [(item.namespace, item.key) for item in vector if item.score is not None]
+            if route == "bm25":
+                # Pocas coincidencias exactas: van primero y el resto de la página sale de la
+                # fusión. Para que todo quede en la escala RRF, las exactas ocupan también los
+                # primeros puestos de la lista vectorial (2 / (k + r) > 1 / (k + r') con r < r')
+                self.stats["bm25_filled"] += 1
+                matched = set(exact)
+                similar = exact + [doc for doc in similar if doc not in matched]
+            fused = reciprocal_rank_fusion([exact, similar], k=self.rrf_k)[:budget]
+        items = [
+            SearchItem(
+                namespace=item.namespace,
+                key=item.key,
+                value=item.value,
+                created_at=item.created_at,
+                updated_at=item.updated_at,
+                score=score,
+            )
+            for (namespace, key), score in fused
+            if (item := self._data[namespace].get(key)) is not None
+        ]
+        if self.reranker is not None and items:
+            # El reranker (caro) sólo ve el presupuesto ya fusionado
+            scores = self.reranker(op.query, items)
+            items = [
+                SearchItem(
+                    namespace=item.namespace,
+                    key=item.key,
+                    value=item.value,
+                    created_at=item.created_at,
+                    updated_at=item.updated_at,
+                    score=float(score),
+                )
+                for item, score in sorted(zip(items, scores), key=lambda x: x[1], reverse=True)
+            ]
+        return items[op.offset : op.offset + op.limit]
@@ -0,0 +1,140 @@
+"""Embeddings locales y sin red para el store de langmem.
+
+`HashingEmbeddings` proyecta n-gramas de caracteres y de palabras a un vector de `dims`
+dimensiones con el hashing trick (crc32, estable entre procesos) y, opcionalmente, los
+pondera con IDF aprendido sobre un corpus (TF-IDF proyectado). Los hashes de los n-gramas
+de caracteres de cada palabra se guardan entre llamadas (LRU por palabra) y el lote se agrega sólo sobre sus
+celdas no nulas antes de escribir la matriz de NumPy. Embeber en lote cuesta por texto lo
+mismo que uno a uno: lo que domina es pasar la matriz a listas de floats, que exige la
+interfaz de Embeddings (`embed_matrix` se lo ahorra). Lo que se gana en lote es el resto
+del camino, p. ej. un `store.batch` frente a un `store.put` por memoria.
+
+    store = InMemoryStore(index={"dims": 1536, "embed": HashingEmbeddings(dims=1536)})
+"""
+import hashlib
+import re
+import zlib
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    """Embeddings por hashing de n-gramas, calculados en lote con NumPy.
+
+    Args:
+        dims: dimensión del vector (1536 para ser intercambiable con text-embedding-3-small).
+        char_ngrams: rango (min, max) de n-gramas de caracteres, dentro de cada palabra.
+        word_ngrams: rango (min, max) de n-gramas de palabras.
+        sublinear_tf: usar log(1 + tf) en lugar de la frecuencia cruda.
+        cache_words: palabras cuyos hashes de n-gramas de caracteres se guardan entre llamadas (LRU).
+    """
+
+    def __init__(
+        self,
+        dims: int = 1536,
+        char_ngrams: Tuple[int, int] = (3, 5),
+        word_ngrams: Tuple[int, int] = (1, 2),
+        sublinear_tf: bool = True,
+        cache_words: int = 100_000,
+    ) -> None:
+        self.dims = dims
+        self.char_ngrams = char_ngrams
+        self.word_ngrams = word_ngrams
+        self.sublinear_tf = sublinear_tf
+        self.cache_words = cache_words
+        self.idf: Optional[np.ndarray] = None
+        # Los n-gramas de caracteres de una palabra ya hasheados: son casi todas las features.
+        # LRU: al llenarse sale la palabra usada hace más tiempo, no la caché entera
+        self._word_cache: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def _word_features(self, words: List[str]) -> Iterable[str]:
+        low, high = self.word_ngrams
+        for n in range(low, high + 1):
+            for i in range(len(words) - n + 1):
+                yield "w:" + " ".join(words[i : i + n])
+
+    def _char_features(self, word: str) -> Iterable[str]:
+        padded = f"<{word}>"
+        low, high = self.char_ngrams
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                yield padded[i : i + n]
+
+    def _char_hashes(self, word: str) -> List[int]:
+        """Hashes de los n-gramas de caracteres de una palabra que no está en la caché, y la guarda."""
+        cache = self._word_cache
+        hashes = [zlib.crc32(f.encode("utf-8")) for f in self._char_features(word)]
+        cache[word] = hashes
+        while len(cache) > self.cache_words:
+            cache.popitem(last=False)
+        return hashes
+
+    def _hashed(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        hashes: List[int] = []
+        lengths: List[int] = []
+        cache = self._word_cache
+        for text in texts:
+            before = len(hashes)
+            words = _WORD.findall(text.lower())
+            hashes.extend(zlib.crc32(f.encode("utf-8")) for f in self._word_features(words))
+            for word in words:
+                # El acierto va en línea (es el caso común); el fallo calcula y guarda
+                cached = cache.get(word)
+                if cached is None:
+                    cached = self._char_hashes(word)
+                else:
+                    cache.move_to_end(word)
+                hashes.extend(cached)
+            lengths.append(len(hashes) - before)
+        h = np.asarray(hashes, dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        signs = np.where(h & 0x80000000, 1.0, -1.0).astype(np.float32)
+        return rows, h % self.dims, signs
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """Embebe todo el lote en una matriz (len(texts), dims) float32 normalizada L2."""
+        rows, cols, signs = self._hashed(texts)
+        # Se trabaja sólo con las celdas no nulas y la matriz densa se escribe una vez al final
+        cells, inverse = np.unique(rows * self.dims + cols, return_inverse=True)
+        values = np.bincount(inverse, weights=signs, minlength=len(cells)).astype(np.float32)
+        if self.sublinear_tf:
+            values = np.sign(values) * np.log1p(np.abs(values))
+        if self.idf is not None:
+            values *= self.idf[cells % self.dims]
+        cell_rows = cells // self.dims
+        norms = np.sqrt(np.bincount(cell_rows, weights=values * values, minlength=len(texts))).astype(np.float32)
+        norms[norms == 0] = 1.0
+        matrix = np.zeros((len(texts), self.dims), dtype=np.float32)
+        matrix.flat[cells] = values / norms[cell_rows]
+        return matrix
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifica la configuración y el IDF: dos instancias con el mismo fingerprint dan los mismos vectores."""
+        idf = hashlib.sha1(self.idf.tobytes()).hexdigest()[:16] if self.idf is not None else "none"
+        return (
+            f"{type(self).__name__}(dims={self.dims},char={self.char_ngrams},word={self.word_ngrams},"
+            f"sublinear={self.sublinear_tf},idf={idf})"
+        )
+
+    def fit(self, corpus: List[str]) -> "HashingEmbeddings":
+        """Aprende pesos IDF por bucket a partir de un corpus (TF-IDF sobre las features hasheadas)."""
+        rows, cols, _ = self._hashed(corpus)
+        # Frecuencia de documento: cada (texto, bucket) cuenta una vez
+        unique = np.unique(rows * self.dims + cols)
+        df = np.bincount(unique % self.dims, minlength=self.dims)
+        self.idf = (np.log((1 + len(corpus)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.embed_matrix(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_matrix([text])[0].tolist()
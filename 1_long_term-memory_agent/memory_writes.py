@@ -0,0 +1,359 @@
+"""Escrituras de memorias agrupadas (write-behind) y consolidación de duplicados.
+
+`create_manage_memory_tool` hace un `put` (y una llamada de embeddings) por cada memoria
+que guarda el agente. `WriteBehindStore` envuelve el store real y encola los puts: un
+thread los vacía en lotes, y cada lote es un solo `batch` del store, es decir, un solo
+`embed_documents` para todos los textos. Las lecturas ven las escrituras pendientes.
+
+`consolidate` fusiona memorias casi duplicadas ("prefiero el dark mode" guardado diez
+veces) por similitud de vectores, buscando los candidatos de cada una en un IVFIndex en
+vez de comparar todas con todas, y `BackgroundConsolidator` la pasa periódicamente.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langgraph.store.base import BaseStore, GetOp, Item, Op, PutOp, Result, get_text_at_path
+
+from ann_index import IVFIndex
+
+Key = Tuple[Tuple[str, ...], str]
+
+
+class WriteBehindStore(BaseStore):
+    """BaseStore que agrupa los puts de `store` en lotes escritos por un thread de fondo.
+
+    Un `get` devuelve la versión pendiente si la hay; `search` y `list_namespaces` esperan
+    a que se vacíe la cola, así que nunca devuelven datos más viejos que el store directo.
+
+    Cada put tiene su Future (`submit` los devuelve): si el lote falla, la excepción va a
+    los Futures de esos puts, no a quien haga el siguiente `flush`. Los puts fallidos no se
+    pierden: quedan en `failed` (y `get` los sigue viendo) hasta que un put nuevo de la
+    misma clave los sustituye o `retry_failed()` los vuelve a encolar; `close()` los
+    reintenta una vez y sólo falla si siguen sin escribirse.
+
+    Args:
+        store: el store real (InMemoryStore, ANNStore, PersistentStore...).
+        max_batch: máximo de puts por lote.
+        max_delay: segundos que se espera a que lleguen más puts antes de escribir.
+    """
+
+    def __init__(self, store: BaseStore, *, max_batch: int = 64, max_delay: float = 0.05) -> None:
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats: Dict[str, int] = {"puts": 0, "coalesced": 0, "batches": 0, "failed": 0}
+        # Cada put pendiente con los Futures de todos los puts de esa clave que sustituye
+        self._pending: Dict[Key, Tuple[PutOp, List[Future]]] = {}
+        self._inflight: Dict[Key, Tuple[PutOp, List[Future]]] = {}
+        self.failed: Dict[Key, Tuple[PutOp, BaseException]] = {}
+        self._cond = threading.Condition()
+        # Serializa el acceso al store real entre el thread escritor y los lectores
+        self._store_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._drain, name="memory-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def embeddings(self):
+        return getattr(self.store, "embeddings", None)
+
+    @property
+    def index_config(self):
+        return getattr(self.store, "index_config", None)
+
+    def close(self) -> None:
+        """Escribe lo pendiente (reintentando una vez lo fallido) y para el thread escritor.
+
+        Raises:
+            RuntimeError: si algún put sigue sin poder escribirse (quedan en `failed`).
+        """
+        self.retry_failed()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        if self.failed:
+            _, error = next(iter(self.failed.values()))
+            raise RuntimeError(f"{len(self.failed)} memory writes could not be written") from error
+
+    # ESCRITURA DIFERIDA
+
+    def _drain(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                keys = list(self._pending)[: self.max_batch]
+                self._inflight = inflight = {key: self._pending.pop(key) for key in keys}
+            error: Optional[BaseException] = None
+            try:
+                with self._store_lock:
+                    self.store.batch([op for op, _ in inflight.values()])
+            except BaseException as e:
+                error = e
+            with self._cond:
+                self.stats["batches"] += 1
+                if error is not None:
+                    for key, (op, _) in inflight.items():
+                        # Un put más nuevo de la misma clave ya lo sustituye
+                        if key not in self._pending:
+                            self.failed[key] = (op, error)
+                    self.stats["failed"] += len(inflight)
+                self._inflight = {}
+                self._cond.notify_all()
+            for _, futures in inflight.values():
+                for future in futures:
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+
+    def flush(self) -> None:
+        """Espera a que todo lo encolado se haya intentado escribir en el store real.
+
+        No lanza los errores de los lotes: van a los Futures de sus puts y a `failed`.
+        """
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._inflight:
+                self._cond.wait()
+
+    def retry_failed(self) -> int:
+        """Vuelve a encolar los puts fallidos. Devuelve cuántos."""
+        with self._cond:
+            failed, self.failed = self.failed, {}
+            for key, (op, _) in failed.items():
+                self._pending.setdefault(key, (op, []))
+            self._cond.notify_all()
+        return len(failed)
+
+    def submit(self, ops: Iterable[PutOp]) -> List[Future]:
+        """Encola puts y devuelve un Future por put, resuelto cuando su lote se escribe (o falla)."""
+        futures = []
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindStore is closed")
+            for op in ops:
+                key = (op.namespace, op.key)
+                future: Future = Future()
+                previous = self._pending.get(key)
+                if previous is not None:
+                    self.stats["coalesced"] += 1
+                self.failed.pop(key, None)
+                self._pending[key] = (op, (previous[1] if previous else []) + [future])
+                self.stats["puts"] += 1
+                futures.append(future)
+            self._cond.notify_all()
+        return futures
+
+    def _pending_put(self, namespace: Tuple[str, ...], key: str) -> Optional[PutOp]:
+        with self._cond:
+            for queue in (self._pending, self._inflight, self.failed):
+                if (namespace, key) in queue:
+                    return queue[(namespace, key)][0]
+        return None
+
+    # BATCH
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        ops = list(ops)
+        results: List[Result] = [None] * len(ops)
+        reads = []
+        self.submit(op for op in ops if isinstance(op, PutOp))
+        for i, op in enumerate(ops):
+            if isinstance(op, PutOp):
+                continue
+            elif isinstance(op, GetOp) and (pending := self._pending_put(op.namespace, op.key)) is not None:
+                results[i] = _pending_item(pending)
+            else:
+                reads.append(i)
+        if any(not isinstance(ops[i], GetOp) for i in reads):
+            self.flush()
+        if reads:
+            with self._store_lock:
+                for i, result in zip(reads, self.store.batch([ops[i] for i in reads])):
+                    results[i] = result
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await asyncio.to_thread(self.batch, list(ops))
+
+
+def _pending_item(op: PutOp) -> Optional[Item]:
+    # Como InMemoryStore, que también reinicia created_at en cada put
+    if op.value is None:
+        return None
+    now = datetime.now(timezone.utc)
+    return Item(value=dict(op.value), key=op.key, namespace=op.namespace, created_at=now, updated_at=now)
+
+
+# CONSOLIDACIÓN
+
+
+def memory_text(store: BaseStore, item: Item) -> str:
+    """El texto que el store embebe para el ítem (sus campos indexados, o el JSON entero)."""
+    config = getattr(store, "index_config", None) or {}
+    texts = []
+    for _, field in config.get("__tokenized_fields", [("$", "$")]):
+        texts.extend(get_text_at_path(item.value, field))
+    return " ".join(texts) if texts else json.dumps(item.value, ensure_ascii=False)
+
+
+def near_duplicates(
+    vectors: np.ndarray, threshold: float, neighbors: int = 16, nprobe: int = 8
+) -> Dict[int, int]:
+    """Agrupa filas con coseno >= threshold. Devuelve {fila duplicada: fila que se queda}.
+
+    Las filas llegan ordenadas por prioridad (la primera de cada grupo es la que se queda).
+    Los candidatos de cada fila salen de un IVFIndex (sus `neighbors` vecinos más cercanos,
+    ampliados mientras todos superen el umbral), no de comparar todas las filas entre sí.
+    """
+    index = IVFIndex(vectors.shape[1], nprobe=nprobe)
+    index.add(list(range(len(vectors))), vectors)
+    merged: Dict[int, int] = {}
+    for row in range(len(vectors)):
+        if row not in index:
+            continue
+        # La propia fila sale primero: se quita antes para no gastar un vecino en ella
+        index.remove([row])
+        k = neighbors
+        while True:
+            hits = index.search(vectors[row], k)
+            if len(hits) < k or hits[-1][1] < threshold:
+                break
+            k *= 2
+        dupes = [other for other, score in hits if score >= threshold]
+        index.remove(dupes)
+        for dupe in dupes:
+            merged[dupe] = row
+    return merged
+
+
+def merge_values(values: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Une valores de memoria ordenados de más a menos reciente.
+
+    Las claves que falten en el más reciente se completan con las de los anteriores (los
+    dicts se unen recursivamente y las listas se concatenan sin repetidos). Si una clave
+    tiene valores distintos, se queda el más reciente: esa parte sí se pierde.
+    """
+    merged = dict(values[0])
+    for value in values[1:]:
+        for key, old in value.items():
+            if key not in merged:
+                merged[key] = old
+            elif isinstance(merged[key], dict) and isinstance(old, dict):
+                merged[key] = merge_values([merged[key], old])
+            elif isinstance(merged[key], list) and isinstance(old, list):
+                merged[key] = merged[key] + [x for x in old if x not in merged[key]]
+    return merged
+
+
+def consolidate(
+    store: BaseStore,
+    namespace: Tuple[str, ...],
+    *,
+    threshold: float = 0.9,
+    embeddings: Any = None,
+    limit: int = 100_000,
+) -> Dict[str, Any]:
+    """Fusiona las memorias de `namespace` casi idénticas a otra más reciente.
+
+    Se queda la versión actualizada más recientemente de cada grupo (la última vez que el
+    usuario lo dijo), con los valores de las demás unidos con `merge_values`, y las demás
+    se borran. Los vectores salen de `embeddings` (por defecto, los del store; con
+    CachedEmbeddings no se vuelve a llamar al modelo).
+
+    Returns:
+        Dict[str, Any]: namespace, items, merged (claves borradas -> clave que se queda),
+        updated (claves que se quedan y cuyo valor cambió) y seconds.
+    """
+    start = time.perf_counter()
+    embeddings = embeddings or getattr(store, "embeddings", None)
+    if embeddings is None:
+        raise ValueError("consolidate needs embeddings: pass them or use a store with an index")
+    items = [item for item in store.search(namespace, limit=limit) if item.namespace == tuple(namespace)]
+    items.sort(key=lambda item: item.updated_at, reverse=True)
+    merged: Dict[str, str] = {}
+    updated: List[str] = []
+    if len(items) > 1:
+        vectors = np.asarray(embeddings.embed_documents([memory_text(store, item) for item in items]), dtype=np.float32)
+        groups: Dict[int, List[int]] = {}
+        for dupe, keeper in near_duplicates(vectors, threshold).items():
+            merged[items[dupe].key] = items[keeper].key
+            groups.setdefault(keeper, []).append(dupe)
+        ops = []
+        for keeper, dupes in groups.items():
+            value = merge_values([items[row].value for row in [keeper, *sorted(dupes)]])
+            if value != items[keeper].value:
+                ops.append(PutOp(tuple(namespace), items[keeper].key, value))
+                updated.append(items[keeper].key)
+        ops.extend(PutOp(tuple(namespace), key, None) for key in merged)
+        if ops:
+            store.batch(ops)
+    return {
+        "namespace": tuple(namespace),
+        "items": len(items),
+        "merged": merged,
+        "updated": updated,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class BackgroundConsolidator:
+    """Thread que consolida los namespaces indicados cada `interval` segundos.
+
+    Los namespaces pueden ser prefijos: se consolida cada namespace que cuelgue de ellos.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        namespaces: List[Tuple[str, ...]],
+        *,
+        threshold: float = 0.9,
+        interval: float = 600.0,
+    ) -> None:
+        self.store = store
+        self.namespaces = namespaces
+        self.threshold = threshold
+        self.interval = interval
+        self.last_report: Optional[List[Dict[str, Any]]] = None
+        self.total_merged = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-consolidator", daemon=True)
+
+    def start(self) -> "BackgroundConsolidator":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        reports = []
+        for prefix in self.namespaces:
+            for namespace in self.store.list_namespaces(prefix=prefix, limit=10_000):
+                reports.append(consolidate(self.store, namespace, threshold=self.threshold))
+        self.last_report = reports
+        self.total_merged += sum(len(report["merged"]) for report in reports)
+        return reports
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
@@ -0,0 +1,436 @@
+"""Store persistente para langmem: ítems en SQLite y embeddings en ficheros mapeados en memoria.
+
+InMemoryStore lo pierde todo al reiniciar y hay que volver a embeber cada memoria. Aquí:
+
+- `store.db` (SQLite, WAL) guarda los ítems y, por cada campo indexado, la fila de su
+  vector en el fichero del namespace.
+- `vectors/<sha1 del namespace>.<generación>.f32` es un fichero append-only por namespace
+  (VectorFile). Las actualizaciones añaden filas nuevas; las viejas quedan como huecos
+  hasta `compact()`, que escribe la siguiente generación.
+
+Nada se carga al arrancar: la primera búsqueda semántica en un namespace lee sus punteros
+de SQLite y mapea su fichero, así que la memoria crece con los namespaces que se tocan.
+
+    store = PersistentStore("memories/", index={"dims": 1536, "embed": embeddings})
+    agent = create_react_agent(model, tools=[...], store=store)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    IndexConfig,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+    ensure_embeddings,
+    get_text_at_path,
+    tokenize_path,
+)
+from langgraph.store.memory import _compare_values, _does_match
+
+from vector_file import VectorFile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    PRIMARY KEY (namespace, key, path)
+);
+CREATE TABLE IF NOT EXISTS vector_files (
+    namespace TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+
+def _ns(namespace: Tuple[str, ...]) -> str:
+    # Las etiquetas no pueden contener "." (lo valida BaseStore), igual que en los stores de LangGraph
+    return ".".join(namespace)
+
+
+def _tuple(namespace: str) -> Tuple[str, ...]:
+    return tuple(namespace.split("."))
+
+
+class _NamespaceVectors:
+    """Vectores de un namespace ya cargado: el fichero mapeado y a quién pertenece cada fila."""
+
+    def __init__(self, file: VectorFile, generation: int, pointers: Iterable[Tuple[str, str, int]]) -> None:
+        self.file = file
+        self.generation = generation
+        self.owners: List[Optional[Tuple[str, str]]] = [None] * len(file)
+        self.alive = np.zeros(len(file), dtype=bool)
+        self.paths: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for key, path, row in pointers:
+            self.add(key, path, row)
+
+    def drop(self, key: str) -> None:
+        for row in self.paths.pop(key, {}).values():
+            self.owners[row] = None
+            self.alive[row] = False
+
+    def add(self, key: str, path: str, row: int) -> None:
+        if row >= len(self.owners):
+            self.owners.extend([None] * (len(self.file) - len(self.owners)))
+            self.alive = np.concatenate([self.alive, np.zeros(len(self.owners) - len(self.alive), dtype=bool)])
+        self.owners[row] = (key, path)
+        self.alive[row] = True
+        self.paths[key][path] = row
+
+    def scores(self, query: np.ndarray, chunk: int = 8192) -> Tuple[np.ndarray, np.ndarray]:
+        """Coseno de `query` contra todas las filas vivas, leyendo el mapa por bloques."""
+        rows = np.flatnonzero(self.alive)
+        if not len(rows):
+            return rows, np.empty(0, dtype=np.float32)
+        scores = np.concatenate(
+            [self.file.rows(slice(i, i + chunk)) @ query for i in range(0, len(self.alive), chunk)]
+        )
+        return rows, scores[rows]
+
+
+class PersistentStore(BaseStore):
+    """BaseStore durable con búsqueda semántica sobre vectores mapeados en memoria.
+
+    Args:
+        directory: carpeta de la base de datos y de los ficheros de vectores.
+        index: configuración de embeddings, como en InMemoryStore (dims, embed, fields).
+        fsync: forzar a disco cada fichero de vectores antes de confirmar en SQLite.
+    """
+
+    def __init__(self, directory: str, *, index: Optional[IndexConfig] = None, fsync: bool = False) -> None:
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(os.path.join(directory, "vectors"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "store.db"), check_same_thread=False)
+        self.conn.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + SCHEMA)
+        self.lock = threading.RLock()
+        self.index_config = dict(index) if index else None
+        self.embeddings = None
+        if self.index_config:
+            self.embeddings = ensure_embeddings(self.index_config.get("embed"))
+            self.index_config["__tokenized_fields"] = [
+                (p, tokenize_path(p)) if p != "$" else (p, p) for p in (self.index_config.get("fields") or ["$"])
+            ]
+        self._loaded: Dict[str, _NamespaceVectors] = {}
+
+    def close(self) -> None:
+        with self.lock:
+            for vectors in self._loaded.values():
+                vectors.file.close()
+            self._loaded.clear()
+            self.conn.close()
+
+    # FICHEROS DE VECTORES
+
+    def _vector_path(self, namespace: str, generation: int) -> str:
+        name = hashlib.sha1(namespace.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "vectors", f"{name}.{generation}.f32")
+
+    def _namespace_vectors(self, namespace: str) -> _NamespaceVectors:
+        """Carga perezosa: sólo la primera vez que un namespace se busca o se escribe."""
+        if namespace not in self._loaded:
+            row = self.conn.execute(
+                "SELECT generation, rows FROM vector_files WHERE namespace = ?", (namespace,)
+            ).fetchone()
+            generation, committed = row if row else (0, 0)
+            file = VectorFile(self._vector_path(namespace, generation), self.index_config["dims"])
+            if len(file) > committed:
+                # Un append que no llegó a confirmarse en SQLite (p. ej. un crash): se descarta
+                file.truncate(committed)
+            pointers = self.conn.execute(
+                "SELECT key, path, row FROM vectors WHERE namespace = ?", (namespace,)
+            ).fetchall()
+            self._loaded[namespace] = _NamespaceVectors(file, generation, pointers)
+        return self._loaded[namespace]
+
+    # BATCH
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        ops = list(ops)
+        results: List[Result] = [None] * len(ops)
+        puts: Dict[Tuple[Tuple[str, ...], str], PutOp] = {}
+        queries = {op.query for op in ops if isinstance(op, SearchOp) and op.query}
+        embedded = self._embed_queries(queries)
+        with self.lock:
+            for i, op in enumerate(ops):
+                if isinstance(op, GetOp):
+                    results[i] = self._get(op)
+                elif isinstance(op, SearchOp):
+                    results[i] = self._search(op, embedded.get(op.query))
+                elif isinstance(op, ListNamespacesOp):
+                    results[i] = self._list_namespaces(op)
+                elif isinstance(op, PutOp):
+                    puts[(op.namespace, op.key)] = op
+                else:
+                    raise ValueError(f"Unknown operation type: {type(op)}")
+        if puts:
+            # Las escrituras van al final del lote, como en InMemoryStore (la última gana)
+            self._apply_puts(list(puts.values()))
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await asyncio.to_thread(self.batch, list(ops))
+
+    # LECTURA
+
+    def _item(self, row: tuple) -> Item:
+        namespace, key, value, created_at, updated_at = row
+        return Item(
+            namespace=_tuple(namespace),
+            key=key,
+            value=json.loads(value),
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+        )
+
+    def _get(self, op: GetOp) -> Optional[Item]:
+        row = self.conn.execute(
+            "SELECT namespace, key, value, created_at, updated_at FROM items WHERE namespace = ? AND key = ?",
+            (_ns(op.namespace), op.key),
+        ).fetchone()
+        return self._item(row) if row else None
+
+    def _prefix_clause(self, prefix: Tuple[str, ...]) -> Tuple[str, List[str]]:
+        if not prefix:
+            return "1", []
+        namespace = _ns(prefix)
+        return "(namespace = ? OR substr(namespace, 1, ?) = ?)", [namespace, len(namespace) + 1, namespace + "."]
+
+    def _embed_queries(self, queries: Iterable[str]) -> Dict[str, np.ndarray]:
+        queries = list(queries)
+        if not queries or not self.embeddings:
+            return {}
+        vectors = np.asarray([self.embeddings.embed_query(query) for query in queries], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return dict(zip(queries, vectors / norms))
+
+    def _search(self, op: SearchOp, query: Optional[np.ndarray]) -> List[SearchItem]:
+        clause, params = self._prefix_clause(op.namespace_prefix)
+        if query is None:
+            rows = self.conn.execute(
+                f"SELECT namespace, key, value, created_at, updated_at FROM items WHERE {clause} ORDER BY rowid",
+                params,
+            ).fetchall()
+            items = [item for item in map(self._item, rows) if self._matches(item, op.filter)]
+            return [self._search_item(item) for item in items[op.offset : op.offset + op.limit]]
+
+        wanted = op.offset + op.limit
+        namespaces = [row[0] for row in self.conn.execute(f"SELECT DISTINCT namespace FROM items WHERE {clause}", params)]
+        scored: Dict[Tuple[str, str], float] = {}
+        for namespace in namespaces:
+            vectors = self._namespace_vectors(namespace)
+            rows, scores = vectors.scores(query)
+            order = np.argsort(-scores, kind="stable")
+            found = 0
+            for row, score in zip(rows[order].tolist(), scores[order].tolist()):
+                key, _ = vectors.owners[row]
+                if (namespace, key) not in scored:
+                    # Max pooling entre campos: la primera aparición es la de mayor puntuación
+                    scored[(namespace, key)] = score
+                    found += 1
+                    # Con filtro no se sabe cuántos sobrevivirán: se puntúan todos
+                    if not op.filter and found >= wanted:
+                        break
+
+        ranked = sorted(scored.items(), key=lambda x: x[1], reverse=True)
+        kept: List[SearchItem] = []
+        seen = set()
+        for start in range(0, len(ranked), 256):
+            page = ranked[start : start + 256]
+            items = self._fetch([key for key, _ in page])
+            for (key, score) in page:
+                item = items.get(key)
+                if item is not None and self._matches(item, op.filter):
+                    seen.add(key)
+                    kept.append(self._search_item(item, score))
+            if len(kept) >= wanted:
+                break
+        kept = kept[op.offset : wanted]
+        if len(kept) < op.limit:
+            # Como en InMemoryStore: si faltan, se completa con ítems sin embedding
+            rows = self.conn.execute(
+                f"""
+                SELECT namespace, key, value, created_at, updated_at FROM items
+                WHERE {clause} AND NOT EXISTS (
+                    SELECT 1 FROM vectors v WHERE v.namespace = items.namespace AND v.key = items.key
+                )
+                ORDER BY rowid
+                """,
+                params,
+            ).fetchall()
+            for item in map(self._item, rows):
+                if len(kept) >= op.limit:
+                    break
+                if (_ns(item.namespace), item.key) not in seen and self._matches(item, op.filter):
+                    kept.append(self._search_item(item))
+        return kept
+
+    def _fetch(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Item]:
+        if not keys:
+            return {}
+        where = " OR ".join(["(namespace = ? AND key = ?)"] * len(keys))
+        rows = self.conn.execute(
+            f"SELECT namespace, key, value, created_at, updated_at FROM items WHERE {where}",
+            [part for key in keys for part in key],
+        ).fetchall()
+        return {(row[0], row[1]): self._item(row) for row in rows}
+
+    @staticmethod
+    def _matches(item: Item, filter: Optional[Dict[str, Any]]) -> bool:
+        return not filter or all(_compare_values(item.value.get(key), value) for key, value in filter.items())
+
+    @staticmethod
+    def _search_item(item: Item, score: Optional[float] = None) -> SearchItem:
+        return SearchItem(
+            namespace=item.namespace,
+            key=item.key,
+            value=item.value,
+            created_at=item.created_at,
+            updated_at=item.updated_at,
+            score=score,
+        )
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> List[Tuple[str, ...]]:
+        namespaces = [_tuple(row[0]) for row in self.conn.execute("SELECT DISTINCT namespace FROM items")]
+        if op.match_conditions:
+            namespaces = [ns for ns in namespaces if all(_does_match(c, ns) for c in op.match_conditions)]
+        if op.max_depth is not None:
+            namespaces = sorted({ns[: op.max_depth] for ns in namespaces})
+        else:
+            namespaces = sorted(namespaces)
+        return namespaces[op.offset : op.offset + op.limit]
+
+    # ESCRITURA
+
+    def _texts(self, op: PutOp) -> List[Tuple[str, str]]:
+        """(path, texto) a embeber para un put, con la misma selección de campos que InMemoryStore."""
+        if op.value is None or op.index is False or not self.embeddings:
+            return []
+        if op.index is None:
+            paths = self.index_config["__tokenized_fields"]
+        else:
+            paths = [(ix, tokenize_path(ix)) for ix in op.index]
+        texts = []
+        for path, field in paths:
+            found = get_text_at_path(op.value, field)
+            if len(found) > 1:
+                texts.extend((f"{path}.{i}", text) for i, text in enumerate(found))
+            elif found:
+                texts.append((path, found[0]))
+        return texts
+
+    def _apply_puts(self, puts: List[PutOp]) -> None:
+        # Se embebe fuera del lock y en una sola llamada para todo el lote
+        texts = {(op.namespace, op.key): self._texts(op) for op in puts}
+        flat = [text for pairs in texts.values() for _, text in pairs]
+        embeddings = iter(self.embeddings.embed_documents(flat) if flat else [])
+        now = datetime.now(timezone.utc).isoformat()
+        with self.lock:
+            appended: Dict[str, List[Tuple[str, str, List[float]]]] = defaultdict(list)
+            try:
+                with self.conn:
+                    for op in puts:
+                        namespace = _ns(op.namespace)
+                        pairs = texts[(op.namespace, op.key)]
+                        if op.value is None:
+                            self.conn.execute("DELETE FROM items WHERE namespace = ? AND key = ?", (namespace, op.key))
+                        else:
+                            self.conn.execute(
+                                """
+                                INSERT INTO items (namespace, key, value, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                                ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                                """,
+                                (namespace, op.key, json.dumps(op.value, ensure_ascii=False), now, now),
+                            )
+                        if op.value is None or pairs:
+                            # Borrado o re-embebido: los vectores anteriores quedan como huecos
+                            self.conn.execute("DELETE FROM vectors WHERE namespace = ? AND key = ?", (namespace, op.key))
+                            if namespace in self._loaded:
+                                self._loaded[namespace].drop(op.key)
+                        for path, _ in pairs:
+                            appended[namespace].append((op.key, path, next(embeddings)))
+                    for namespace, entries in appended.items():
+                        vectors = self._namespace_vectors(namespace)
+                        first = vectors.file.append(_normalized([vector for _, _, vector in entries]))
+                        if self.fsync:
+                            with open(vectors.file.path, "rb+") as f:
+                                os.fsync(f.fileno())
+                        rows = [(namespace, key, path, first + i) for i, (key, path, _) in enumerate(entries)]
+                        self.conn.executemany(
+                            "INSERT OR REPLACE INTO vectors (namespace, key, path, row) VALUES (?, ?, ?, ?)", rows
+                        )
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO vector_files (namespace, generation, rows) VALUES (?, ?, ?)",
+                            (namespace, vectors.generation, len(vectors.file)),
+                        )
+                        for _, key, path, row in rows:
+                            vectors.add(key, path, row)
+            except Exception:
+                # SQLite ya hizo rollback: se descartan los namespaces cargados que pudieran haber cambiado
+                for namespace in appended:
+                    self._loaded.pop(namespace, None)
+                raise
+
+    def compact(self, namespace: Tuple[str, ...]) -> int:
+        """Reescribe el fichero de vectores de un namespace sin huecos. Devuelve las filas liberadas.
+
+        El fichero nuevo es una generación nueva: SQLite cambia de fichero y de filas en la
+        misma transacción, así que un crash a mitad deja el fichero anterior en uso.
+        """
+        name = _ns(namespace)
+        with self.lock:
+            vectors = self._namespace_vectors(name)
+            live = [(row, owner) for row, owner in enumerate(vectors.owners) if owner is not None]
+            freed = len(vectors.file) - len(live)
+            if not freed:
+                return 0
+            generation = vectors.generation + 1
+            new = VectorFile(self._vector_path(name, generation), vectors.file.dims)
+            new.truncate(0)
+            new.append(vectors.file.rows(np.asarray([row for row, _ in live], dtype=np.int64)))
+            new.close()
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE vectors SET row = ? WHERE namespace = ? AND key = ? AND path = ?",
+                    [(row, name, key, path) for row, (_, (key, path)) in enumerate(live)],
+                )
+                self.conn.execute(
+                    "UPDATE vector_files SET generation = ?, rows = ? WHERE namespace = ?", (generation, len(live), name)
+                )
+            vectors.file.close()
+            os.remove(vectors.file.path)
+            self._loaded.pop(name, None)
+            return freed
+
+
+def _normalized(vectors: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
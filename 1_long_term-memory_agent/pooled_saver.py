@@ -0,0 +1,180 @@
+"""Checkpointer con un escritor y un pool de conexiones de sólo lectura.
+
+Con una sola conexión compartida (`check_same_thread=False`) SqliteSaver serializa cada
+lectura detrás del mismo lock que las escrituras: un `get_state` espera a que termine
+el COMMIT de otro thread. En modo WAL los lectores no bloquean al escritor ni al revés,
+así que `PooledSqliteSaver` deja las escrituras en la conexión original (el thread
+escritor de CoalescingSqliteSaver) y cada lectura toma prestada una conexión `mode=ro`
+al mismo fichero de un pool y la devuelve al terminar: `get_tuple`, `list` (y con ellos
+`get_state` y `get_state_history`) corren en paralelo con las escrituras.
+
+    conn = sqlite3.connect("memory.db", check_same_thread=False)
+    memory = PooledSqliteSaver(conn, max_readers=8, snapshot_every=20)
+"""
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.sqlite.utils import load_pending_writes, pending_writes_sql, search_where
+
+from delta_saver import DeltaSqliteSaver
+
+
+def database_path(conn: sqlite3.Connection) -> str:
+    """Fichero de la base `main` de la conexión ("" si es `:memory:`)."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+class PooledSqliteSaver(DeltaSqliteSaver):
+    """DeltaSqliteSaver cuyas lecturas usan un pool de conexiones de sólo lectura.
+
+    Las escrituras siguen agrupadas en el thread escritor sobre `conn`. Como cada put espera
+    a su COMMIT, una lectura posterior (en una transacción nueva del lector) siempre ve lo
+    escrito: el read-your-writes no cambia.
+
+    Args:
+        conn: conexión de escritura a una base en fichero (con `check_same_thread=False`).
+        max_readers: conexiones de lectura como máximo; si están todas prestadas, la
+            lectura va por la conexión compartida, como en SqliteSaver.
+        **kwargs: como DeltaSqliteSaver.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *, max_readers: int = 8, **kwargs: Any) -> None:
+        super().__init__(conn, **kwargs)
+        path = database_path(conn)
+        if not path:
+            raise ValueError("PooledSqliteSaver needs a file database: readers cannot share ':memory:'")
+        self.uri = Path(path).as_uri() + "?mode=ro"
+        self.max_readers = max_readers
+        self.stats.update({"readers": 0, "shared_reads": 0})
+        # Conexiones libres; las prestadas vuelven al pool cuando acaba su último usuario
+        self._pool: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+        self._held: Dict[int, sqlite3.Connection] = {}  # thread -> conexión prestada
+        self._borrows: Dict[int, List[int]] = {}  # id(conexión) -> [thread, usuarios]
+        self._readers_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Para el escritor y cierra las conexiones de lectura (las prestadas, al devolverlas)."""
+        super().close()
+        with self._readers_lock:
+            self.max_readers = 0
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    # CONEXIONES DE LECTURA
+
+    def _open_reader(self) -> Optional[sqlite3.Connection]:
+        if not self.is_setup:
+            # Las tablas (y el modo WAL) se crean desde la conexión de escritura
+            with self.lock:
+                self.setup()
+        with self._readers_lock:
+            if self._closed or self.stats["readers"] >= self.max_readers:
+                return None
+            self.stats["readers"] += 1
+        # isolation_level=None: cada SELECT ve lo último confirmado, sin transacciones abiertas
+        reader = sqlite3.connect(self.uri, uri=True, check_same_thread=False, isolation_level=None)
+        reader.execute("PRAGMA busy_timeout=5000")
+        reader.execute("PRAGMA query_only=ON")
+        return reader
+
+    @contextmanager
+    def _reader(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """Presta una conexión de lectura (None si están todas en uso) y la devuelve al salir su último usuario."""
+        # Las lecturas anidadas o intercaladas del mismo thread (list -> _expand, dos
+        # generadores de list a medias) comparten la conexión y cuentan como usuarios
+        thread = threading.get_ident()
+        with self._readers_lock:
+            reader = self._held.get(thread)
+            if reader is not None:
+                self._borrows[id(reader)][1] += 1
+        if reader is None:
+            try:
+                reader = self._pool.get_nowait()
+            except queue.Empty:
+                reader = self._open_reader()
+            if reader is not None:
+                with self._readers_lock:
+                    self._held[thread] = reader
+                    self._borrows[id(reader)] = [thread, 1]
+        try:
+            yield reader
+        finally:
+            if reader is not None:
+                with self._readers_lock:
+                    borrow = self._borrows[id(reader)]
+                    borrow[1] -= 1
+                    if borrow[1]:
+                        reader = None
+                    else:
+                        # Un generador puede acabar en otro thread: se suelta la del que la pidió
+                        del self._borrows[id(reader)]
+                        del self._held[borrow[0]]
+                        if not self._closed:
+                            self._pool.put(reader)
+                            reader = None
+                if reader is not None:
+                    reader.close()
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        if transaction:
+            with super().cursor(transaction) as cur:
+                yield cur
+            return
+        with self._reader() as reader:
+            if reader is None:
+                with self._readers_lock:
+                    self.stats["shared_reads"] += 1
+                with super().cursor(transaction) as cur:
+                    yield cur
+                return
+            with closing(reader.cursor()) as cur:
+                yield cur
+
+    # LECTURA
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Como SqliteSaver.list, pero las writes pendientes también se leen por el lector
+        # (el original abre el segundo cursor sobre `self.conn`)
+        where, params = search_where(config, filter, before)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata "
+            f"FROM checkpoints {where} ORDER BY checkpoint_id DESC"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (*params, limit)
+        # Se itera el cursor, como SqliteSaver.list, sin cargar todas las filas en memoria
+        with self.cursor(transaction=False) as cur, closing(cur.connection.cursor()) as wcur:
+            cur.execute(query, params)
+            for thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata in cur:
+                wcur.execute(pending_writes_sql(self._has_task_path), (thread_id, checkpoint_ns, checkpoint_id))
+                checkpoint_tuple = CheckpointTuple(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+                    self.serde.loads_typed((type_, checkpoint)),
+                    json.loads(metadata) if metadata is not None else {},
+                    (
+                        {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                        if parent_id
+                        else None
+                    ),
+                    load_pending_writes(wcur, self.serde),
+                )
+                yield self._expand(checkpoint_tuple)
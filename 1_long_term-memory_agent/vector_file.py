@@ -0,0 +1,67 @@
+"""Fichero append-only de vectores, leído con memory-map.
+
+Los vectores se añaden al final con escrituras normales y se leen a través de un
+`np.memmap`, así que sólo las filas que se tocan llegan a memoria residente (el resto lo
+gestiona la caché de páginas del sistema operativo).
+"""
+import os
+from typing import Any, Optional
+
+import numpy as np
+
+
+class VectorFile:
+    """Vectores de `dims` dimensiones en un fichero binario plano, fila a fila.
+
+    Args:
+        path: ruta del fichero (se crea si no existe).
+        dims: dimensión de los vectores.
+        dtype: tipo de cada componente (float32 por defecto).
+    """
+
+    def __init__(self, path: str, dims: int, dtype: Any = np.float32) -> None:
+        self.path = path
+        self.dims = dims
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = dims * self.dtype.itemsize
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        self._count = os.path.getsize(path) // self.row_bytes
+        self._map: Optional[np.memmap] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return self._count * self.row_bytes
+
+    def append(self, vectors: Any) -> int:
+        """Añade una matriz (n, dims) al final y devuelve el índice de su primera fila."""
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype).reshape(-1, self.dims)
+        start = self._count
+        with open(self.path, "ab") as f:
+            f.write(vectors.tobytes())
+        self._count += len(vectors)
+        return start
+
+    def truncate(self, rows: int) -> None:
+        """Descarta todo lo que haya a partir de la fila `rows` (p. ej. una escritura a medias)."""
+        self._map = None
+        with open(self.path, "r+b") as f:
+            f.truncate(rows * self.row_bytes)
+        self._count = rows
+
+    def _mapped(self) -> np.memmap:
+        if self._map is None or len(self._map) < self._count:
+            self._map = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(self._count, self.dims))
+        return self._map
+
+    def rows(self, rows: Any) -> np.ndarray:
+        """Copia en memoria las filas pedidas (un índice, un slice o un array de índices)."""
+        if not self._count:
+            return np.empty((0, self.dims), dtype=self.dtype)
+        return np.array(self._mapped()[rows])
+
+    def close(self) -> None:
+        self._map = None
@@ -0,0 +1,207 @@
+"""Motor de disponibilidad de doctores: huecos libres en arrays ordenados con bisect y reservas atómicas.
+
+`doctor_availability_agent` simulaba la búsqueda con una moneda. En producción tiene que
+buscar en los calendarios de miles de doctores. `AvailabilityEngine` guarda, por
+especialidad, la lista ordenada de huecos libres `(inicio, doctor)`:
+
+- "primer hueco libre de la especialidad X a partir de T" es un `bisect` (O(log n)),
+- reservar marca el hueco con una lápida bajo el lock de su especialidad (sin mover la
+  lista, que con `del` sería O(n)), así que dos agentes nunca reservan el mismo hueco (la
+  segunda reserva devuelve False),
+- cancelar le quita la lápida, o lo inserta en su sitio si no estaba.
+
+Los tiempos son enteros (minutos desde un origen cualquiera).
+
+    engine = AvailabilityEngine()
+    engine.add_doctor("dr-1", "cardiology", [540, 570, 600])
+    slot = engine.book_earliest("cardiology", after=560)   # (570, "dr-1")
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Slot = Tuple[int, str]
+
+
+class _Calendar:
+    """Huecos de una especialidad: una lista ordenada que no se mueve al reservar, más lápidas.
+
+    `dead` lleva el índice de cada hueco reservado al siguiente índice candidato; saltar una
+    racha de reservados sigue esos punteros comprimiendo el camino (como en union-find), así
+    que cuesta O(1) amortizado. Cuando las lápidas pasan de la mitad de la lista se compacta
+    de una vez, también O(1) amortizado por reserva.
+    """
+
+    __slots__ = ("slots", "dead", "lock")
+
+    def __init__(self) -> None:
+        self.slots: List[Slot] = []
+        self.dead: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.slots) - len(self.dead)
+
+    def live(self, i: int) -> int:
+        """Primer índice >= i sin reservar (len(slots) si no queda ninguno)."""
+        dead = self.dead
+        root = i
+        while root in dead:
+            root = dead[root]
+        while i != root:
+            following = dead[i]
+            dead[i] = root
+            i = following
+        return root
+
+    def index(self, slot: Slot) -> int:
+        """Índice de `slot` en la lista, esté libre o reservado; -1 si no está."""
+        i = bisect_left(self.slots, slot)
+        return i if i < len(self.slots) and self.slots[i] == slot else -1
+
+    def take(self, i: int) -> Slot:
+        """Reserva el índice `i` (libre) y devuelve su hueco."""
+        slot = self.slots[i]
+        self.dead[i] = i + 1
+        if len(self.dead) > max(64, len(self.slots) // 2):
+            self.compact()
+        return slot
+
+    def compact(self) -> None:
+        """Quita de la lista los huecos reservados; después los índices cambian."""
+        if self.dead:
+            dead = self.dead
+            self.slots = [slot for i, slot in enumerate(self.slots) if i not in dead]
+            self.dead = {}
+
+    def insert(self, slot: Slot) -> None:
+        """Deja `slot` libre: le quita la lápida o lo inserta en su sitio."""
+        i = self.index(slot)
+        if i >= 0:
+            if self.dead.pop(i, None) is not None:
+                # Los punteros comprimidos pueden saltar por encima de i: se vuelven a apuntar al
+                # vecino. Es O(lápidas), pero las cancelaciones son raras frente a las reservas
+                self.dead = {k: k + 1 for k in self.dead}
+            return
+        # Insertar mueve los índices de las lápidas: se compacta antes
+        self.compact()
+        self.slots.insert(bisect_left(self.slots, slot), slot)
+
+    def extend(self, added: List[Slot]) -> None:
+        """Carga masiva: un solo sort, sin duplicados."""
+        self.compact()
+        slots = self.slots
+        slots.extend(added)
+        slots.sort()
+        # Sin duplicados: un hueco repetido se podría reservar dos veces
+        slots[:] = [slot for i, slot in enumerate(slots) if i == 0 or slot != slots[i - 1]]
+
+
+class AvailabilityEngine:
+    """Huecos libres por especialidad, ordenados por (inicio, doctor)."""
+
+    def __init__(self) -> None:
+        self._calendars: Dict[str, _Calendar] = {}
+        self._specialty: Dict[str, str] = {}
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"queries": 0, "bookings": 0, "conflicts": 0}
+
+    def __len__(self) -> int:
+        return sum(len(calendar) for calendar in list(self._calendars.values()))
+
+    def _calendar(self, specialty: str) -> _Calendar:
+        calendar = self._calendars.get(specialty)
+        if calendar is None:
+            # setdefault es atómico: dos threads que llegan a la vez se quedan con el mismo calendario
+            calendar = self._calendars.setdefault(specialty, _Calendar())
+        return calendar
+
+    def _count(self, key: str) -> None:
+        # Los locks son por especialidad y los contadores son de todo el motor
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    # CALENDARIOS
+
+    def add_doctor(self, doctor: str, specialty: str, starts: Iterable[int]) -> None:
+        """Da de alta (o amplía) el calendario de `doctor` con los huecos que empiezan en `starts`."""
+        self.add_doctors([(doctor, specialty, starts)])
+
+    def add_doctors(self, calendars: Iterable[Tuple[str, str, Iterable[int]]]) -> None:
+        """Carga masiva de calendarios (doctor, especialidad, inicios): un solo sort por especialidad."""
+        new: Dict[str, List[Slot]] = {}
+        for doctor, specialty, starts in calendars:
+            self._specialty[doctor] = specialty
+            new.setdefault(specialty, []).extend((int(start), doctor) for start in starts)
+        for specialty, added in new.items():
+            calendar = self._calendar(specialty)
+            with calendar.lock:
+                if len(added) < 64:
+                    for slot in added:
+                        calendar.insert(slot)
+                else:
+                    calendar.extend(added)
+
+    def specialty(self, doctor: str) -> Optional[str]:
+        return self._specialty.get(doctor)
+
+    # CONSULTAS
+
+    def earliest(self, specialty: str, after: int) -> Optional[Slot]:
+        """Primer hueco libre de `specialty` que empieza en `after` o más tarde (None si no hay)."""
+        self._count("queries")
+        calendar = self._calendars.get(specialty)
+        if calendar is None:
+            return None
+        with calendar.lock:
+            i = calendar.live(bisect_left(calendar.slots, (after, "")))
+            return calendar.slots[i] if i < len(calendar.slots) else None
+
+    def free_between(self, specialty: str, start: int, end: int, limit: int = 20) -> List[Slot]:
+        """Hasta `limit` huecos libres que empiezan en [start, end)."""
+        calendar = self._calendars.get(specialty)
+        if calendar is None:
+            return []
+        with calendar.lock:
+            slots = calendar.slots
+            found: List[Slot] = []
+            i = calendar.live(bisect_left(slots, (start, "")))
+            while i < len(slots) and slots[i][0] < end and len(found) < limit:
+                found.append(slots[i])
+                i = calendar.live(i + 1)
+            return found
+
+    # RESERVAS
+
+    def book(self, doctor: str, start: int) -> bool:
+        """Reserva el hueco exacto; False si ya no está libre (otro agente se adelantó)."""
+        specialty = self._specialty.get(doctor)
+        if specialty is None:
+            return False
+        calendar = self._calendar(specialty)
+        with calendar.lock:
+            i = calendar.index((int(start), doctor))
+            if i < 0 or i in calendar.dead:
+                self._count("conflicts")
+                return False
+            calendar.take(i)
+            self._count("bookings")
+            return True
+
+    def book_earliest(self, specialty: str, after: int) -> Optional[Slot]:
+        """Busca y reserva en la misma sección crítica el primer hueco libre desde `after`."""
+        calendar = self._calendars.get(specialty)
+        if calendar is None:
+            return None
+        with calendar.lock:
+            i = calendar.live(bisect_left(calendar.slots, (after, "")))
+            if i == len(calendar.slots):
+                return None
+            self._count("bookings")
+            return calendar.take(i)
+
+    def release(self, doctor: str, start: int) -> None:
+        """Cancela una reserva: el hueco vuelve a estar libre."""
+        calendar = self._calendar(self._specialty[doctor])
+        with calendar.lock:
+            calendar.insert((int(start), doctor))
@@ -0,0 +1,79 @@
+"""Latencia de punta a punta del workflow de citas: comprobaciones en serie vs. en paralelo.
+
+Cada agente duerme su latencia simulada y falla con probabilidad 1/2, como en el ejercicio.
+En paralelo, la disponibilidad del doctor y la verificación del paciente se lanzan a la vez
+y sólo se reintenta la que falló.
+
+    python bench_appointments.py --runs 100 --doctor 0.20 --patient 0.15 --scheduling 0.10 --notification 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+import numpy as np
+
+import exercise_multi_agent_design as appointments
+
+INITIAL_STATE = {
+    "doctor_available": False,
+    "patient_verified": False,
+    "appointment_scheduled": False,
+    "notification_sent": False,
+}
+
+
+async def book(recursion_limit: int):
+    """Una reserva: (segundos, pasos del grafo)."""
+    steps = 0
+    start = time.perf_counter()
+    async for _ in appointments.graph.astream(INITIAL_STATE, config={"recursion_limit": recursion_limit}, stream_mode="updates"):
+        steps += 1
+    return time.perf_counter() - start, steps
+
+
+async def bench(parallel: bool, runs: int, seed: int, recursion_limit: int):
+    appointments.PARALLEL_CHECKS = parallel
+    # Reintentos sin límite, como en el ejercicio original: con RETRY_POLICY algunas reservas
+    # se abandonan (y sus backoffs) y la comparación serie/paralelo deja de ser la misma
+    appointments.RETRY_POLICY = None
+    appointments.seed_routing(seed)
+    seconds, steps = [], []
+    for _ in range(runs):
+        s, n = await book(recursion_limit)
+        seconds.append(s)
+        steps.append(n)
+    return np.asarray(seconds), np.asarray(steps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--doctor", type=float, default=0.20)
+    parser.add_argument("--patient", type=float, default=0.15)
+    parser.add_argument("--scheduling", type=float, default=0.10)
+    parser.add_argument("--notification", type=float, default=0.05)
+    parser.add_argument("--recursion-limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    appointments.AGENT_DELAYS.update(
+        {
+            "doctor_availability_agent": args.doctor,
+            "patient_verification_agent": args.patient,
+            "scheduling_agent": args.scheduling,
+            "notification_agent": args.notification,
+        }
+    )
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = {name: asyncio.run(bench(name == "paralelo", args.runs, args.seed, args.recursion_limit)) for name in ("serie", "paralelo")}
+
+    print(f"{'checks':<10}{'p50 (s)':>9}{'p99 (s)':>9}{'media (s)':>11}{'pasos/reserva':>15}")
+    for name, (seconds, steps) in results.items():
+        print(
+            f"{name:<10}{np.percentile(seconds, 50):>9.3f}{np.percentile(seconds, 99):>9.3f}"
+            f"{seconds.mean():>11.3f}{steps.mean():>15.1f}"
+        )
+    speedup = results["serie"][0].mean() / results["paralelo"][0].mean()
+    print(f"speedup medio: {speedup:.2f}x")
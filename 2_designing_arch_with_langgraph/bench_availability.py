@@ -0,0 +1,125 @@
+"""Generador de carga y latencia del motor de disponibilidad: bisect por especialidad vs. recorrer calendarios.
+
+Crea `--doctors` doctores repartidos en `--specialties` especialidades, con huecos de 30
+minutos en horario de 8 horas durante `--days` días (parte ya ocupados). Después varios
+threads lanzan consultas "primer hueco desde T" y reservas atómicas mezcladas, y se
+comprueba que ningún hueco se ha reservado dos veces.
+
+    python bench_availability.py --doctors 5000 --days 30 --workers 8 --ops 200000
+"""
+import argparse
+import random
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from availability import AvailabilityEngine
+
+SLOT_MINUTES = 30
+DAY_MINUTES = 24 * 60
+
+
+def make_calendars(doctors: int, specialties: int, days: int, busy: float, seed: int = 0):
+    """{doctor: (especialidad, inicios de sus huecos libres ordenados)}."""
+    rng = random.Random(seed)
+    calendars = {}
+    for d in range(doctors):
+        starts = []
+        for day in range(days):
+            if rng.random() < 0.3:
+                continue  # no pasa consulta ese día
+            for slot in range(8 * 60 // SLOT_MINUTES):
+                if rng.random() >= busy:
+                    starts.append(day * DAY_MINUTES + 9 * 60 + slot * SLOT_MINUTES)
+        calendars[f"dr-{d}"] = (f"spec-{d % specialties}", starts)
+    return calendars
+
+
+def scan_earliest(by_specialty: Dict[str, List[List[int]]], names: Dict[str, List[str]], specialty: str, after: int):
+    """Sin índice: mirar el calendario de cada doctor de la especialidad y quedarse con el mínimo."""
+    best = None
+    for doctor, starts in zip(names[specialty], by_specialty[specialty]):
+        i = bisect_left(starts, after)
+        if i < len(starts) and (best is None or (starts[i], doctor) < best):
+            best = (starts[i], doctor)
+    return best
+
+
+def load(engine: AvailabilityEngine, specialties: int, horizon: int, ops: int, book_ratio: float, seed: int):
+    rng = random.Random(seed)
+    latencies = np.empty(ops)
+    booked = []
+    for n in range(ops):
+        specialty = f"spec-{rng.randrange(specialties)}"
+        after = rng.randrange(horizon)
+        start = time.perf_counter()
+        if rng.random() < book_ratio:
+            slot = engine.book_earliest(specialty, after)
+            if slot is not None:
+                booked.append(slot)
+        else:
+            engine.earliest(specialty, after)
+        latencies[n] = time.perf_counter() - start
+    return latencies, booked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--doctors", type=int, default=5000)
+    parser.add_argument("--specialties", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--busy", type=float, default=0.3, help="fracción de huecos ya ocupados")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200_000, help="operaciones en total")
+    parser.add_argument("--book-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    calendars = make_calendars(args.doctors, args.specialties, args.days, args.busy)
+    engine = AvailabilityEngine()
+    start = time.perf_counter()
+    engine.add_doctors((doctor, specialty, starts) for doctor, (specialty, starts) in calendars.items())
+    build = time.perf_counter() - start
+    total = len(engine)
+    print(f"huecos libres: {total:,} ({args.doctors} doctores), carga: {build:.2f} s")
+
+    # Consultas sueltas: índice vs. recorrer los calendarios de la especialidad
+    by_specialty: Dict[str, List[List[int]]] = {}
+    names: Dict[str, List[str]] = {}
+    for doctor, (specialty, starts) in calendars.items():
+        by_specialty.setdefault(specialty, []).append(starts)
+        names.setdefault(specialty, []).append(doctor)
+    rng = random.Random(1)
+    queries = [(f"spec-{rng.randrange(args.specialties)}", rng.randrange(args.days * DAY_MINUTES)) for _ in range(500)]
+    start = time.perf_counter()
+    indexed = [engine.earliest(s, t) for s, t in queries]
+    indexed_us = 1e6 * (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    scanned = [scan_earliest(by_specialty, names, s, t) for s, t in queries]
+    scan_us = 1e6 * (time.perf_counter() - start) / len(queries)
+    print(f"primer hueco: bisect {indexed_us:.1f} µs, recorrer calendarios {scan_us:.1f} µs, iguales: {indexed == scanned}")
+
+    # Carga concurrente: consultas y reservas mezcladas
+    per_worker = args.ops // args.workers
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(
+            pool.map(
+                lambda w: load(engine, args.specialties, args.days * DAY_MINUTES, per_worker, args.book_ratio, seed=w),
+                range(args.workers),
+            )
+        )
+    elapsed = time.perf_counter() - start
+    latencies = np.concatenate([r[0] for r in results]) * 1e6
+    booked = [slot for r in results for slot in r[1]]
+    print(
+        f"carga: {args.workers} threads, {per_worker * args.workers:,} ops en {elapsed:.2f} s "
+        f"({per_worker * args.workers / elapsed:,.0f} ops/s)"
+    )
+    print(f"latencia: p50 {np.percentile(latencies, 50):.1f} µs, p99 {np.percentile(latencies, 99):.1f} µs")
+    print(
+        f"reservas: {len(booked):,}, repetidas: {len(booked) - len(set(booked))}, "
+        f"huecos libres: {len(engine):,} (esperados {total - len(booked):,})"
+    )
@@ -0,0 +1,77 @@
+"""Verificaciones por segundo del registro de pacientes con 1M y 10M registros.
+
+Compara la consulta directa a SQLite con `verify` (Bloom + LRU) y `verify_many` (lotes),
+con la mitad de los identificadores inexistentes y, aparte, con un conjunto caliente de
+pacientes que se repiten (donde acierta el LRU). El filtro empieza con `--capacity` y
+crece solo durante la carga, así que la columna FP mide también el filtro rehecho.
+
+    python bench_patient_registry.py --sizes 1000000 10000000 --ops 50000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from patient_registry import PatientRegistry
+
+
+def patient_id(n: int) -> str:
+    return f"P{n:09d}"
+
+
+def workload(size: int, ops: int, unknown: float, hot: int = 0, seed: int = 0):
+    """Identificadores a verificar: una fracción `unknown` no existe; con `hot`, el 80% sale de `hot` pacientes."""
+    rng = random.Random(seed)
+    ids = []
+    for _ in range(ops):
+        if rng.random() < unknown:
+            ids.append(patient_id(size + rng.randrange(size)))
+        elif hot and rng.random() < 0.8:
+            ids.append(patient_id(rng.randrange(hot)))
+        else:
+            ids.append(patient_id(rng.randrange(size)))
+    return ids
+
+
+def rate(fn, ids) -> float:
+    start = time.perf_counter()
+    fn(ids)
+    return len(ids) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--ops", type=int, default=50_000)
+    parser.add_argument("--unknown", type=float, default=0.5, help="fracción de ids que no existen")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--capacity", type=int, default=100_000, help="capacidad inicial del filtro (crece al llenarse)")
+    args = parser.parse_args()
+
+    print(f"{'registros':>11}{'carga (s)':>11}{'MB':>7}{'directa/s':>11}{'verify/s':>10}{'lotes/s':>10}{'caliente/s':>12}{'Bloom -':>9}{'FP':>6}{'rehechos':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "patients.db")
+            registry = PatientRegistry(path, capacity=args.capacity, cache_size=100_000)
+            start = time.perf_counter()
+            registry.add_patients((patient_id(n), n % 10 != 0) for n in range(size))
+            build = time.perf_counter() - start
+            # En modo WAL lo último escrito sigue en -wal hasta el checkpoint: se suman los tres ficheros
+            megabytes = sum(os.path.getsize(path + suffix) for suffix in ("", "-wal", "-shm") if os.path.exists(path + suffix)) / 1e6
+
+            ids = workload(size, args.ops, args.unknown, seed=1)
+            direct = rate(lambda ids: [registry.lookup(i) for i in ids], ids)
+            single = rate(lambda ids: [registry.verify(i) for i in ids], workload(size, args.ops, args.unknown, seed=2))
+            negatives, false_positives = registry.stats["bloom_negatives"], registry.stats["false_positives"]
+            batched = rate(
+                lambda ids: [registry.verify_many(ids[i : i + args.batch]) for i in range(0, len(ids), args.batch)],
+                workload(size, args.ops, args.unknown, seed=3),
+            )
+            hot = rate(lambda ids: [registry.verify(i) for i in ids], workload(size, args.ops, args.unknown, hot=10_000, seed=4))
+            registry.close()
+
+        print(
+            f"{size:>11,}{build:>11.1f}{megabytes:>7.0f}{direct:>11,.0f}{single:>10,.0f}{batched:>10,.0f}{hot:>12,.0f}"
+            f"{negatives:>9,}{false_positives:>6,}{registry.stats['bloom_rebuilds']:>10}"
+        )
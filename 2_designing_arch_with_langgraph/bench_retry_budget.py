@@ -0,0 +1,106 @@
+"""Pasos y latencia p50/p99 del coordinador de citas con y sin presupuesto de reintentos.
+
+Cada agente tarda `--delay` segundos y falla con probabilidad 1/2. Sin política, el
+coordinador reintenta sin límite: la cola la corta el recursion_limit (GraphRecursionError)
+o no la corta nadie. Con RetryPolicy, cada reserva acaba en "booked" o en "gave_up" con
+su motivo.
+
+La política no sale gratis y hay que ajustarla a la latencia de los agentes:
+
+- El backoff se suma a la latencia. Con `--base-delay` muy por encima de `--delay` (la
+  fila "backoff 0.05-1s", los valores pensados para agentes con LLM) la p50 casi se duplica.
+  Con el backoff del orden de la latencia de un agente, la p50 queda cerca de la de sin límite.
+- Cada paso falla la mitad de las veces, así que con `--max-attempts` intentos se abandona
+  con probabilidad 1/2^n por paso: con 4 intentos, una de cada cuatro reservas; con 6, ~4%.
+- El deadline corta la cola (p99 y máx) a cambio de abandonar las reservas más lentas.
+
+    python bench_retry_budget.py --runs 300 --delay 0.02 --max-attempts 6 --base-delay 0.005 --max-delay 0.04
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+from collections import Counter
+
+import numpy as np
+from langgraph.errors import GraphRecursionError
+
+import exercise_multi_agent_design as appointments
+from retry_budget import RetryPolicy
+
+INITIAL_STATE = {
+    "doctor_available": False,
+    "patient_verified": False,
+    "appointment_scheduled": False,
+    "notification_sent": False,
+}
+
+
+async def book(recursion_limit: int):
+    """Una reserva: (segundos, pasos del grafo, resultado)."""
+    steps, state = 0, {}
+    start = time.perf_counter()
+    try:
+        async for state in appointments.graph.astream(
+            INITIAL_STATE, config={"recursion_limit": recursion_limit}, stream_mode="values"
+        ):
+            steps += 1
+    except GraphRecursionError:
+        return time.perf_counter() - start, steps, "recursion_limit"
+    outcome = state.get("outcome", "?")
+    if outcome == "gave_up":
+        outcome = f"gave_up:{state['gave_up']['reason']}"
+    return time.perf_counter() - start, steps, outcome
+
+
+async def bench(policy, runs: int, seed: int, recursion_limit: int):
+    appointments.RETRY_POLICY = policy
+    appointments.seed_routing(seed)
+    seconds, steps, outcomes = [], [], Counter()
+    for _ in range(runs):
+        s, n, outcome = await book(recursion_limit)
+        seconds.append(s)
+        steps.append(n)
+        outcomes[outcome] += 1
+    return np.asarray(seconds), np.asarray(steps), outcomes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--delay", type=float, default=0.02, help="latencia simulada de cada agente")
+    parser.add_argument("--max-attempts", type=int, default=6)
+    parser.add_argument("--base-delay", type=float, default=0.005, help="backoff del primer reintento, antes del jitter")
+    parser.add_argument("--max-delay", type=float, default=0.04, help="techo del backoff")
+    parser.add_argument("--deadline", type=float, default=0.4)
+    args = parser.parse_args()
+
+    for agent in appointments.AGENT_DELAYS:
+        appointments.AGENT_DELAYS[agent] = args.delay
+    runs = [
+        ("sin límite, recursion_limit=25", None, 25),
+        ("sin límite", None, 10_000),
+        ("4 intentos, backoff 0.05-1s + 0.4s", RetryPolicy(max_attempts=4, base_delay=0.05, max_delay=1.0, deadline=0.4), 10_000),
+        (
+            f"{args.max_attempts} intentos",
+            RetryPolicy(max_attempts=args.max_attempts, base_delay=args.base_delay, max_delay=args.max_delay, deadline=None),
+            10_000,
+        ),
+        (
+            f"{args.max_attempts} intentos + {args.deadline:g}s",
+            RetryPolicy(max_attempts=args.max_attempts, base_delay=args.base_delay, max_delay=args.max_delay, deadline=args.deadline),
+            10_000,
+        ),
+    ]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = [(name, *asyncio.run(bench(policy, args.runs, args.seed, limit))) for name, policy, limit in runs]
+
+    print(f"{'política':<36}{'pasos p50':>10}{'p99':>6}{'máx':>6}{'s p50':>8}{'s p99':>8}{'s máx':>8}  resultados")
+    for name, seconds, steps, outcomes in results:
+        print(
+            f"{name:<36}{np.percentile(steps, 50):>10.0f}{np.percentile(steps, 99):>6.0f}{steps.max():>6}"
+            f"{np.percentile(seconds, 50):>8.3f}{np.percentile(seconds, 99):>8.3f}{seconds.max():>8.3f}  "
+            + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items()))
+        )
@@ -0,0 +1,100 @@
+"""Simulación con semilla de las cuatro topologías de demo_multiagent_patterns: hops, overhead por hop y límite de recursión.
+
+Los agentes del demo no hacen trabajo (sólo imprimen y eligen el siguiente nodo), así que
+el tiempo por hop es el overhead del ejecutor de LangGraph. Con la misma semilla, cada
+topología recorre exactamente los mismos caminos en cada ejecución del benchmark.
+
+    python bench_topologies.py --runs 2000 --seed 0 --recursion-limit 25
+"""
+import argparse
+import contextlib
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+from langgraph.errors import GraphRecursionError
+
+import demo_multiagent_patterns as demo
+
+TOPOLOGIES = {
+    "pipeline": demo.graph,
+    "network": demo.complex_graph,
+    "supervisor": demo.supervisor_graph,
+    "hierarchical": demo.hie_graph,
+}
+
+
+def run_once(graph, state: Dict[str, Any], recursion_limit: int):
+    """Una ejecución: (hops, llegó al límite de recursión, camino recorrido)."""
+    path: List[str] = []
+    try:
+        # stream_mode="updates" emite un evento por nodo ejecutado (aunque no devuelva estado)
+        for update in graph.stream(state, config={"recursion_limit": recursion_limit}, stream_mode="updates"):
+            path.extend(update)
+    except GraphRecursionError:
+        return len(path), True, path
+    return len(path), False, path
+
+
+def simulate(graph, runs: int, seed: int, recursion_limit: int, state: Dict[str, Any]) -> Dict[str, Any]:
+    demo.seed_routing(seed)
+    hops, hits, paths = [], 0, []
+    start = time.perf_counter()
+    for _ in range(runs):
+        n, hit, path = run_once(graph, state, recursion_limit)
+        hops.append(n)
+        hits += hit
+        paths.append(tuple(path))
+    seconds = time.perf_counter() - start
+    return {
+        "runs": runs,
+        "hops": np.asarray(hops),
+        "recursion_hits": hits,
+        "seconds": seconds,
+        "us_per_hop": 1e6 * seconds / max(sum(hops), 1),
+        "paths": paths,
+    }
+
+
+def state_with(messages: int, words: int = 50) -> Dict[str, Any]:
+    text = " ".join(["palabra"] * words)
+    return {"messages": [HumanMessage(f"{i}: {text}", id=str(i)) for i in range(messages)]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recursion-limit", type=int, default=25)
+    parser.add_argument("--state-sizes", type=int, nargs="+", default=[0, 10, 100, 1000])
+    parser.add_argument("--state-runs", type=int, default=200, help="ejecuciones del pipeline por tamaño de estado")
+    args = parser.parse_args()
+
+    # Los prints de los agentes van a /dev/null: miden lo mismo sin inundar la terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = {
+            name: simulate(graph, args.runs, args.seed, args.recursion_limit, {"messages": []})
+            for name, graph in TOPOLOGIES.items()
+        }
+        replay = simulate(demo.hie_graph, min(args.runs, 200), args.seed, args.recursion_limit, {"messages": []})
+        by_size = {
+            size: simulate(demo.graph, args.state_runs, args.seed, args.recursion_limit, state_with(size))
+            for size in args.state_sizes
+        }
+
+    print(f"{'topología':<14}{'hops/run':>10}{'p50':>6}{'p99':>6}{'máx':>6}{'µs/hop':>10}{'wall (s)':>10}{'límite':>8}")
+    for name, r in results.items():
+        hops = r["hops"]
+        print(
+            f"{name:<14}{hops.mean():>10.2f}{np.percentile(hops, 50):>6.0f}{np.percentile(hops, 99):>6.0f}"
+            f"{hops.max():>6}{r['us_per_hop']:>10.1f}{r['seconds']:>10.2f}{r['recursion_hits']:>8}"
+        )
+    # Misma semilla, mismos caminos
+    same = replay["paths"] == results["hierarchical"]["paths"][: len(replay["paths"])]
+    print(f"reproducible con --seed {args.seed}: {same}")
+
+    print(f"\n{'mensajes':>9}{'µs/hop':>10}  (pipeline, 3 hops)")
+    for size, r in by_size.items():
+        print(f"{size:>9}{r['us_per_hop']:>10.1f}")
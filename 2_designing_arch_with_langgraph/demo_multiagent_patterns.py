@@ -6,9 +6,17 @@ from langchain_core.runnables.graph import MermaidDrawMethod
 from langgraph.graph import START, END, StateGraph
 from langgraph.graph.message import MessagesState
 from langgraph.types import Command
+from graph_diagrams import GraphDiagram
 
 nest_asyncio.apply()
 
+# Todas las decisiones de enrutado salen de este generador; seed_routing lo fija para
+# poder reproducir (y medir) una ejecución
+rng= random.Random()
+
+def seed_routing(seed: int):
+    rng.seed(seed)
+
 # 1 Peer-to-Peer
 
 
@@ -40,7 +48,7 @@ workflow.add_edge("l3_agent", END)
 
 graph= workflow.compile()
 
-workflow_png= graph.get_graph().draw_mermaid_png()
+workflow_png= GraphDiagram(graph)
 
 
 
@@ -48,13 +56,13 @@ workflow_png= graph.get_graph().draw_mermaid_png()
 
 def l1_agent(state: MessagesState)-> Command[Literal["l2_agent", "l3_agent", END]]:
     print(f"started with l1_agent")
-    next_node= random.choice(["l2_agent", "l3_agent", END])
+    next_node= rng.choice(["l2_agent", "l3_agent", END])
     print(f"handed off to {next_node}")
 
     return Command(goto= next_node)
 
 def l2_agent(state: MessagesState) -> Command[Literal["l1_agent", "l3_agent", END]]:
-    next_node = random.choice(["l1_agent", "l3_agent", END])
+    next_node = rng.choice(["l1_agent", "l3_agent", END])
     print(f"handed off to {next_node}")
 
     return Command(
@@ -62,7 +70,7 @@ def l2_agent(state: MessagesState) -> Command[Literal["l1_agent", "l3_agent", EN
     )
 
 def l3_agent(state: MessagesState) -> Command[Literal["l1_agent", "l2_agent", END]]:
-    next_node = random.choice(["l1_agent", "l2_agent", END])
+    next_node = rng.choice(["l1_agent", "l2_agent", END])
     print(f"handed off to {next_node}")
     return Command(
         goto=next_node,
@@ -77,14 +85,14 @@ workflow.add_edge(START, "l1_agent")
 
 complex_graph = workflow.compile()
 
-complex_workflow_png= complex_graph.get_graph().draw_mermaid_png()
+complex_workflow_png= GraphDiagram(complex_graph)
 
 # 2. Orquestador
 
   # 2.1. Supervisor
 
 def supervisor(state: MessagesState)-> Command[Literal["l1s_agent", "l2s_agent", END]]:
-    next_node= random.choice(["l1s_agent", "l2s_agent", END])
+    next_node= rng.choice(["l1s_agent", "l2s_agent", END])
     print(f"supervisor handed off to {next_node}")
     return Command(goto=next_node)
 
@@ -110,17 +118,17 @@ supervisor_workflow.add_node(l2s_agent)
 supervisor_workflow.add_edge(START, "supervisor")
 
 supervisor_graph= supervisor_workflow.compile()
-supervisor_workflow_png= supervisor_graph.get_graph().draw_mermaid_png()
+supervisor_workflow_png= GraphDiagram(supervisor_graph)
 
   # 2.2. Hierarchial
 
 def l1h_agent(state: MessagesState)-> Command[Literal["l2h_agent", "l3h_agent", END]]:
-    next_node= random.choice(["l2h_agent", "l3h_agent", END])
+    next_node= rng.choice(["l2h_agent", "l3h_agent", END])
     print(f"l1h_agent handed off to {next_node}")
     return Command(goto=next_node)
 
 def l2h_agent(state: MessagesState) -> Command[Literal["l4h_agent", "l5h_agent", "l1h_agent"]]:
-    next_node = random.choice(["l1h_agent", "l4h_agent", "l5h_agent"])
+    next_node = rng.choice(["l1h_agent", "l4h_agent", "l5h_agent"])
     print(f"l2h_agent handed off to {next_node}")
     return Command(
         goto=next_node
@@ -157,6 +165,7 @@ hie_workflow.add_node(l5h_agent)
 hie_workflow.add_edge(START, "l1h_agent")
 
 hie_graph= hie_workflow.compile()
-hie_workflow_png= hie_graph.get_graph().draw_mermaid_png()
+hie_workflow_png= GraphDiagram(hie_graph)
 
-hie_graph.invoke(input={})
\ No newline at end of file
+if __name__ == "__main__":
+    hie_graph.invoke(input={})
\ No newline at end of file
@@ -1,29 +1,90 @@
 from typing import Literal
+import asyncio
 import random
+import time
 import nest_asyncio
 from IPython.display import Image, display
 from langchain_core.runnables.graph import MermaidDrawMethod
 from langgraph.graph import START, END, StateGraph
 from langgraph.graph.message import MessagesState
 from langgraph.types import Command
+from graph_diagrams import GraphDiagram
+from retry_budget import RetryPolicy
+from availability import AvailabilityEngine
+from patient_registry import PatientRegistry
 
 nest_asyncio.apply()
 
+# Decisiones simuladas de los agentes; seed_routing las hace reproducibles
+rng= random.Random()
+
+def seed_routing(seed: int):
+    rng.seed(seed)
+
+# Latencia simulada de cada agente (segundos), para medir el workflow de punta a punta
+AGENT_DELAYS= {
+    "doctor_availability_agent": 0.0,
+    "patient_verification_agent": 0.0,
+    "scheduling_agent": 0.0,
+    "notification_agent": 0.0,
+}
+
+# Disponibilidad del doctor y verificación del paciente no dependen entre sí: se lanzan a la vez
+PARALLEL_CHECKS= True
+
+# Reintentos por agente, backoff con jitter y deadline del workflow; None = reintentar sin límite.
+# Los agentes simulados fallan la mitad de las veces: con 4 intentos se abandonaba ~1 reserva de cada 4
+RETRY_POLICY= RetryPolicy(max_attempts= 6, base_delay= 0.05, max_delay= 1.0, deadline= 5.0)
+
+# Calendarios reales de los doctores; None = disponibilidad y reserva simuladas con rng
+AVAILABILITY: AvailabilityEngine | None= None
+
+# Registro de pacientes; None = verificación simulada con rng
+PATIENT_REGISTRY: PatientRegistry | None= None
+
+def simulate_work(agent: str):
+    if AGENT_DELAYS.get(agent):
+        time.sleep(AGENT_DELAYS[agent])
+
 class State(MessagesState): 
     doctor_available: bool
     patient_verified: bool
     appointment_scheduled: bool
     notification_sent: bool
+    attempts: dict      # intentos lanzados por agente
+    started_at: float   # time.monotonic() del primer paso
+    outcome: str        # "booked" o "gave_up"
+    gave_up: dict       # paso, motivo ("retry_budget" o "deadline"), intentos y segundos
+    specialty: str      # especialidad pedida (con AVAILABILITY)
+    requested_after: int  # primer minuto aceptable para la cita
+    slot: tuple         # (inicio, doctor) del hueco encontrado
+    patient_id: str     # paciente a verificar (con PATIENT_REGISTRY)
 
-def appointment_coordinator(state: State)-> Command[Literal["doctor_availability_agent", "patient_verification_agent", "scheduling_agent", "notification_agent", END]]:
-    """Supervisor que orquesta el flujo de la acción del agente de citas"""
+async def appointment_coordinator(state: State)-> Command[Literal["doctor_availability_agent", "patient_verification_agent", "scheduling_agent", "notification_agent", END]]:
+    """Supervisor que orquesta el flujo de la acción del agente de citas.
+
+    Es asíncrono para que el backoff de RETRY_POLICY sea un `asyncio.sleep` y no bloquee un hilo
+    del executor; el grafo se corre con `graph.ainvoke`/`graph.astream` (los agentes van en el executor).
+    """
+
+    started_at= state.get("started_at") or time.monotonic()
+    attempts= dict(state.get("attempts") or {})
 
     # Chequea el estado actual para determinar el siguiente paso
-    if not state["doctor_available"]:
-        next_step= "doctor_availability_agent"
-        print(f"Routing to {next_step}")
-    elif not state["patient_verified"]:
-        next_step= "patient_verification_agent"
+    pending_checks= [
+        agent for agent, done in (
+            ("doctor_availability_agent", state["doctor_available"]),
+            ("patient_verification_agent", state["patient_verified"]),
+        )
+        if not done
+    ]
+    if pending_checks and PARALLEL_CHECKS:
+        # Fan-out: sólo se reintentan las comprobaciones que fallaron; el coordinador
+        # vuelve a ejecutarse una vez, cuando han terminado todas (join)
+        next_step= pending_checks
+        print(f"Routing to {', '.join(next_step)} in parallel")
+    elif pending_checks:
+        next_step= pending_checks[0]
         print(f"Routing to {next_step}")
     elif not state["appointment_scheduled"]:
         next_step= "scheduling_agent"
@@ -32,30 +93,57 @@ def appointment_coordinator(state: State)-> Command[Literal["doctor_availability
         next_step= "notification_agent"
         print(f"Routing to {next_step}")
     else:
-        next_step= END
         print(f"✅ Workflow complete, ending...")
-    
-    return Command(goto=next_step)
+        return Command(goto=END, update={"outcome": "booked", "started_at": started_at})
+
+    steps= next_step if isinstance(next_step, list) else [next_step]
+    if RETRY_POLICY is not None:
+        # Antes de reintentar: ¿queda presupuesto y tiempo? Si no, se abandona con un resultado estructurado
+        elapsed= time.monotonic() - started_at
+        wait= max(RETRY_POLICY.backoff(attempts.get(step, 0), rng) for step in steps)
+        for step in steps:
+            gave_up= RETRY_POLICY.give_up(step, attempts.get(step, 0), elapsed, wait)
+            if gave_up is not None:
+                print(f"⛔ Giving up on {step}: {gave_up['reason']}")
+                return Command(goto=END, update={"outcome": "gave_up", "gave_up": gave_up, "started_at": started_at})
+        if wait:
+            await asyncio.sleep(wait)
+    for step in steps:
+        attempts[step]= attempts.get(step, 0) + 1
+
+    return Command(goto=next_step, update={"attempts": attempts, "started_at": started_at})
 
 def doctor_availability_agent(state: State)->Command[Literal["appointment_coordinator"]]:
     """Checks doctor availability and schedules"""
     print("👨‍⚕️ Doctor Availability Agent: Checking schedules...")
 
     # Simula chequear la disponibilidad del doctor
-    available= random.choice([True, False])
+    simulate_work("doctor_availability_agent")
+    update= {}
+    if AVAILABILITY is not None and state.get("specialty"):
+        # Primer hueco libre de la especialidad desde la hora pedida (bisect en el calendario)
+        slot= AVAILABILITY.earliest(state["specialty"], state.get("requested_after", 0))
+        available= slot is not None
+        update["slot"]= slot
+    else:
+        available= rng.choice([True, False])
     if available:
         print("✅ Doctor is available for requested time")
     else:
         print("❌ Doctor not available, suggesting alternatives")
     
-    return Command(goto= "appointment_coordinator", update={"doctor_available": available})
+    return Command(goto= "appointment_coordinator", update={"doctor_available": available, **update})
 
 def patient_verification_agent(state: State) -> Command[Literal["appointment_coordinator"]]:
     """Verifies patient identity and eligibility"""
     print("🆔 Patient Verification Agent: Verifying patient...")
     
     # Simulate patient verification
-    verified = random.choice([True, False])
+    simulate_work("patient_verification_agent")
+    if PATIENT_REGISTRY is not None and state.get("patient_id"):
+        verified = PATIENT_REGISTRY.verify(state["patient_id"])
+    else:
+        verified = rng.choice([True, False])
     if verified:
         print("✅ Patient verified and eligible")
     else:
@@ -71,7 +159,16 @@ def scheduling_agent(state: State) -> Command[Literal["appointment_coordinator"]
     print("📅 Scheduling Agent: Booking appointment...")
     
     # Simulate appointment booking
-    booked = random.choice([True, False])
+    simulate_work("scheduling_agent")
+    update = {}
+    if AVAILABILITY is not None and state.get("slot"):
+        # Reserva atómica: si otra reserva se llevó el hueco, hay que volver a buscar uno
+        start, doctor = state["slot"]
+        booked = AVAILABILITY.book(doctor, start)
+        if not booked:
+            update = {"doctor_available": False, "slot": None}
+    else:
+        booked = rng.choice([True, False])
     if booked:
         print("✅ Appointment successfully booked")
     else:
@@ -79,7 +176,7 @@ def scheduling_agent(state: State) -> Command[Literal["appointment_coordinator"]
     
     return Command(
         goto="appointment_coordinator",
-        update={"appointment_scheduled": booked}
+        update={"appointment_scheduled": booked, **update}
     )
 
 def notification_agent(state: State) -> Command[Literal["appointment_coordinator"]]:
@@ -87,7 +184,8 @@ def notification_agent(state: State) -> Command[Literal["appointment_coordinator
     print("📢 Notification Agent: Sending notifications...")
     
     # Simulate sending notifications
-    notification_sent = random.choice([True, False])
+    simulate_work("notification_agent")
+    notification_sent = rng.choice([True, False])
     if notification_sent:
         print("✅ Notifications sent successfully")
     else:
@@ -110,16 +208,17 @@ workflow.add_edge(START, "appointment_coordinator")
 
 graph= workflow.compile()
 
-multi_agent_workflow_png= graph.get_graph().draw_mermaid_png()
+multi_agent_workflow_png= GraphDiagram(graph)
 
 # Testear el workflow
 
-print("Testing Healthcare Appointment System")
-result= graph.invoke(input={
-    "doctor_available":False,
-    "patient_verified": False,
-    "appointment_scheduled": False,
-    "notification_sent": False
-})
+if __name__ == "__main__":
+    print("Testing Healthcare Appointment System")
+    result= asyncio.run(graph.ainvoke(input={
+        "doctor_available":False,
+        "patient_verified": False,
+        "appointment_scheduled": False,
+        "notification_sent": False
+    }))
 
-print("✅ Workflow execution completed!")
\ No newline at end of file
+    print(f"✅ Workflow execution completed! outcome={result.get('outcome')} {result.get('gave_up', '')}")
\ No newline at end of file
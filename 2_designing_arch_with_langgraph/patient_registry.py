@@ -0,0 +1,272 @@
+"""Registro de pacientes en SQLite con filtro de Bloom delante, búsquedas por lotes y LRU.
+
+`patient_verification_agent` verificaba con una moneda. `PatientRegistry` responde contra
+un registro de millones de pacientes:
+
+- un filtro de Bloom en memoria descarta los identificadores que no existen sin tocar la
+  base (la mayoría de verificaciones fallidas),
+- los que pasan el filtro se buscan en SQLite por la clave primaria, de 500 en 500 con
+  `verify_many`,
+- un LRU guarda los pacientes verificados hace poco.
+
+El filtro se guarda en la propia base al cerrar y se reconstruye si no cuadra con la tabla
+o si se llena: al pasar de la capacidad para la que se dimensionó, se rehace con el doble
+de los pacientes que hay, para que los falsos positivos no se disparen.
+
+    registry = PatientRegistry("patients.db")
+    registry.add_patients([("P000000001", True), ("P000000002", False)])
+    registry.verify("P000000001")   # True
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class BloomFilter:
+    """Filtro de Bloom con doble hashing (blake2b de 128 bits partido en dos enteros de 64).
+
+    Args:
+        capacity: elementos previstos.
+        error_rate: tasa de falsos positivos objetivo con `capacity` elementos.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    @classmethod
+    def from_bytes(cls, size: int, hashes: int, count: int, bits: bytes, error_rate: float = 0.01) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count = size, hashes, count
+        # La capacidad para la que se dimensionó, despejada de la fórmula de `size`
+        bloom.capacity = max(1, round(size * math.log(2) ** 2 / -math.log(error_rate)))
+        bloom.bits = np.frombuffer(bits, dtype=np.uint8).copy()
+        return bloom
+
+    @staticmethod
+    def _digests(keys: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        raw = b"".join(hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest() for key in keys)
+        pairs = np.frombuffer(raw, dtype=np.uint64).reshape(-1, 2)
+        # h2 impar: así los k índices no se repiten aunque size sea par
+        return pairs[:, 0], pairs[:, 1] | np.uint64(1)
+
+    def _positions(self, keys: List[str]) -> np.ndarray:
+        h1, h2 = self._digests(keys)
+        i = np.arange(self.hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.size)
+
+    def add_many(self, keys: List[str], chunk: int = 100_000) -> None:
+        for start in range(0, len(keys), chunk):
+            positions = self._positions(keys[start : start + chunk]).ravel()
+            masks = (np.uint64(1) << (positions & np.uint64(7))).astype(np.uint8)
+            np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64), masks)
+        self.count += len(keys)
+
+    def contains_many(self, keys: List[str]) -> np.ndarray:
+        """Máscara booleana: False = seguro que no está; True = probablemente está."""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        bytes_ = self.bits[(positions >> np.uint64(3)).astype(np.int64)]
+        return ((bytes_ >> (positions & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+
+    def __contains__(self, key: str) -> bool:
+        # Una sola clave en Python puro: numpy sólo compensa a partir de lotes
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits.data
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % 2**64 % self.size
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+
+class PatientRegistry:
+    """Registro de pacientes (id, elegible) con Bloom + lotes en SQLite + LRU.
+
+    Args:
+        path: fichero SQLite del registro.
+        capacity: pacientes previstos, para dimensionar el filtro de Bloom (crece si se supera).
+        error_rate: falsos positivos del filtro (cada uno cuesta una consulta a SQLite).
+        cache_size: pacientes verificados que guarda el LRU.
+    """
+
+    def __init__(self, path: str, *, capacity: int = 1_000_000, error_rate: float = 0.01, cache_size: int = 100_000) -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS patients (
+                patient_id TEXT PRIMARY KEY,
+                eligible INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS patients_bloom (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                size INTEGER NOT NULL,
+                hashes INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                bits BLOB NOT NULL
+            );
+            """
+        )
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.cache_size = cache_size
+        self.stats: Dict[str, int] = {
+            "lru_hits": 0, "bloom_negatives": 0, "db_lookups": 0, "false_positives": 0, "bloom_rebuilds": 0
+        }
+        self._cache: "OrderedDict[str, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bloom = self._load_bloom()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM patients").fetchone()[0]
+
+    def close(self) -> None:
+        self.save_bloom()
+        self.conn.close()
+
+    # FILTRO DE BLOOM
+
+    def _load_bloom(self) -> BloomFilter:
+        row = self.conn.execute("SELECT size, hashes, count, bits FROM patients_bloom WHERE id = 0").fetchone()
+        rows = len(self)
+        if row is not None and row[2] == rows:
+            bloom = BloomFilter.from_bytes(*row, error_rate=self.error_rate)
+            if bloom.count <= bloom.capacity:
+                return bloom
+        # Sin filtro guardado, desfasado (otro proceso escribió) o lleno: se reconstruye desde la tabla
+        return self._build_bloom(rows)
+
+    def _build_bloom(self, rows: int) -> BloomFilter:
+        bloom = BloomFilter(max(self.capacity, 2 * rows), self.error_rate)
+        cur = self.conn.execute("SELECT patient_id FROM patients")
+        while batch := cur.fetchmany(100_000):
+            bloom.add_many([patient_id for (patient_id,) in batch])
+        return bloom
+
+    def save_bloom(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO patients_bloom (id, size, hashes, count, bits) VALUES (0, ?, ?, ?, ?)",
+                (self.bloom.size, self.bloom.hashes, len(self), self.bloom.bits.tobytes()),
+            )
+
+    # ALTAS
+
+    def add_patients(self, patients: Iterable[Tuple[str, bool]], chunk: int = 100_000) -> int:
+        """Inserta o actualiza pacientes (id, elegible). Devuelve cuántos se han escrito."""
+        written = 0
+        batch: List[Tuple[str, int]] = []
+        for patient_id, eligible in patients:
+            batch.append((patient_id, int(eligible)))
+            if len(batch) >= chunk:
+                written += self._write(batch)
+                batch = []
+        if batch:
+            written += self._write(batch)
+        return written
+
+    def _new_ids(self, patient_ids: List[str], chunk: int = 500) -> List[str]:
+        """Los ids que aún no están en la tabla: el filtro descarta casi todos sin consultar."""
+        maybe = [pid for pid, hit in zip(patient_ids, self.bloom.contains_many(patient_ids)) if hit]
+        existing = set()
+        for start in range(0, len(maybe), chunk):
+            ids = maybe[start : start + chunk]
+            existing.update(
+                patient_id
+                for (patient_id,) in self.conn.execute(
+                    f"SELECT patient_id FROM patients WHERE patient_id IN ({','.join('?' * len(ids))})", ids
+                )
+            )
+        return [pid for pid in patient_ids if pid not in existing]
+
+    def _write(self, batch: List[Tuple[str, int]]) -> int:
+        with self._lock:
+            # Las actualizaciones de pacientes que ya existen no cuentan para llenar el filtro
+            new = self._new_ids(list(dict.fromkeys(patient_id for patient_id, _ in batch)))
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO patients (patient_id, eligible) VALUES (?, ?)", batch)
+            self.bloom.add_many(new)
+            if self.bloom.count > self.bloom.capacity:
+                # Lleno: se rehace al doble de tamaño (el coste se amortiza como al crecer una lista)
+                self.bloom = self._build_bloom(len(self))
+                self.stats["bloom_rebuilds"] += 1
+            for patient_id, _ in batch:
+                self._cache.pop(patient_id, None)
+        return len(batch)
+
+    # VERIFICACIÓN
+
+    def _remember(self, patient_id: str, eligible: bool) -> None:
+        self._cache[patient_id] = eligible
+        self._cache.move_to_end(patient_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def verify(self, patient_id: str) -> bool:
+        """True si el paciente existe y es elegible."""
+        with self._lock:
+            cached = self._cache.get(patient_id)
+            if cached is not None:
+                self._cache.move_to_end(patient_id)
+                self.stats["lru_hits"] += 1
+                return cached
+            if patient_id not in self.bloom:
+                self.stats["bloom_negatives"] += 1
+                return False
+            row = self.conn.execute("SELECT eligible FROM patients WHERE patient_id = ?", (patient_id,)).fetchone()
+            self.stats["db_lookups"] += 1
+            if row is None:
+                self.stats["false_positives"] += 1
+                return False
+            self._remember(patient_id, bool(row[0]))
+            return bool(row[0])
+
+    def verify_many(self, patient_ids: List[str], chunk: int = 500) -> Dict[str, bool]:
+        """Verifica un lote: LRU, después Bloom, y una consulta IN (...) por cada `chunk` que queda."""
+        results: Dict[str, bool] = {}
+        with self._lock:
+            pending = []
+            for patient_id in dict.fromkeys(patient_ids):
+                cached = self._cache.get(patient_id)
+                if cached is not None:
+                    self._cache.move_to_end(patient_id)
+                    results[patient_id] = cached
+                    self.stats["lru_hits"] += 1
+                else:
+                    pending.append(patient_id)
+            maybe = [pid for pid, hit in zip(pending, self.bloom.contains_many(pending)) if hit]
+            self.stats["bloom_negatives"] += len(pending) - len(maybe)
+            for patient_id in pending:
+                results[patient_id] = False
+            for start in range(0, len(maybe), chunk):
+                ids = maybe[start : start + chunk]
+                found = dict(
+                    self.conn.execute(
+                        f"SELECT patient_id, eligible FROM patients WHERE patient_id IN ({','.join('?' * len(ids))})", ids
+                    ).fetchall()
+                )
+                self.stats["db_lookups"] += 1
+                self.stats["false_positives"] += len(ids) - len(found)
+                for patient_id, eligible in found.items():
+                    results[patient_id] = bool(eligible)
+                    self._remember(patient_id, bool(eligible))
+        return results
+
+    def lookup(self, patient_id: str) -> Optional[bool]:
+        """Sin Bloom ni caché: la consulta directa (para comparar). None si no existe."""
+        row = self.conn.execute("SELECT eligible FROM patients WHERE patient_id = ?", (patient_id,)).fetchone()
+        return None if row is None else bool(row[0])
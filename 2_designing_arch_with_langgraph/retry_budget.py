@@ -0,0 +1,56 @@
+"""Presupuesto de reintentos, backoff exponencial con jitter y deadline para un supervisor.
+
+Sin límite, un supervisor que reenvía a cualquier agente que haya fallado puede dar vueltas
+hasta el recursion_limit de LangGraph, y la latencia de cola no tiene techo. `RetryPolicy`
+decide, antes de cada reintento, si todavía se puede reintentar (intentos por paso y tiempo
+restante) y cuánto esperar; si no, el supervisor termina con un resultado "gave_up".
+
+`base_delay` y `max_delay` tienen que ir en proporción a lo que tarda un agente: cada espera
+se suma a la latencia de la reserva, y un backoff varias veces mayor que el propio agente
+domina la p50 (ver bench_retry_budget.py). `max_attempts` fija cuántas reservas se abandonan
+cuando un paso falla a menudo: con fallos al 50%, 1/2^max_attempts por paso.
+
+    policy = RetryPolicy(max_attempts=4, base_delay=0.05, max_delay=1.0, deadline=5.0)
+"""
+import random
+from typing import Any, Dict, Optional
+
+
+class RetryPolicy:
+    """Reintentos por paso con backoff exponencial ("full jitter") y un deadline global.
+
+    Args:
+        max_attempts: intentos por paso, contando el primero.
+        base_delay: espera antes del primer reintento (segundos, antes del jitter).
+        max_delay: techo de la espera entre reintentos.
+        deadline: segundos totales para el workflow; None = sin deadline.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.05,
+        max_delay: float = 1.0,
+        deadline: Optional[float] = 5.0,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempts: int, rng: random.Random) -> float:
+        """Espera antes del intento `attempts + 1`: uniforme en [0, min(max_delay, base * 2^(attempts-1))]."""
+        if attempts <= 0:
+            return 0.0
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempts - 1)))
+
+    def give_up(self, step: str, attempts: int, elapsed: float, wait: float) -> Optional[Dict[str, Any]]:
+        """None si `step` se puede (re)intentar tras esperar `wait`; si no, el motivo estructurado."""
+        reason = None
+        if attempts >= self.max_attempts:
+            reason = "retry_budget"
+        elif self.deadline is not None and elapsed + wait >= self.deadline:
+            reason = "deadline"
+        if reason is None:
+            return None
+        return {"step": step, "reason": reason, "attempts": attempts, "elapsed": round(elapsed, 3)}
@@ -0,0 +1,66 @@
+"""Tiempo de la etapa de investigación: el bucle del researcher_agent vs. una búsqueda por sección en paralelo.
+
+Los dos modos lanzan las mismas consultas, una por sección: el researcher_agent (el guion
+de `LocalBackends`) las hace de una en una, un turno del LLM por consulta.
+
+La búsqueda es el servidor de `LocalBackends`, con `--search-latency` segundos por consulta
+(más hasta `--search-jitter`, distinto en cada consulta). Con las consultas en serie la
+etapa tarda la suma de todas; en paralelo, lo que tarda la más lenta de cada tanda de
+`--concurrency`.
+
+    python bench_research.py --search-latency 0.5 --search-jitter 0.3 --concurrency 1 4 7
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+from langchain_core.messages import HumanMessage
+
+from local_backends import LocalBackends
+
+TOPIC = "Kingdom Hearts 2"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--search-jitter", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="segundos por llamada al LLM del researcher_agent")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 7])
+    args = parser.parse_args()
+
+    with LocalBackends(llm_latency=args.llm_latency, search_latency=args.search_latency, search_jitter=args.search_jitter) as backends:
+        os.environ.update(backends.environ(), SEARCH_CACHE="off")
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            import exercise_multiagent_with_langgraph as blog
+
+            outline = blog.outline_topic.invoke({"topic": TOPIC})
+            state = {"query": HumanMessage(content=f"I want a blog post about {TOPIC}"), "topic": TOPIC, "sections": outline["sections"]}
+
+            blog.PARALLEL_RESEARCH = False
+            before = dict(backends.stats)
+            start = time.perf_counter()
+            agent = asyncio.run(blog.research_node(state))
+            agent_wall = time.perf_counter() - start
+            agent_searches = backends.stats["searches"] - before["searches"]
+            agent_calls = backends.stats["completions"] - before["completions"]
+
+            queries = blog.section_queries(TOPIC, outline["sections"])
+            rows = []
+            blog.PARALLEL_RESEARCH = True
+            for concurrency in args.concurrency:
+                blog.RESEARCH_CONCURRENCY = concurrency
+                results, report = asyncio.run(blog.search_sections(queries))
+                start = time.perf_counter()
+                update = asyncio.run(blog.research_node(state))
+                rows.append((concurrency, report, len(results), len(update["research"]), time.perf_counter() - start))
+
+    print(f"{'modo':<26}{'consultas':>10}{'LLM':>5}{'resultados':>11}{'únicos':>8}{'suma (s)':>10}{'máx (s)':>9}{'etapa (s)':>11}")
+    print(f"{'researcher_agent':<26}{agent_searches:>10}{agent_calls:>5}{'':>11}{len(agent['research']):>8}{'':>10}{'':>9}{agent_wall:>11.2f}")
+    for concurrency, report, found, unique, wall in rows:
+        print(
+            f"{f'por sección, {concurrency} a la vez':<26}{report['queries']:>10}{0:>5}{found:>11}{unique:>8}"
+            f"{report['sum']:>10.2f}{report['max']:>9.2f}{wall:>11.2f}"
+        )
@@ -0,0 +1,91 @@
+"""Sesión del reviewer: las tools de revisión con su propio parseo vs. el MarkdownDocument compartido.
+
+Simula `--revisions` revisiones de un borrador de `--words` palabras (cada una cambia un
+párrafo) en las que el reviewer llama `--calls` veces a markdown_lint, seo_score y
+estimate_read_time. Compara con las versiones anteriores de las tools, que se copian
+aquí como referencia (seo_score ya con el matcher compilado, pero parseando en cada
+llamada), y comprueba que devuelven lo mismo. El lint de notas al pie ahora nombra los
+marcadores sin definición en vez de buscar '[^' y ']: ' en el texto; en este borrador todas
+las notas están definidas, así que las dos versiones coinciden.
+
+    python bench_review_tools.py --words 5000 --revisions 5 --calls 3
+"""
+import argparse
+import contextlib
+import os
+import random
+import re
+import time
+
+from bench_seo_score import make_document
+from keyword_matcher import keyword_matcher
+from markdown_model import DOCUMENTS, MarkdownDocument
+
+os.environ.setdefault("OPENAI_API_KEY", "local")
+os.environ.setdefault("SEARCH_CACHE", "off")
+
+
+def old_lint(md: str):
+    issues = []
+    if not md.strip().startswith("# "):
+        issues.append("Missing H1 title at the very top (use '# Title').")
+    if "[^" in md and "]: " not in md:
+        issues.append("Footnote marker used but no footnote definitions present.")
+    for idx, para in enumerate([p for p in md.split("\n\n") if p.strip()], start=1):
+        if len(para) > 1200:
+            issues.append(f"Paragraph {idx} is very long; consider splitting.")
+    return {"ok": len(issues) == 0, "issues": issues}
+
+
+def old_read_time(markdown_text: str, wpm: int = 225):
+    wc = len(re.findall(r"\b\w+\b", markdown_text or ""))
+    return {"word_count": wc, "minutes": max(1, round(wc / max(100, wpm)))}
+
+
+def old_seo(md: str, keywords):
+    # El matcher compilado, pero parseando el documento en cada llamada
+    hits = keyword_matcher(tuple(keywords)).hits(MarkdownDocument(md))
+    score = min(100, hits["title_hits"] * 20 + hits["heading_hits"] * 6 + hits["body_hits"] * 2)
+    return {"score": score, **hits, "keywords_checked": keywords[:]}
+
+
+def session(lint, seo, read_time, drafts, keywords, calls: int):
+    outputs = []
+    start = time.perf_counter()
+    for md in drafts:
+        for _ in range(calls):
+            outputs.append((lint(md), seo(md, keywords), read_time(md)))
+    return time.perf_counter() - start, outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--revisions", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=3, help="llamadas a cada tool por revisión")
+    parser.add_argument("--keywords", type=int, default=12)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import exercise_multiagent_with_langgraph as blog
+
+    rng = random.Random(0)
+    md, vocabulary = make_document(args.words, 250, rng)
+    md += "\n\nSee the docs[^1].\n\n## References\n\n[^1]: Docs — https://example.org"
+    keywords = md.splitlines()[0][2:].lower().split()[:2] + rng.sample(vocabulary, args.keywords - 2)
+    drafts = [md]
+    for _ in range(args.revisions - 1):
+        paragraphs = drafts[-1].split("\n\n")
+        i = rng.randrange(1, len(paragraphs))
+        paragraphs[i] += " " + " ".join(rng.choices(vocabulary, k=10))
+        drafts.append("\n\n".join(paragraphs))
+
+    before, expected = session(old_lint, old_seo, old_read_time, drafts, keywords, args.calls)
+    after, got = session(blog.markdown_lint.func, blog.seo_score.func, blog.estimate_read_time.func, drafts, keywords, args.calls)
+
+    tool_calls = 3 * args.calls * len(drafts)
+    print(f"{len(drafts)} revisiones de {args.words:,} palabras, {tool_calls} llamadas a tools")
+    print(f"{'modo':<24}{'s en total':>11}{'ms/llamada':>12}{'parseos':>9}")
+    print(f"{'cada tool su parseo':<24}{before:>11.3f}{1e3 * before / tool_calls:>12.2f}{tool_calls:>9}")
+    print(f"{'documento compartido':<24}{after:>11.3f}{1e3 * after / tool_calls:>12.2f}{DOCUMENTS.stats['parses']:>9}")
+    print(f"x{before / after:.1f}, mismos resultados: {expected == got}")
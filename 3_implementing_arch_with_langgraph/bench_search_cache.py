@@ -0,0 +1,75 @@
+"""Regenerar posts sobre temas parecidos sin caché, con la caché en frío y con la caché reabierta de disco.
+
+Todo en local: el LLM es `LocalBackends` y la búsqueda `FakeTavilyClient`
+(`SEARCH_BACKEND=fake`) con `--search-latency` segundos por consulta. Los temas repiten
+el mismo asunto con otras mayúsculas y espacios, que la clave normalizada hace coincidir.
+Al final, `--threads` llamadas simultáneas a la misma consulta, para ver la coalescencia.
+
+    python bench_search_cache.py --search-latency 0.5 --llm-latency 0.05 --threads 16
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+
+from local_backends import FakeTavilyClient, LocalBackends
+from search_cache import CachedSearch, SearchCache
+
+TOPICS = ["Kingdom Hearts 2", "kingdom hearts 2", "Kingdom  Hearts 2", "Final Fantasy X", "final fantasy x", "KINGDOM HEARTS 2"]
+
+
+def regenerate(blog, cache):
+    """Un post por tema: (segundos por post, llamadas a la búsqueda)."""
+    blog.SEARCH_CACHE = cache
+    before = FakeTavilyClient.total_calls
+    start = time.perf_counter()
+    for topic in TOPICS:
+        asyncio.run(blog.graph.ainvoke(input={"query": HumanMessage(content=f"I want a blog post about {topic}")}))
+    return (time.perf_counter() - start) / len(TOPICS), FakeTavilyClient.total_calls - before
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with LocalBackends(llm_latency=args.llm_latency) as backends, tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search_cache.db")
+        os.environ.update(
+            backends.environ(), SEARCH_BACKEND="fake", FAKE_SEARCH_LATENCY=str(args.search_latency), SEARCH_CACHE="off"
+        )
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            import exercise_multiagent_with_langgraph as blog
+
+            rows = [("sin caché", *regenerate(blog, None))]
+            cache = SearchCache(path)
+            rows.append(("caché en frío", *regenerate(blog, cache)))
+            stats = dict(cache.stats)
+            cache.close()
+            cache = SearchCache(path)
+            rows.append(("caché reabierta", *regenerate(blog, cache)))
+            rows_on_disk = len(cache)
+
+        # Coalescencia: muchas llamadas a la vez a la misma consulta sin caché previa
+        coalescing = CachedSearch(FakeTavilyClient(latency=args.search_latency), SearchCache(":memory:"))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(lambda _: coalescing.search(query="kingdom hearts 2 news", max_results=5), range(args.threads)))
+        coalesced_wall = time.perf_counter() - start
+
+    print(f"{len(TOPICS)} posts, {args.search_latency:g}s por búsqueda, {args.llm_latency:g}s por llamada al LLM")
+    print(f"{'modo':<18}{'s/post':>8}{'búsquedas':>11}")
+    for name, seconds, searches in rows:
+        print(f"{name:<18}{seconds:>8.2f}{searches:>11}")
+    print(f"caché en frío: {stats['hits']} aciertos, {stats['misses']} fallos; filas en disco: {rows_on_disk}")
+    print(
+        f"coalescencia: {args.threads} llamadas simultáneas -> {coalescing.stats['backend_calls']} búsqueda "
+        f"({coalescing.stats['coalesced']} esperaron), {coalesced_wall:.2f} s"
+    )
@@ -0,0 +1,101 @@
+"""seo_score en borradores largos: una regex por palabra clave y encabezado vs. el matcher compilado.
+
+Genera documentos markdown de `--words` palabras con un encabezado cada `--section-words`
+palabras (de media) y `--keywords` palabras clave de 1 a 3 palabras: unas salen del
+título o del vocabulario del documento, otras no aparecen y otras llevan mayúsculas (que
+nunca casan, como antes). Comprueba que los recuentos son idénticos.
+
+    python bench_seo_score.py --words 50000 --keywords 500 --section-words 250 1000
+"""
+import argparse
+import random
+import re
+import time
+
+from keyword_matcher import KeywordMatcher
+from markdown_model import MarkdownDocument
+
+
+def regex_hits(md: str, keywords):
+    """Los recuentos como los calculaba seo_score antes (referencia)."""
+    text = md.lower()
+    title = ""
+    headings = []
+    for line in md.splitlines():
+        if line.startswith("# "):
+            title = line.lower()
+        if line.startswith("#"):
+            headings.append(line.lower())
+
+    def contains(k: str, hay: str) -> bool:
+        return re.search(rf"\b{re.escape(k)}\b", hay) is not None
+
+    return {
+        "title_hits": sum(1 for k in keywords if contains(k, title)),
+        "heading_hits": sum(1 for k in keywords if any(contains(k, h) for h in headings)),
+        "body_hits": sum(1 for k in keywords if contains(k, text)),
+    }
+
+
+def make_document(words: int, section_words: int, rng: random.Random):
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    lines = ["# " + " ".join(rng.choices(vocabulary, k=6)).title(), ""]
+    written = 0
+    while written < words:
+        if rng.random() < 50 / section_words:
+            lines += ["## " + " ".join(rng.choices(vocabulary, k=5)).capitalize(), ""]
+        n = rng.randint(20, 80)
+        lines += [" ".join(rng.choices(vocabulary, k=n)).capitalize() + ".", ""]
+        written += n
+    return "\n".join(lines), vocabulary
+
+
+def make_keywords(count: int, vocabulary, rng: random.Random):
+    keywords = []
+    for _ in range(count):
+        phrase = " ".join(rng.choices(vocabulary, k=rng.choice([1, 1, 2, 3])))
+        kind = rng.random()
+        if kind < 0.2:
+            phrase = phrase.upper()
+        elif kind < 0.4:
+            phrase += "-guide"
+        keywords.append(phrase)
+    return keywords
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=50_000)
+    parser.add_argument("--keywords", type=int, default=500)
+    parser.add_argument("--section-words", type=int, nargs="+", default=[250, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'palabras':>9}{'encabezados':>13}{'keywords':>10}{'regex (s)':>11}{'compilar (s)':>14}"
+        f"{'matcher (s)':>13}{'x':>6}  iguales"
+    )
+    for section_words in args.section_words:
+        rng = random.Random(section_words)
+        md, vocabulary = make_document(args.words, section_words, rng)
+        keywords = make_keywords(args.keywords, vocabulary, rng)
+        keywords[:3] = md.splitlines()[0][2:].lower().split()[:3]  # algunas en el título
+        headings = sum(1 for line in md.splitlines() if line.startswith("#"))
+
+        regex_seconds, expected = timed(lambda: regex_hits(md, keywords), args.repeat)
+        build_seconds, matcher = timed(lambda: KeywordMatcher(tuple(keywords)), args.repeat)
+        # Documento recién parseado en cada repetición: se mide también el parseo, sin la caché
+        scan_seconds, got = timed(lambda: matcher.hits(MarkdownDocument(md)), args.repeat)
+        print(
+            f"{args.words:>9,}{headings:>13}{len(keywords):>10}{regex_seconds:>11.3f}{build_seconds:>14.4f}"
+            f"{scan_seconds:>13.3f}{regex_seconds / scan_seconds:>6.0f}  {expected == got} {got}"
+        )
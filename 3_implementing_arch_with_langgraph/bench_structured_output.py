@@ -0,0 +1,64 @@
+"""Llamadas al LLM y latencia por post: parseo en una pasada vs. la llamada with_structured_output en cada nodo.
+
+Corre la pipeline completa contra `LocalBackends` (LLM guionizado y búsqueda locales, con
+latencia inyectada). Una fracción `--malformed` de las respuestas finales de los agentes
+trae una nota detrás del JSON, así que también se ve el coste del respaldo.
+
+    python bench_structured_output.py --runs 10 --llm-latency 0.2 --malformed 0.1
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+
+from local_backends import LocalBackends
+
+
+def bench(blog, backends: LocalBackends, single_pass: bool, runs: int):
+    """(segundos por post, llamadas al LLM por post, llamadas estructuradas por post, respaldos)."""
+    blog.STRUCTURED.single_pass = single_pass
+    blog.STRUCTURED.reset()
+    backends.rng.seed(0)
+    seconds, completions, structured = [], [], []
+    for _ in range(runs):
+        before = dict(backends.stats)
+        start = time.perf_counter()
+        asyncio.run(blog.graph.ainvoke(input={"query": HumanMessage(content="I want a blog post about Kingdom Hearts 2")}))
+        seconds.append(time.perf_counter() - start)
+        completions.append(backends.stats["completions"] - before["completions"])
+        structured.append(backends.stats["structured"] - before["structured"])
+    return np.asarray(seconds), np.asarray(completions), np.asarray(structured), int(blog.STRUCTURED.stats["fallback"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="segundos por llamada al LLM")
+    parser.add_argument("--malformed", type=float, default=0.1, help="fracción de JSON finales que no validan")
+    args = parser.parse_args()
+
+    with LocalBackends(llm_latency=args.llm_latency, malformed=args.malformed) as backends:
+        os.environ.update(backends.environ(), SEARCH_CACHE="off")
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            import exercise_multiagent_with_langgraph as blog
+
+            results = [
+                ("with_structured_output", *bench(blog, backends, False, args.runs)),
+                ("una pasada", *bench(blog, backends, True, args.runs)),
+            ]
+
+    print(f"{'modo':<24}{'llamadas/post':>14}{'estructuradas':>15}{'respaldos':>11}{'s/post':>9}{'s p50':>8}")
+    for name, seconds, completions, structured, fallbacks in results:
+        print(
+            f"{name:<24}{completions.mean():>14.1f}{structured.mean():>15.1f}{fallbacks if name == 'una pasada' else '-':>11}"
+            f"{seconds.mean():>9.2f}{np.percentile(seconds, 50):>8.2f}"
+        )
+    (_, before, calls_before, _, _), (_, after, calls_after, _, _) = results
+    print(
+        f"ahorro por post: {calls_before.mean() - calls_after.mean():.1f} llamadas al LLM, "
+        f"{before.mean() - after.mean():.2f} s ({100 * (1 - after.mean() / before.mean()):.0f}%)"
+    )
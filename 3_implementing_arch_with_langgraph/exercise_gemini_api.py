@@ -23,6 +23,7 @@ from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 from tavily import TavilyClient
 from langchain_google_genai import ChatGoogleGenerativeAI
+from graph_diagrams import GraphDiagram
 
 
 nest_asyncio.apply()
@@ -507,7 +508,7 @@ def intake_node(state: BlogState)-> BlogState:
 
 def research_node(state: BlogState)-> BlogState:
     print("Starting researcher agent...")
-    context_message= f"Research topic: {state["topic"]}\nSections:{','.join(state["sections"])}"
+    context_message= f"Research topic: {state['topic']}\nSections:{','.join(state['sections'])}"
 
     result= researcher_agent.invoke(input={"messages": [state["query"], AIMessage(content=context_message)]})
     messages= result["messages"]
@@ -624,10 +625,10 @@ workflow.add_edge("publisher", END)
 
 graph= workflow.compile()
 
-workflow_png= graph.get_graph().draw_mermaid_png()
-#with open("workflow.png", "wb") as f:
-    #f.write(workflow_png)
+workflow_png= GraphDiagram(graph)
+#workflow_png.save("workflow.png")
 
-user_message= HumanMessage(content= "I want a blog post about Kingdom Hearts 2")
+if __name__ == "__main__":
+    user_message= HumanMessage(content= "I want a blog post about Kingdom Hearts 2")
 
-result= graph.invoke(input={"query": user_message})
\ No newline at end of file
+    result= graph.invoke(input={"query": user_message})
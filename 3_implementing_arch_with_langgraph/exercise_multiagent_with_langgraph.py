@@ -1,4 +1,7 @@
 import os
+import json
+import asyncio
+import threading
 from typing import Dict, Any, List, Annotated
 from IPython.display import Image, display
 from urllib.parse import urlparse
@@ -19,15 +22,57 @@ from langgraph.graph.message import MessagesState
 from langgraph.prebuilt import ToolNode
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
-from tavily import TavilyClient
+from tavily import TavilyClient, AsyncTavilyClient
+from graph_diagrams import GraphDiagram
+from structured_output import StructuredParser
+from section_research import section_queries, gather_research
+from search_cache import SearchCache, CachedSearch
+from local_backends import FakeTavilyClient, AsyncFakeTavilyClient
+from keyword_matcher import keyword_matcher
+from markdown_model import parse_markdown
 
 nest_asyncio.apply()
 load_dotenv()
 
 llm= ChatOpenAI(model="gpt-4o-mini", temperature=0.0, api_key= os.getenv("OPENAI_API_KEY"), base_url= os.getenv("OPENAI_BASE_URL"))
-tavily_client = TavilyClient(
-    api_key=os.getenv("TAVILY_API_KEY")
-)
+
+# Búsqueda: "tavily" (la API) o "fake" (FakeTavilyClient en el proceso, sin red)
+SEARCH_BACKEND= os.getenv("SEARCH_BACKEND", "tavily")
+FAKE_SEARCH_LATENCY= float(os.getenv("FAKE_SEARCH_LATENCY", "0.5"))
+
+# Respuestas de búsqueda en disco: valen un día y como mucho 10.000 consultas (SEARCH_CACHE=off la desactiva).
+# El fichero se abre con la primera búsqueda, no al importar el módulo.
+SEARCH_CACHE_PATH: str | None= None
+if os.getenv("SEARCH_CACHE") != "off":
+    SEARCH_CACHE_PATH= os.getenv("SEARCH_CACHE", os.path.expanduser("~/.cache/blog-pipeline/search_cache.db"))
+SEARCH_CACHE: SearchCache | None= None
+_search_cache_lock= threading.Lock()
+
+def search_cache()-> SearchCache | None:
+    """SEARCH_CACHE, abriéndola la primera vez que se pide (None si está desactivada)."""
+    global SEARCH_CACHE, SEARCH_CACHE_PATH
+    with _search_cache_lock:
+        if SEARCH_CACHE is None and SEARCH_CACHE_PATH is not None:
+            SEARCH_CACHE= SearchCache(SEARCH_CACHE_PATH, ttl= 24 * 3600, max_entries= 10_000)
+            SEARCH_CACHE_PATH= None
+        return SEARCH_CACHE
+
+def search_client(asynchronous: bool= False):
+    """Cliente de búsqueda según SEARCH_BACKEND (asíncrono para la investigación en paralelo)."""
+    if SEARCH_BACKEND == "fake":
+        fake= AsyncFakeTavilyClient if asynchronous else FakeTavilyClient
+        return fake(latency= FAKE_SEARCH_LATENCY)
+    client= AsyncTavilyClient if asynchronous else TavilyClient
+    return client(api_key= os.getenv("TAVILY_API_KEY"), api_base_url= os.getenv("TAVILY_BASE_URL"))
+
+tavily_client = CachedSearch(search_client(), None)  # web_search le pone search_cache()
+
+# Valida el JSON final de cada agente; sólo si no valida hace la llamada with_structured_output
+STRUCTURED= StructuredParser(llm)
+
+# Investigación: una búsqueda por sección, en paralelo (PARALLEL_RESEARCH=off = el bucle del researcher_agent)
+PARALLEL_RESEARCH= os.getenv("PARALLEL_RESEARCH", "on") != "off"
+RESEARCH_CONCURRENCY= 8
 
 # Definir la estructura del estado para el workflow del blog
 class BlogState(MessagesState):
@@ -135,6 +180,7 @@ def web_search(question: str)-> Dict[str, Any]:
         >>> web_search(question="LangGraph multi-agent patterns")
         {'results': [{'url': 'https://...', 'title': '...', 'content': '...', 'score': 0.82}, ...]}
     """
+    tavily_client.cache= search_cache()
     response= tavily_client.search(query=question, max_results=5)
     return response
 
@@ -217,9 +263,7 @@ def estimate_read_time(markdown_text: str, wpm: int= 225)-> Dict[str, Any]:
         >>> estimate_read_time("# Title\\n\\nSome text.")
         {'word_count': 3, 'minutes': 1}
     """
-    import re
-    words= re.findall(r"\b\w+\b", markdown_text or "")
-    wc= len(words)
+    wc= parse_markdown(markdown_text or "").word_count
     minutes= max(1, round(wc/ max(100, wpm)))
     return {"word_count": wc, "minutes": minutes}
 
@@ -238,22 +282,25 @@ def markdown_lint(md: str)-> Dict[str, Any]:
 
     Checks:
         - Ensures the document starts with a single H1 ('# ').
-        - Warns if footnote markers are present but definitions are missing.
+        - Warns about footnote markers ('[^n]') without a matching definition ('[^n]: ...').
         - Flags overly long paragraphs (very rough heuristic).
 
     Example:
         >>> markdown_lint("No title")
         {'ok': False, 'issues': ['Missing H1 title at the very top (use '# Title').']}
     """
+    doc= parse_markdown(md)
     issues= []
-    if not md.strip().startswith('# '):
+    if not doc.starts_with_h1:
         issues.append("Missing H1 title at the very top (use '# Title').")
-    if "[^" in md and "]: " not in md:
+    undefined= doc.undefined_footnotes
+    if undefined and not doc.footnote_definitions:
         issues.append("Footnote marker used but no footnote definitions present.")
+    elif undefined:
+        issues.append(f"Footnote markers without a definition: {', '.join(f'[^{label}]' for label in undefined)}.")
 
-    for idx, para in enumerate([p for p in md.split("\n\n") if p.strip()], start=1):
-        if len(para) > 1200:
-            issues.append(f"Paragraph {idx} is very long; consider splitting.")
+    for idx in doc.long_paragraphs(1200):
+        issues.append(f"Paragraph {idx} is very long; consider splitting.")
 
     return {"ok": len(issues) == 0, "issues": issues}
 
@@ -283,21 +330,11 @@ def seo_score(md: str, keywords: List[str])-> Dict[str, Any]:
         >>> seo_score(md="# LangGraph Guide", keywords=["langgraph"])
         {'score': 28, 'title_hits': 1, 'heading_hits': 0, 'body_hits': 1, 'keywords_checked': ['langgraph']}
     """
-    import re
-    text= md.lower()
-    title= ""
-    headings= []
-    for line in md.splitlines():
-        if line.startswith('# '):
-            title= line.lower()
-        if line.startswith('#'):
-            headings.append(line.lower())
-    def contains(k: str, hay: str)-> bool:
-        return re.search(rf"\b{re.escape(k)}\b", hay) is not None
-    
-    title_hits= sum(1 for k in keywords if contains(k, title))
-    heading_hits= sum(1 for k in keywords if any(contains(k, h) for h in headings))
-    body_hits = sum(1 for k in keywords if contains(k, text))
+    # Un matcher compilado por conjunto de palabras clave; título, encabezados y cuerpo en una pasada
+    hits= keyword_matcher(tuple(keywords)).hits(parse_markdown(md))
+    title_hits= hits["title_hits"]
+    heading_hits= hits["heading_hits"]
+    body_hits = hits["body_hits"]
     score= min(100, title_hits * 20 + heading_hits * 6 + body_hits * 2)
     return{
         "score": score,
@@ -353,7 +390,7 @@ researcher_agent= create_react_agent(
             "You're a senior marketing researcher. "
             "Given the topic and optionally other sections, "
             "find RECENT, high-signal web information about the topic. "
-            "Call web_search at least once with a good query; "
+            "Call web_search once per section with a good query; "
             "then call dedupe_by_domain to remove duplicates. "
             "Return ONLY JSON with key 'research', an array of items "
             "each like {url,title,content,score} (deduped)."
@@ -400,7 +437,7 @@ reviewer_agent = create_react_agent(
             " 2) Call markdown_lint on the draft; then fix issues inline (H1 title, footnotes, long paragraphs).\n"
             " 3) Call seo_score; make small, high-quality edits to improve the score "
             "    without keyword stuffing (preserve voice and clarity).\n"
-            "Output: Return ONLY JSON with keys: final_markdown, seo, lint."
+            "Output: Return ONLY JSON with keys: final_markdown, seo_score (int), lint_issues (list of strings)."
         )
     ),
     model=llm,
@@ -470,8 +507,7 @@ def intake_node(state: BlogState)-> BlogState:
     messages= result["messages"]
     last_ai_message: AIMessage= messages[-1]
 
-    llm_with_structure= llm.with_structured_output(Blogplan)
-    structured_output: Blogplan=llm_with_structure.invoke(last_ai_message.content)
+    structured_output: Blogplan= STRUCTURED.parse(Blogplan, last_ai_message)
 
     print(f"message: {last_ai_message.content[:20]}...")
     print("Done!\n")
@@ -485,16 +521,43 @@ def intake_node(state: BlogState)-> BlogState:
         "keywords": structured_output.keywords,
     }
 
-def research_node(state: BlogState)-> BlogState:
+async def search_sections(queries: List[str]):
+    """Lanza las consultas con el cliente asíncrono (como mucho RESEARCH_CONCURRENCY a la vez), pasando por search_cache()."""
+    async with search_client(asynchronous= True) as client:
+        cached= CachedSearch(client, search_cache())
+        return await gather_research(
+            lambda query: cached.asearch(query=query, max_results=5), queries, max_concurrency=RESEARCH_CONCURRENCY
+        )
+
+async def parallel_research_node(state: BlogState)-> BlogState:
+    """Investigación sin bucle de agente: una consulta por sección en paralelo y dedupe_by_domain al final."""
+    print("Starting parallel research...")
+
+    queries= section_queries(state["topic"], state["sections"])
+    results, report= await search_sections(queries)
+    research= ResearchData.model_validate({"research": dedupe_by_domain.invoke({"results": results})}).research
+
+    print(f"queries: {report['queries']} (errors: {report['errors']}), wall: {report['wall']:.2f}s, sum: {report['sum']:.2f}s")
+    print("Done!\n")
+
+    return{
+        "messages": [AIMessage(content= json.dumps({"research": [r.model_dump() for r in research]}), name= "researcher_agent")],
+        "research": research
+    }
+
+async def research_node(state: BlogState)-> BlogState:
+    """Nodo asíncrono: el grafo se corre con `graph.ainvoke` (los demás nodos van en el executor)."""
+    if PARALLEL_RESEARCH:
+        return await parallel_research_node(state)
+
     print("Starting researcher agent...")
-    context_message= f"Research topic: {state["topic"]}\nSections:{','.join(state["sections"])}"
+    context_message= f"Research topic: {state['topic']}\nSections:{','.join(state['sections'])}"
 
-    result= researcher_agent.invoke(input={"messages": [state["query"], AIMessage(content=context_message)]})
+    result= await researcher_agent.ainvoke(input={"messages": [state["query"], AIMessage(content=context_message)]})
     messages= result["messages"]
     last_ai_message:AIMessage= messages[-1]
 
-    llm_with_structure= llm.with_structured_output(ResearchData)
-    structured_output: ResearchData= llm_with_structure.invoke(last_ai_message.content)
+    structured_output: ResearchData= STRUCTURED.parse(ResearchData, last_ai_message)
 
     print(f"message: {last_ai_message.content[:20]}...")
     print("Done!\n")
@@ -514,8 +577,7 @@ def writer_node(state: BlogState):
     messages= result["messages"]
     last_ai_message: AIMessage= messages[-1]
 
-    llm_with_structure= llm.with_structured_output(ContentDraft)
-    structured_output: ContentDraft= llm_with_structure.invoke(last_ai_message.content)
+    structured_output: ContentDraft= STRUCTURED.parse(ContentDraft, last_ai_message)
 
     print(f"message: {last_ai_message.content[:20]}...")
     print("Done!\n")
@@ -542,8 +604,7 @@ def reviewer_node(state: BlogState) -> BlogState:
     messages = result["messages"]
     last_ai_message:AIMessage = messages[-1]
 
-    llm_with_structure = llm.with_structured_output(ReviewedContent)
-    structured_output:ReviewedContent = llm_with_structure.invoke(last_ai_message.content)
+    structured_output: ReviewedContent= STRUCTURED.parse(ReviewedContent, last_ai_message)
     
     print(f"message: {last_ai_message.content[:20]}...")
     print("Done!\n")
@@ -571,8 +632,7 @@ def publisher_node(state: BlogState) -> BlogState:
     messages = result["messages"]
     last_ai_message:AIMessage = messages[-1]
     
-    llm_with_structure = llm.with_structured_output(PublicationStatus)
-    structured_output:PublicationStatus = llm_with_structure.invoke(last_ai_message.content)
+    structured_output: PublicationStatus= STRUCTURED.parse(PublicationStatus, last_ai_message)
     
     print(f"message: {last_ai_message.content[:20]}...")
     print("Done!\n")
@@ -601,15 +661,18 @@ workflow.add_edge("publisher", END)
 
 graph= workflow.compile()
 
-workflow_png= graph.get_graph().draw_mermaid_png()
-#with open("workflow.png", "wb") as f:
-    #f.write(workflow_png)
+workflow_png= GraphDiagram(graph)
+#workflow_png.save("workflow.png")
+
+if __name__ == "__main__":
+    user_message= HumanMessage(content= "I want a blog post about Kingdom Hearts 2")
 
-user_message= HumanMessage(content= "I want a blog post about Kingdom Hearts 2")
+    result= asyncio.run(graph.ainvoke(input={"query": user_message}))
 
-result= graph.invoke(input={"query": user_message})
+    result["publish_status"]
+    result["final_markdown"]
+    for message in result["messages"]:
+        message.pretty_print()
 
-result["publish_status"]
-result["final_markdown"]
-for message in result["messages"]:
-    message.pretty_print()
\ No newline at end of file
+    # Si todo validó a la primera no hay respaldo que cronometrar: se mide una llamada de muestra
+    print(f"Llamadas with_structured_output ahorradas: {STRUCTURED.saved(measure= True)}")
@@ -0,0 +1,106 @@
+"""Matcher de palabras clave compilado una vez por conjunto: título, encabezados y cuerpo en una sola pasada.
+
+`seo_score` compilaba `\\b{keyword}\\b` para cada palabra clave y lo buscaba en el título,
+en cada encabezado y en el texto entero: O(keywords × encabezados) búsquedas. Aquí:
+
+- el texto se parte una vez en tramos alternos de `\\w+` y `\\W+` (en C, con `re`),
+- si una palabra clave empieza y acaba en carácter de palabra, `\\b...\\b` casa justo
+  cuando sus tramos coinciden con tramos consecutivos del texto, así que todas esas
+  palabras clave van en un trie de tramos que se recorre desde cada tramo de palabra
+  (un Aho-Corasick sobre tramos, reiniciando en cada posición: las frases son cortas),
+- las pocas que empiezan o acaban en otro carácter ("c++", ".net") o están vacías se
+  quedan con su regex, compilada una vez.
+
+Los tramos, el título y los encabezados salen del `MarkdownDocument` compartido
+(markdown_model.py), y cada aparición se asigna por posición al título o a un encabezado,
+así que un solo recorrido da los tres recuentos. La semántica es la del código anterior, incluido que
+las palabras clave no se pasan a minúsculas (una con mayúsculas nunca casa).
+
+    matcher = keyword_matcher(("langgraph", "multi-agent systems"))
+    matcher.hits(parse_markdown(md))   # {'title_hits': 1, 'heading_hits': 2, 'body_hits': 2}
+"""
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Pattern, Set, Tuple
+
+from markdown_model import RUNS, MarkdownDocument
+
+END = ""  # clave de fin de palabra clave en el trie (ningún tramo es vacío)
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """Palabras clave compiladas para buscarlas todas de una vez.
+
+    Args:
+        keywords: palabras clave tal cual (sin pasarlas a minúsculas).
+    """
+
+    def __init__(self, keywords: Tuple[str, ...]) -> None:
+        self.keywords = keywords
+        self.trie: Dict[str, dict] = {}
+        self.patterns: List[Tuple[str, Pattern]] = []
+        for keyword in dict.fromkeys(keywords):
+            if keyword and _is_word(keyword[0]) and _is_word(keyword[-1]):
+                runs = RUNS.findall(keyword)
+                node = self.trie
+                for run in runs:
+                    node = node.setdefault(run, {})
+                node.setdefault(END, []).append(keyword)
+            else:
+                self.patterns.append((keyword, re.compile(rf"\b{re.escape(keyword)}\b")))
+
+    def matches(self, doc: MarkdownDocument):
+        """Apariciones (inicio, fin, palabra clave) en `doc.lower`, con la semántica de `\\b`."""
+        runs, offsets = doc.runs
+        trie = self.trie
+        first = 0 if runs and _is_word(runs[0][0]) else 1
+        for i in range(first, len(runs), 2):
+            node = trie.get(runs[i])
+            j = i
+            while node is not None:
+                for keyword in node.get(END, ()):
+                    yield offsets[i], offsets[j + 1], keyword
+                j += 1
+                if j >= len(runs):
+                    break
+                node = node.get(runs[j])
+        for keyword, pattern in self.patterns:
+            for match in pattern.finditer(doc.lower):
+                yield match.start(), match.end(), keyword
+
+    def hits(self, doc: MarkdownDocument) -> Dict[str, int]:
+        """Recuentos de seo_score: palabras clave presentes en el título (el último '# '), en algún encabezado y en el texto."""
+        cached = doc.keyword_hits.get(self.keywords)
+        if cached is not None:
+            return dict(cached)
+        headings = doc.headings
+        title = doc.title_span if doc.has_title else None
+        starts = [s for s, _ in headings]
+
+        in_title: Set[str] = set()
+        in_heading: Set[str] = set()
+        in_body: Set[str] = set()
+        for s, e, keyword in self.matches(doc):
+            in_body.add(keyword)
+            k = bisect_right(starts, s) - 1
+            if k >= 0 and e <= headings[k][1]:
+                in_heading.add(keyword)
+                if headings[k] == title:
+                    in_title.add(keyword)
+        hits = doc.keyword_hits[self.keywords] = {
+            "title_hits": sum(1 for k in self.keywords if k in in_title),
+            "heading_hits": sum(1 for k in self.keywords if k in in_heading),
+            "body_hits": sum(1 for k in self.keywords if k in in_body),
+        }
+        return dict(hits)
+
+
+@lru_cache(maxsize=64)
+def keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """El matcher de un conjunto de palabras clave, compilado la primera vez que se pide."""
+    return KeywordMatcher(keywords)
@@ -0,0 +1,316 @@
+"""Backends locales para correr la pipeline del blog sin red: un LLM compatible con OpenAI y una búsqueda tipo Tavily.
+
+`LocalBackends` levanta un servidor HTTP en un hilo con dos endpoints:
+
+- `POST /chat/completions`: cada agente react recibe un guion fijo (primero llama a sus
+  tools, después devuelve el JSON final que pide su prompt). Si la petición trae
+  `response_format` (la llamada `with_structured_output`), devuelve el JSON del mensaje
+  ajustado al schema.
+- `POST /search`: resultados deterministas por consulta, con dominios repetidos para que
+  `dedupe_by_domain` tenga trabajo.
+
+Cada endpoint duerme una latencia inyectada. El ejercicio lee `OPENAI_BASE_URL` y
+`TAVILY_BASE_URL`, así que basta con exportarlas antes de importarlo:
+
+    with LocalBackends(llm_latency=0.3, search_latency=0.5) as backends:
+        os.environ.update(backends.environ())
+        import exercise_multiagent_with_langgraph as blog
+
+Para la búsqueda sin servidor, `FakeTavilyClient` y `AsyncFakeTavilyClient` dan las mismas
+respuestas en el propio proceso (el ejercicio los usa con `SEARCH_BACKEND=fake`).
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from section_research import section_queries
+
+
+def _topic(text: str) -> str:
+    match = re.search(r"(?:about|topic:)\s*(.+)", text, re.IGNORECASE)
+    lines = (match.group(1) if match else text).strip().splitlines()
+    return lines[0].rstrip(".") if lines else "general"
+
+
+def _tool_results(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """{nombre de la tool: resultado} de los mensajes `tool` de la conversación."""
+    names = {}
+    for message in messages:
+        for call in message.get("tool_calls") or []:
+            names[call["id"]] = call["function"]["name"]
+    results = {}
+    for message in messages:
+        if message.get("role") == "tool":
+            try:
+                results[names.get(message["tool_call_id"])] = json.loads(message["content"])
+            except (TypeError, ValueError):
+                results[names.get(message["tool_call_id"])] = message["content"]
+    return results
+
+
+def _results_of(messages: List[Dict[str, Any]], name: str) -> List[Any]:
+    """Resultados, en orden, de todas las llamadas a la tool `name` (`_tool_results` sólo guarda la última)."""
+    ids = {call["id"] for message in messages for call in message.get("tool_calls") or [] if call["function"]["name"] == name}
+    return [json.loads(message["content"]) for message in messages if message.get("role") == "tool" and message.get("tool_call_id") in ids]
+
+
+def _context(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(m["content"] for m in messages if m.get("role") in ("user", "assistant") and isinstance(m.get("content"), str))
+
+
+def _fill(schema: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Completa las claves obligatorias que falten con un valor vacío de su tipo."""
+    empty = {"string": "", "integer": 0, "number": 0.0, "boolean": False, "array": [], "object": {}}
+    out = {key: data[key] for key in schema.get("properties", {}) if key in data}
+    for key in schema.get("required", []):
+        out.setdefault(key, empty.get(schema["properties"][key].get("type"), None))
+    return out
+
+
+class LocalBackends:
+    """Servidor local con el LLM guionizado y la búsqueda.
+
+    Args:
+        llm_latency: segundos que tarda cada `/chat/completions`.
+        search_latency: segundos que tarda cada `/search`.
+        search_jitter: segundos extra, entre 0 y este valor, que tarda cada consulta (fijos por consulta).
+        malformed: probabilidad de que el JSON final de un agente no valide (lleva una nota detrás).
+        seed: semilla de `malformed`.
+    """
+
+    def __init__(self, *, llm_latency: float = 0.0, search_latency: float = 0.0, search_jitter: float = 0.0, malformed: float = 0.0, seed: int = 0) -> None:
+        self.llm_latency = llm_latency
+        self.search_latency = search_latency
+        self.search_jitter = search_jitter
+        self.malformed = malformed
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, int] = {"completions": 0, "structured": 0, "searches": 0}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # SERVIDOR
+
+    def start(self) -> str:
+        backends = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path.rstrip("/").endswith("/chat/completions"):
+                    payload = backends.chat(body)
+                elif self.path.rstrip("/").endswith("/search"):
+                    payload = backends.search(body)
+                else:
+                    self.send_error(404)
+                    return
+                raw = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environ(self) -> Dict[str, str]:
+        """Variables de entorno que apuntan el ejercicio a este servidor."""
+        return {
+            "OPENAI_BASE_URL": self.url,
+            "OPENAI_API_KEY": "local",
+            "TAVILY_BASE_URL": self.url,
+            "TAVILY_API_KEY": "local",
+        }
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "LocalBackends":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    # BÚSQUEDA
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._count("searches")
+        response = search_results(body.get("query", ""), body.get("max_results") or 5, self.search_latency, self.search_jitter)
+        time.sleep(response["response_time"])
+        return response
+
+    # LLM
+
+    def chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._count("completions")
+        time.sleep(self.llm_latency)
+        messages = body.get("messages", [])
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            self._count("structured")
+            schema = response_format["json_schema"]["schema"]
+            text = messages[-1]["content"] if messages else ""
+            try:
+                data, _ = json.JSONDecoder().raw_decode(text[text.index("{") :])
+            except ValueError:
+                data = {}
+            return self._completion(content=json.dumps(_fill(schema, data)))
+
+        tools = {tool["function"]["name"] for tool in body.get("tools") or []}
+        results = _tool_results(messages)
+        step = self._script(tools, messages, results)
+        if isinstance(step, list):
+            return self._completion(tool_calls=step)
+        content = json.dumps(step)
+        if self.malformed and self.rng.random() < self.malformed:
+            # Como un modelo "hablador": una nota detrás del JSON que rompe la extracción directa
+            content += "\n\nNote: all {keys} requested are included above."
+        return self._completion(content=content)
+
+    def _script(self, tools: set, messages: List[Dict[str, Any]], results: Dict[str, Any]):
+        """Siguiente paso del agente: una lista de tool calls o el dict del JSON final."""
+        context = _context(messages)
+        if "outline_topic" in tools:
+            topic = _topic(context)
+            if "outline_topic" not in results:
+                return [_call("outline_topic", topic=topic), _call("generate_keywords", topic=topic)]
+            return {"topic": topic, **results["outline_topic"], "keywords": results["generate_keywords"]}
+        if "web_search" in tools:
+            topic = _topic(re.search(r"Research topic:(.*)", context).group(1)) if "Research topic:" in context else _topic(context)
+            sections = re.search(r"Sections:(.*)", context)
+            queries = section_queries(topic, [s for s in sections.group(1).split(",") if s.strip()]) if sections else [f"{topic} latest news"]
+            # Como el agente real: una consulta por sección y por turno, una detrás de otra
+            searched = _results_of(messages, "web_search")
+            if len(searched) < len(queries):
+                return [_call("web_search", question=queries[len(searched)])]
+            if "dedupe_by_domain" not in results:
+                return [_call("dedupe_by_domain", results=[item for response in searched for item in response["results"]])]
+            return {"research": results["dedupe_by_domain"]}
+        if "estimate_read_time" in tools:
+            title = re.search(r"Title:\s*(.*)", context).group(1)
+            sections = re.search(r"Sections:\s*(.*)", context).group(1).split(", ")
+            draft = f"# {title}\n\n" + "\n\n".join(f"## {s}\n\nSome words about {s.lower()} [^1]." for s in sections)
+            if "estimate_read_time" not in results:
+                return [_call("estimate_read_time", markdown_text=draft), _call("format_references", results=[{"title": title, "url": "https://example.org"}])]
+            minutes = results["estimate_read_time"]["minutes"]
+            draft = draft.replace("\n\n", f"\n\n_Estimated reading time: {minutes} min_\n\n", 1)
+            return {"draft_markdown": draft, "references_markdown": results["format_references"]}
+        if "markdown_lint" in tools:
+            draft = re.search(r"Draft:\s*(.*?)\.\.\.\nKeywords:", context, re.DOTALL).group(1)
+            keywords = re.search(r"Keywords:\s*(.*)", context).group(1).split(", ")
+            if "markdown_lint" not in results:
+                return [_call("markdown_lint", md=draft), _call("seo_score", md=draft, keywords=keywords)]
+            final = draft if "## References" in draft else draft + "\n\n## References\n"
+            return {"final_markdown": final, "seo_score": results["seo_score"]["score"], "lint_issues": results["markdown_lint"]["issues"]}
+        if "publish_blog" in tools:
+            if "publish_blog" not in results:
+                content = re.search(r"Content:\s*(.*)", context, re.DOTALL).group(1)
+                return [_call("publish_blog", body_md=content)]
+            return {"publish_status": "published"}
+        return {}
+
+    @staticmethod
+    def _completion(content: Optional[str] = None, tool_calls: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": "chatcmpl-local",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "local",
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+
+def search_results(query: str, max_results: int = 5, latency: float = 0.0, jitter: float = 0.0) -> Dict[str, Any]:
+    """Respuesta tipo Tavily determinista para `query`; `response_time` es la latencia (más su jitter) a simular."""
+    seed = int.from_bytes(hashlib.blake2b(query.encode("utf-8"), digest_size=8).digest(), "little")
+    rng = random.Random(seed)
+    latency += rng.random() * jitter
+    domains = ["wikipedia.org", "fandom.com", "ign.com", "gamespot.com", "reddit.com", "polygon.com", "kotaku.com"]
+    results = []
+    for i in range(max_results):
+        domain = rng.choice(domains)
+        results.append(
+            {
+                "url": f"https://{domain}/{query.lower().replace(' ', '-')}-{i}",
+                "title": f"{query} ({domain}, {i})",
+                "content": f"Notes about {query} from {domain}.",
+                "score": round(rng.random(), 3),
+            }
+        )
+    return {"query": query, "results": results, "response_time": latency}
+
+
+class FakeTavilyClient:
+    """Sustituto de TavilyClient en el propio proceso: mismas respuestas que `/search`, sin HTTP.
+
+    Args:
+        latency: segundos que tarda cada búsqueda.
+        jitter: segundos extra, entre 0 y este valor, fijos por consulta.
+    """
+
+    # Búsquedas de todos los clientes falsos (la investigación en paralelo crea uno por post)
+    total_calls = 0
+
+    def __init__(self, api_key: Optional[str] = None, *, latency: float = 0.0, jitter: float = 0.0, **kwargs: Any) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    def search(self, query: str, max_results: Optional[int] = None, **kwargs: Any) -> Dict[str, Any]:
+        self.calls += 1
+        FakeTavilyClient.total_calls += 1
+        response = search_results(query, max_results or 5, self.latency, self.jitter)
+        time.sleep(response["response_time"])
+        return response
+
+
+class AsyncFakeTavilyClient(FakeTavilyClient):
+    """Sustituto de AsyncTavilyClient: `await search(...)` y `async with`."""
+
+    async def search(self, query: str, max_results: Optional[int] = None, **kwargs: Any) -> Dict[str, Any]:
+        self.calls += 1
+        FakeTavilyClient.total_calls += 1
+        response = search_results(query, max_results or 5, self.latency, self.jitter)
+        await asyncio.sleep(response["response_time"])
+        return response
+
+    async def __aenter__(self) -> "AsyncFakeTavilyClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        pass
+
+
+_calls = iter(range(1, 1 << 62))
+
+
+def _call(name: str, **arguments: Any) -> Dict[str, Any]:
+    return {"id": f"call_{next(_calls)}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
@@ -0,0 +1,165 @@
+"""Modelo de documento markdown compartido por las tools del reviewer, cacheado por hash del contenido.
+
+`markdown_lint`, `estimate_read_time` y `seo_score` recorrían cada una el mismo markdown
+con sus propios `split` y regex, y el reviewer las llama una y otra vez sobre borradores
+casi iguales. `parse_markdown` devuelve un `MarkdownDocument` por contenido (LRU por hash):
+cada borrador se parsea una vez por revisión, lo llame quien lo llame. Las partes se
+calculan la primera vez que una tool las pide:
+
+- encabezados (líneas que empiezan por '#') y título (el último '# '), como posiciones
+  en el texto en minúsculas,
+- párrafos (bloques separados por una línea en blanco),
+- marcadores de nota `[^n]` y definiciones `[^n]: ...`,
+- palabras (`\\w+`) y tramos `\\w+`/`\\W+` del texto en minúsculas para el matcher de palabras clave.
+
+    doc = parse_markdown(draft)
+    doc.word_count, doc.title, doc.long_paragraphs(1200)
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+WORDS = re.compile(r"\w+")
+RUNS = re.compile(r"\w+|\W+")
+# Los mismos saltos de línea que str.splitlines()
+LINE_BREAK = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+FOOTNOTE_MARKER = re.compile(r"\[\^([^\]\s]+)\](?!:)")
+FOOTNOTE_DEFINITION = re.compile(r"^\[\^([^\]\s]+)\]:[ \t]*(.*)$", re.MULTILINE)
+
+
+class MarkdownDocument:
+    """Un borrador markdown ya partido; cada parte se calcula una vez, al pedirla.
+
+    Args:
+        text: el markdown tal cual.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        # Recuentos de seo_score ya calculados, por conjunto de palabras clave
+        self.keyword_hits: Dict[Tuple[str, ...], Dict[str, int]] = {}
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    # ESTRUCTURA
+
+    @cached_property
+    def _lines(self) -> Tuple[List[Tuple[int, int]], int]:
+        """(spans de los encabezados en `lower`, índice del título o -1), en una pasada por las líneas."""
+        text = self.lower
+        headings: List[Tuple[int, int]] = []
+        title = -1
+        start = 0
+        for line_break in [*LINE_BREAK.finditer(text), None]:
+            end = line_break.start() if line_break else len(text)
+            if text.startswith("#", start):
+                if text.startswith("# ", start):
+                    title = len(headings)
+                headings.append((start, end))
+            start = line_break.end() if line_break else start
+        return headings, title
+
+    @property
+    def headings(self) -> List[Tuple[int, int]]:
+        """Spans (inicio, fin) en `lower` de las líneas que empiezan por '#'."""
+        return self._lines[0]
+
+    @property
+    def title_span(self) -> Tuple[int, int]:
+        """Span del título (la última línea '# '); (0, 0) si no hay."""
+        headings, title = self._lines
+        return headings[title] if title >= 0 else (0, 0)
+
+    @property
+    def has_title(self) -> bool:
+        return self._lines[1] >= 0
+
+    @property
+    def title(self) -> str:
+        start, end = self.title_span
+        return self.lower[start:end]
+
+    @cached_property
+    def starts_with_h1(self) -> bool:
+        return self.text.strip().startswith("# ")
+
+    @cached_property
+    def paragraphs(self) -> List[str]:
+        """Bloques no vacíos separados por una línea en blanco."""
+        return [p for p in self.text.split("\n\n") if p.strip()]
+
+    def long_paragraphs(self, limit: int) -> List[int]:
+        """Números (desde 1) de los párrafos de más de `limit` caracteres."""
+        return [i for i, p in enumerate(self.paragraphs, start=1) if len(p) > limit]
+
+    # NOTAS AL PIE
+
+    @cached_property
+    def footnote_markers(self) -> List[str]:
+        """Etiquetas de los marcadores `[^n]` en el orden en que aparecen."""
+        return FOOTNOTE_MARKER.findall(self.text)
+
+    @cached_property
+    def footnote_definitions(self) -> Dict[str, str]:
+        """{etiqueta: texto} de las líneas `[^n]: ...`."""
+        return dict(FOOTNOTE_DEFINITION.findall(self.text))
+
+    @cached_property
+    def undefined_footnotes(self) -> List[str]:
+        """Etiquetas con marcador `[^n]` y sin definición, sin repetir y en orden de aparición."""
+        definitions = self.footnote_definitions
+        return [label for label in dict.fromkeys(self.footnote_markers) if label not in definitions]
+
+    # PALABRAS
+
+    @cached_property
+    def word_count(self) -> int:
+        return len(WORDS.findall(self.text))
+
+    @cached_property
+    def runs(self) -> Tuple[List[str], List[int]]:
+        """Tramos alternos `\\w+`/`\\W+` de `lower` y el offset de inicio de cada uno (más el final)."""
+        runs = RUNS.findall(self.lower)
+        return runs, [0, *accumulate(map(len, runs))]
+
+
+class DocumentCache:
+    """LRU de MarkdownDocument por hash del contenido.
+
+    Args:
+        max_entries: documentos que se guardan (los borradores de las últimas revisiones).
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self.max_entries = max_entries
+        self.stats: Dict[str, int] = {"hits": 0, "parses": 0}
+        self._docs: "OrderedDict[bytes, MarkdownDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> MarkdownDocument:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                self.stats["hits"] += 1
+                return doc
+            doc = self._docs[key] = MarkdownDocument(text)
+            self.stats["parses"] += 1
+            while len(self._docs) > self.max_entries:
+                self._docs.popitem(last=False)
+            return doc
+
+
+DOCUMENTS = DocumentCache()
+
+
+def parse_markdown(text: str) -> MarkdownDocument:
+    """El MarkdownDocument de `text`, del LRU compartido si ya se ha parseado."""
+    return DOCUMENTS.get(text)
@@ -0,0 +1,190 @@
+"""Caché persistente de búsquedas web: SQLite con TTL y tope LRU, y coalescencia de consultas en vuelo.
+
+`web_search` llamaba a `tavily_client.search` en cada consulta, así que regenerar posts
+sobre temas parecidos volvía a pagar toda la latencia de búsqueda. `CachedSearch` envuelve
+el cliente (se usa igual que él, `search(query=..., max_results=...)`):
+
+- la clave es la consulta normalizada (minúsculas, espacios colapsados, sin signos al
+  final) más los parámetros,
+- las respuestas se guardan en SQLite y caducan a los `ttl` segundos,
+- la tabla no pasa de `max_entries` filas: se expulsan las usadas hace más tiempo,
+- si varias llamadas piden la misma consulta a la vez, sólo una va al backend y el resto
+  espera su respuesta.
+
+    cache = SearchCache("search_cache.db", ttl=24 * 3600, max_entries=10_000)
+    tavily_client = CachedSearch(TavilyClient(api_key=...), cache)
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+
+def normalize_query(query: str) -> str:
+    """'  LangGraph   Agents? ' -> 'langgraph agents'."""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.!").strip().lower()
+
+
+def cache_key(query: str, **params: Any) -> str:
+    return json.dumps([normalize_query(query), sorted((k, v) for k, v in params.items() if v is not None)])
+
+
+class SearchCache:
+    """Respuestas de búsqueda en SQLite con caducidad y tope LRU.
+
+    Args:
+        path: fichero SQLite (":memory:" vale para pruebas).
+        ttl: segundos que vale una respuesta; None = no caduca.
+        max_entries: filas como mucho; al pasarse se borran las usadas hace más tiempo.
+    """
+
+    def __init__(self, path: str, *, ttl: Optional[float] = 24 * 3600, max_entries: int = 10_000) -> None:
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache (accessed);
+            """
+        )
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._rows = self.conn.execute("SELECT count(*) FROM search_cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[Dict[str, Any]]:
+        """Respuesta guardada para `key`, o None si no está o ha caducado."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT response, created FROM search_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += count_miss
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                with self.conn:
+                    self.conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._rows -= 1
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE search_cache SET accessed = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock, self.conn:
+            exists = self.conn.execute("SELECT 1 FROM search_cache WHERE key = ?", (key,)).fetchone() is not None
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(response), now, now),
+            )
+            self._rows += not exists
+            if self._rows > self.max_entries:
+                extra = self._rows - self.max_entries
+                self.conn.execute(
+                    "DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache ORDER BY accessed LIMIT ?)", (extra,)
+                )
+                self._rows -= extra
+                self.stats["evictions"] += extra
+
+
+class CachedSearch:
+    """Cliente de búsqueda con caché y coalescencia; mismo `search(query, **params)` que TavilyClient.
+
+    `search` llama a `client.search` de forma síncrona; `asearch` la espera, para envolver
+    un AsyncTavilyClient (o cualquier cliente con `async def search`).
+
+    Args:
+        client: cliente a envolver.
+        cache: SearchCache donde se guardan las respuestas (None = sólo coalescencia).
+    """
+
+    def __init__(self, client: Any, cache: Optional[SearchCache]) -> None:
+        self.client = client
+        self.cache = cache
+        self.stats: Dict[str, int] = {"backend_calls": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._ainflight: Dict[str, "asyncio.Future"] = {}
+
+    def search(self, query: str, **params: Any) -> Dict[str, Any]:
+        key = cache_key(query, **params)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            # Otra llamada pudo terminar y guardarla entre el fallo de caché y el lock
+            response = self.cache.get(key, count_miss=False) if self.cache is not None else None
+            if response is None:
+                self.stats["backend_calls"] += 1
+                response = self.client.search(query=query, **params)
+                if self.cache is not None:
+                    self.cache.put(key, response)
+            future.set_result(response)
+            return response
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def asearch(self, query: str, **params: Any) -> Dict[str, Any]:
+        key = cache_key(query, **params)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+        future = self._ainflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+        future = self._ainflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            self.stats["backend_calls"] += 1
+            response = await self.client.search(query=query, **params)
+            if self.cache is not None:
+                self.cache.put(key, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Si nadie más la esperaba, que asyncio no avise de una excepción sin recoger
+            future.exception()
+            raise
+        finally:
+            self._ainflight.pop(key, None)
@@ -0,0 +1,67 @@
+"""Investigación por sección en paralelo: una búsqueda por sección con asyncio y un tope de concurrencia.
+
+`researcher_agent` hacía sus llamadas a `web_search` una detrás de otra, aunque las siete
+secciones del plan son independientes. Aquí cada sección es una consulta, todas se lanzan
+a la vez (como mucho `max_concurrency` en vuelo) y el tiempo de la etapa pasa de la suma
+de las consultas a la más lenta de ellas. Una consulta que falla no tumba la etapa: se
+cuenta y se sigue con las demás.
+
+    queries = section_queries("Kingdom Hearts 2", sections)
+    results, report = await gather_research(search, queries, max_concurrency=4)   # search: async query -> dict
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+Search = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+def section_queries(topic: str, sections: List[str]) -> List[str]:
+    """Una consulta por sección (con el tema delante si la sección no lo nombra), sin repetidas."""
+    queries = []
+    for section in sections:
+        query = section if topic.lower() in section.lower() else f"{topic}: {section}"
+        if query not in queries:
+            queries.append(query)
+    return queries or [topic]
+
+
+async def gather_research(search: Search, queries: List[str], max_concurrency: int = 4) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Lanza las consultas con un semáforo; devuelve los resultados juntos y un informe de tiempos.
+
+    Args:
+        search: corrutina que recibe la consulta y devuelve la respuesta de Tavily ({'results': [...]}).
+        queries: consultas a lanzar.
+        max_concurrency: consultas en vuelo a la vez.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def one(query: str) -> Tuple[Dict[str, Any], float]:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await search(query)
+            return response, time.perf_counter() - start
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(query) for query in queries), return_exceptions=True)
+    wall = time.perf_counter() - start
+
+    results: List[Dict[str, Any]] = []
+    durations: List[float] = []
+    errors = 0
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors += 1
+            continue
+        response, seconds = outcome
+        results.extend(response.get("results", []))
+        durations.append(seconds)
+    report = {
+        "queries": len(queries),
+        "errors": errors,
+        "wall": wall,
+        "sum": sum(durations),
+        "max": max(durations, default=0.0),
+    }
+    return results, report
+
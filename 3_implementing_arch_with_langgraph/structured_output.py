@@ -0,0 +1,109 @@
+"""Output estructurado de un agente en una sola pasada, con la llamada extra al LLM sólo de respaldo.
+
+Cada nodo de la pipeline del blog corre su agente react y, después, hacía una segunda
+llamada `llm.with_structured_output(Schema)` sólo para volver a parsear el último mensaje
+del agente. Los prompts ya piden "Return ONLY JSON with keys: ...", así que casi siempre
+basta con extraer ese JSON y validarlo contra el schema de pydantic. `StructuredParser`
+hace eso y sólo si la validación falla paga la llamada extra:
+
+    parser = StructuredParser(llm)
+    plan = parser.parse(Blogplan, last_ai_message)   # 0 llamadas al LLM si el JSON es válido
+    parser.saved(measure=True)                       # {'llm_calls': 4, 'seconds': 3.3}
+"""
+import re
+import time
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
+
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel, ValidationError
+
+Schema = TypeVar("Schema", bound=BaseModel)
+
+
+def extract_json(text: str) -> str:
+    """Extrae el JSON de un bloque de código markdown o, si no hay, el primer objeto {...} del texto."""
+    # Bloque ```json ... ``` (o ``` ... ```)
+    json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
+    if json_match:
+        return json_match.group(1)
+
+    # Objeto JSON directamente en el texto
+    json_match = re.search(r"\{.*\}", text, re.DOTALL)
+    if json_match:
+        return json_match.group(0)
+
+    return text.strip()
+
+
+def message_text(message: BaseMessage) -> str:
+    """Texto de un mensaje, también cuando `content` es una lista de bloques."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(block if isinstance(block, str) else block.get("text", "") for block in message.content)
+
+
+class StructuredParser:
+    """Valida el último mensaje de un agente contra un schema; la llamada al LLM queda de respaldo.
+
+    Args:
+        llm: modelo para el respaldo `with_structured_output` (el mismo que usaban los nodos).
+        single_pass: False = comportamiento anterior, siempre la llamada extra (para comparar).
+    """
+
+    def __init__(self, llm: Any, single_pass: bool = True) -> None:
+        self.llm = llm
+        self.single_pass = single_pass
+        self.stats: Dict[str, float] = {"direct": 0, "fallback": 0, "fallback_seconds": 0.0}
+        # Último mensaje validado sin el LLM: sirve para medir una llamada si no hubo respaldos
+        self._last: Optional[Tuple[Type[BaseModel], str]] = None
+
+    def parse(self, schema: Type[Schema], message: BaseMessage) -> Schema:
+        text = message_text(message)
+        if self.single_pass:
+            try:
+                output = schema.model_validate_json(extract_json(text))
+            except ValidationError:
+                pass
+            else:
+                self.stats["direct"] += 1
+                self._last = (schema, text)
+                return output
+        return self._fallback(schema, text)
+
+    def _fallback(self, schema: Type[Schema], text: str) -> Schema:
+        start = time.perf_counter()
+        output = self.llm.with_structured_output(schema).invoke(text)
+        self.stats["fallback"] += 1
+        self.stats["fallback_seconds"] += time.perf_counter() - start
+        return output
+
+    def measure(self) -> Optional[float]:
+        """Cronometra una llamada `with_structured_output` sobre el último mensaje validado directamente.
+
+        Returns:
+            Segundos de la llamada, o None si todavía no se ha parseado nada sin el LLM.
+        """
+        if self._last is None:
+            return None
+        schema, text = self._last
+        start = time.perf_counter()
+        self.llm.with_structured_output(schema).invoke(text)
+        return time.perf_counter() - start
+
+    def saved(self, call_seconds: Optional[float] = None, measure: bool = False) -> Dict[str, Any]:
+        """Llamadas al LLM ahorradas y segundos estimados (a la latencia media medida del respaldo).
+
+        Args:
+            call_seconds: latencia de una llamada estructurada, si no se ha medido ningún respaldo.
+            measure: sin respaldos ni `call_seconds`, pagar una llamada de muestra (`measure`) para estimarla.
+        """
+        if call_seconds is None and self.stats["fallback"]:
+            call_seconds = self.stats["fallback_seconds"] / self.stats["fallback"]
+        if call_seconds is None and measure:
+            call_seconds = self.measure()
+        direct = int(self.stats["direct"])
+        return {"llm_calls": direct, "seconds": None if call_seconds is None else direct * call_seconds}
+
+    def reset(self) -> None:
+        self.stats = {"direct": 0, "fallback": 0, "fallback_seconds": 0.0}
+        self._last = None
@@ -15,6 +15,7 @@ from langgraph.graph.message import MessagesState
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
+from graph_diagrams import GraphDiagram
 
 nest_asyncio.apply()
 load_dotenv()
@@ -200,7 +201,7 @@ def create_team(name: str, agent_pool: List[CompiledStateGraph]):
 
 agent_teams= [create_team(team_name, agent_pool) for team_name, agent_pool in agent_swarm_map.items()]
 
-agent_teams_3_png= agent_teams[3].get_graph().draw_mermaid_png()
+agent_teams_3_png= GraphDiagram(agent_teams[3])
 
 # ENSAMBLAJE WORKFLOW
 
@@ -278,7 +279,7 @@ fintech_workflow= create_fintech_workflow()
 fintech_graph= fintech_workflow.compile(checkpointer=MemorySaver())
 
 
-fintech_workflow_png= fintech_graph.get_graph().draw_mermaid_png()
+fintech_workflow_png= GraphDiagram(fintech_graph)
 
 
 # CORRER SISTEMA MULTI AGENTE
@@ -0,0 +1,203 @@
+"""Diagramas de grafos LangGraph bajo demanda, renderizados en local y cacheados en disco.
+
+`get_graph().draw_mermaid_png()` al importar un módulo manda el grafo a mermaid.ink: añade
+segundos al arranque y falla sin red. `GraphDiagram` no hace nada hasta que se le pide
+el diagrama, y entonces:
+
+- `mermaid()`: el código Mermaid (local, siempre disponible; se guarda como .mmd),
+- `svg()`: un SVG por capas dibujado en Python puro, sin dependencias,
+- `png()`: con `mmdc` (mermaid-cli) o pyppeteer si están instalados; mermaid.ink sólo
+  si se activa con DIAGRAMS_REMOTE=1.
+
+Cada salida se guarda en `DIAGRAMS_CACHE` (por defecto ~/.cache/graph-diagrams) con el
+hash del código Mermaid, así que un grafo que no ha cambiado no se vuelve a renderizar.
+
+    workflow_png= GraphDiagram(graph)
+    workflow_png.save("workflow.png")
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+CACHE_DIR = os.getenv("DIAGRAMS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "graph-diagrams"))
+
+NODE_WIDTH, NODE_HEIGHT, H_GAP, V_GAP = 150, 36, 30, 60
+
+
+class GraphDiagram:
+    """Diagrama perezoso de un grafo compilado (o de cualquier objeto con `get_graph()`).
+
+    Args:
+        graph: el grafo compilado.
+        cache_dir: directorio de la caché en disco.
+    """
+
+    def __init__(self, graph, *, cache_dir: Optional[str] = None) -> None:
+        self.graph = graph
+        self.cache_dir = cache_dir or CACHE_DIR
+        self._mermaid: Optional[str] = None
+
+    def mermaid(self) -> str:
+        if self._mermaid is None:
+            self._mermaid = self.graph.get_graph().draw_mermaid()
+        return self._mermaid
+
+    @property
+    def key(self) -> str:
+        """Hash de la estructura del grafo (su código Mermaid)."""
+        return hashlib.sha256(self.mermaid().encode("utf-8")).hexdigest()[:16]
+
+    def _cached(self, extension: str, render) -> bytes:
+        path = os.path.join(self.cache_dir, f"{self.key}.{extension}")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        data = render()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Escritura atómica: otro proceso nunca lee un fichero a medias
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=f".{extension}")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return data
+
+    # FORMATOS
+
+    def svg(self) -> str:
+        return self._cached("svg", lambda: layered_svg(self.graph.get_graph()).encode("utf-8")).decode("utf-8")
+
+    def png(self) -> bytes:
+        return self._cached("png", self._render_png)
+
+    def _render_png(self) -> bytes:
+        if shutil.which("mmdc"):
+            with tempfile.TemporaryDirectory() as tmp:
+                source, target = os.path.join(tmp, "graph.mmd"), os.path.join(tmp, "graph.png")
+                with open(source, "w", encoding="utf-8") as f:
+                    f.write(self.mermaid())
+                subprocess.run(["mmdc", "-i", source, "-o", target, "-b", "white"], check=True, capture_output=True)
+                with open(target, "rb") as f:
+                    return f.read()
+
+        from langchain_core.runnables.graph import MermaidDrawMethod
+
+        try:
+            import pyppeteer  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            return self.graph.get_graph().draw_mermaid_png(draw_method=MermaidDrawMethod.PYPPETEER)
+        if os.getenv("DIAGRAMS_REMOTE") == "1":
+            return self.graph.get_graph().draw_mermaid_png(draw_method=MermaidDrawMethod.API)
+        raise RuntimeError(
+            "No local PNG renderer (install mermaid-cli or pyppeteer, or set DIAGRAMS_REMOTE=1); "
+            "use .svg() or .mermaid() instead"
+        )
+
+    def save(self, path: str) -> str:
+        """Guarda el diagrama en el formato que indique la extensión (.png, .svg o .mmd)."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".png":
+            data = self.png()
+        elif extension == ".svg":
+            data = self.svg().encode("utf-8")
+        elif extension in (".mmd", ".mermaid"):
+            data = self.mermaid().encode("utf-8")
+        else:
+            raise ValueError(f"Unsupported diagram format: {extension!r}")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _repr_svg_(self) -> str:
+        # display(workflow_png) en un notebook: SVG local, sin red
+        return self.svg()
+
+
+# DIBUJO POR CAPAS
+
+
+def layers(graph) -> Dict[str, int]:
+    """Capa de cada nodo: distancia mínima desde el inicio; `__end__` siempre en la última."""
+    start = graph.first_node().id if graph.first_node() else next(iter(graph.nodes))
+    end = graph.last_node().id if graph.last_node() else None
+    children: Dict[str, List[str]] = {node: [] for node in graph.nodes}
+    for edge in graph.edges:
+        children[edge.source].append(edge.target)
+    depth = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for child in children[node]:
+            if child not in depth and child != end:
+                depth[child] = depth[node] + 1
+                queue.append(child)
+    last = max(depth.values(), default=0) + 1
+    for node in graph.nodes:
+        # Nodos inalcanzables (destinos de Command sin anotar) en una capa aparte al final
+        if node != end:
+            depth.setdefault(node, last)
+    if end is not None:
+        depth[end] = max((d for node, d in depth.items() if node != end), default=0) + 1
+    return depth
+
+
+def layered_svg(graph) -> str:
+    """SVG con un nodo por caja, una fila por capa y las aristas condicionales discontinuas."""
+    depth = layers(graph)
+    rows: Dict[int, List[str]] = {}
+    for node in graph.nodes:
+        rows.setdefault(depth[node], []).append(node)
+    widest = max(len(row) for row in rows.values())
+    width = widest * (NODE_WIDTH + H_GAP) + H_GAP
+    height = (max(rows) + 1) * (NODE_HEIGHT + V_GAP) + V_GAP
+
+    position: Dict[str, Tuple[float, float]] = {}
+    for level, row in rows.items():
+        offset = (width - len(row) * (NODE_WIDTH + H_GAP) + H_GAP) / 2
+        for i, node in enumerate(row):
+            position[node] = (offset + i * (NODE_WIDTH + H_GAP), V_GAP + level * (NODE_HEIGHT + V_GAP))
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        'font-family="sans-serif" font-size="13">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="7" markerHeight="7" '
+        'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z" fill="#555"/></marker></defs>',
+        '<rect width="100%" height="100%" fill="white"/>',
+    ]
+    for edge in graph.edges:
+        (x1, y1), (x2, y2) = position[edge.source], position[edge.target]
+        dash = ' stroke-dasharray="5,4"' if edge.conditional else ""
+        if depth[edge.target] > depth[edge.source]:
+            path = f"M {x1 + NODE_WIDTH / 2} {y1 + NODE_HEIGHT} L {x2 + NODE_WIDTH / 2} {y2}"
+        else:
+            # Aristas hacia arriba o dentro de la misma capa: curva por el lateral
+            bend = 40 + 15 * abs(depth[edge.source] - depth[edge.target])
+            path = (
+                f"M {x1 + NODE_WIDTH} {y1 + NODE_HEIGHT / 2} "
+                f"C {x1 + NODE_WIDTH + bend} {y1 + NODE_HEIGHT / 2}, {x2 + NODE_WIDTH + bend} {y2 + NODE_HEIGHT / 2}, "
+                f"{x2 + NODE_WIDTH} {y2 + NODE_HEIGHT / 2}"
+            )
+        parts.append(f'<path d="{path}" fill="none" stroke="#555"{dash} marker-end="url(#arrow)"/>')
+        if edge.data:
+            parts.append(
+                f'<text x="{(x1 + x2 + NODE_WIDTH) / 2 + 4}" y="{(y1 + y2 + NODE_HEIGHT) / 2}" fill="#555">'
+                f"{escape(str(edge.data))}</text>"
+            )
+    for node_id, node in graph.nodes.items():
+        x, y = position[node_id]
+        terminal = node_id in ("__start__", "__end__")
+        parts.append(
+            f'<rect x="{x}" y="{y}" width="{NODE_WIDTH}" height="{NODE_HEIGHT}" rx="{NODE_HEIGHT / 2 if terminal else 6}" '
+            f'fill="{"#bfb6fc" if terminal else "#f2f0ff"}" stroke="#7a6ff0"/>'
+        )
+        parts.append(
+            f'<text x="{x + NODE_WIDTH / 2}" y="{y + NODE_HEIGHT / 2 + 4}" text-anchor="middle">{escape(node.name)}</text>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)